@@ -0,0 +1,313 @@
+"""Benchmarks for the ingestion and analysis hot paths.
+
+Runs locally with no network on a synthetic depth stream. Each stage runs in
+its own process so peak RSS is reported per stage.
+
+    python -m benchmarks.run_benchmarks --symbols 2 --levels 1000 --rate 100 --duration 10 --save bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json   # exit code 1 on regression
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import SyntheticDepthStream, StaticSnapshotSource
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIVERGENCE_SCRIPT = os.path.join(REPO_ROOT, "cvd_analysis", "cvd_analysis-v2-12Feb.py")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(latencies_ns, elapsed, calls, snapshot_fetches=None):
+    """Builds the result record for one stage."""
+    latencies_us = np.asarray(latencies_ns, dtype=np.float64) / 1000.0
+    p50, p90, p99 = np.percentile(latencies_us, [50, 90, 99]) if len(latencies_us) else (0.0, 0.0, 0.0)
+    return {
+        "calls": calls,
+        "elapsed_s": elapsed,
+        "msgs_per_sec": calls / elapsed if elapsed > 0 else 0.0,
+        "latency_us": {
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "max": float(latencies_us.max()) if len(latencies_us) else 0.0,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "snapshot_fetches": snapshot_fetches,  # REST snapshots the trackers asked for (None where no book is synced)
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the live path's prints and console log lines; their formatting cost is still measured."""
+    from src.utils.logger import get_live_logger
+
+    log = get_live_logger()  # Created outside the redirect, so its console handler keeps the real stdout
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        console = log.console_handler.setStream(devnull) if log.console_handler else None
+        try:
+            yield
+        finally:
+            log.flush()  # Records queued inside the block go to devnull too
+            if console is not None:
+                log.console_handler.setStream(console)
+
+
+def build_trackers(stream):
+    from src.trading.order_book_tracker import OrderBookTracker
+
+    snapshots = {stream.trading_pair(s): stream.snapshot(i) for i, s in enumerate(stream.symbols)}
+    source = StaticSnapshotSource(snapshots)
+    return source, [OrderBookTracker(trading_pair=stream.trading_pair(s), snapshot_source=source) for s in stream.symbols]
+
+
+def bench_book_update(config):
+    """OrderBookTracker.update_order_book per decoded diff."""
+    stream = SyntheticDepthStream(**config)
+    source, trackers = build_trackers(stream)
+    diffs = [list(stream.diffs(i)) for i in range(len(stream.symbols))]
+
+    latencies = []
+    started = time.perf_counter()
+    with quiet():
+        for tracker, symbol_diffs in zip(trackers, diffs):
+            for diff in symbol_diffs:
+                t0 = time.perf_counter_ns()
+                tracker.update_order_book("binance", diff)
+                latencies.append(time.perf_counter_ns() - t0)
+    return summarize(latencies, time.perf_counter() - started, len(latencies), source.fetches)
+
+
+def bench_spread(config):
+    """OrderBookAnalysis.compute_bid_ask_spread per top-of-book snapshot."""
+    from src.trading.order_book_analysis import OrderBookAnalysis
+
+    stream = SyntheticDepthStream(**config)
+    _, trackers = build_trackers(stream)
+    tracker = trackers[0]
+    books = []
+    with quiet():
+        for diff in stream.diffs(0):
+            if tracker.update_order_book("binance", diff):
+                books.append(tracker.get_order_book())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        analysis = OrderBookAnalysis(tracker.order_book_buffer, cvd_file=os.path.join(tmp, "cvd.ndjson"))
+        latencies = []
+        started = time.perf_counter()
+        with quiet():
+            for book in books:
+                t0 = time.perf_counter_ns()
+                analysis.compute_bid_ask_spread(book)
+                latencies.append(time.perf_counter_ns() - t0)
+        elapsed = time.perf_counter() - started
+        analysis.close()
+    return summarize(latencies, elapsed, len(latencies))
+
+
+def bench_cvd(config):
+    """OrderBookAnalysis.compute_cvd after each appended snapshot."""
+    from src.trading.order_book_analysis import OrderBookAnalysis
+
+    stream = SyntheticDepthStream(**config)
+    _, trackers = build_trackers(stream)
+    tracker = trackers[0]
+    buffer = tracker.order_book_buffer
+    bids = [[100.0 - i * 0.01, 1.0 + i] for i in range(5)]
+    asks = [[100.01 + i * 0.01, 1.5] for i in range(5)]
+    n = stream.messages_per_symbol * len(stream.symbols)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        analysis = OrderBookAnalysis(buffer, cvd_file=os.path.join(tmp, "cvd.ndjson"))
+        latencies = []
+        started = time.perf_counter()
+        with quiet():
+            for i in range(n):
+                buffer.append(float(i), bids, asks)
+                t0 = time.perf_counter_ns()
+                analysis.compute_cvd(100.0)
+                latencies.append(time.perf_counter_ns() - t0)
+        elapsed = time.perf_counter() - started
+        analysis.close()
+    return summarize(latencies, elapsed, len(latencies))
+
+
+def load_divergence_class():
+    """Imports CVDAnalysis from the v2 script (its file name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location("cvd_analysis_v2", DIVERGENCE_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.CVDAnalysis
+
+
+def bench_divergences(config, rows, repeats=3):
+    """CVDAnalysis.detect_divergences over a merged CVD/price frame of `rows` rows."""
+    CVDAnalysis = load_divergence_class()
+    rng = np.random.default_rng(config.get("seed", 42))
+    df = pd.DataFrame({
+        "timestamp": np.arange(rows, dtype=np.float64),
+        "cvd": np.cumsum(rng.normal(0, 1, rows)),
+        "price": 100 + np.cumsum(rng.normal(0, 0.01, rows)),
+    })
+
+    analysis = CVDAnalysis()
+    latencies = []
+    started = time.perf_counter()
+    with quiet():
+        for _ in range(repeats):
+            t0 = time.perf_counter_ns()
+            analysis.detect_divergences(df)
+            latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies, elapsed, repeats * rows)  # Throughput in rows/sec
+    result["rows"] = rows
+    return result
+
+
+def bench_end_to_end(config):
+    """WebSocketManager.handle_frame: decode -> book -> spread -> CVD -> persistence enqueue."""
+    from src.exchanges.websockets import WebSocketManager
+
+    stream = SyntheticDepthStream(**config)
+    snapshots = {stream.trading_pair(s): stream.snapshot(i) for i, s in enumerate(stream.symbols)}
+    source = StaticSnapshotSource(snapshots)
+    frames = [list(stream.frames(i)) for i in range(len(stream.symbols))]
+
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        managers = [
+            WebSocketManager(
+                stream.trading_pair(s),
+                exchange=source,
+                price_file=os.path.join(tmp, f"price_{s}.ndjson"),
+                cvd_file=os.path.join(tmp, f"cvd_{s}.ndjson"),
+                trade_cvd_file=os.path.join(tmp, f"trade_cvd_{s}.ndjson"),
+                bar_file=os.path.join(tmp, f"bars_{s}.ndjson"),
+            )
+            for s in stream.symbols
+        ]
+        started = time.perf_counter()
+        with quiet():
+            for manager, symbol_frames in zip(managers, frames):
+                for message in symbol_frames:
+                    t0 = time.perf_counter_ns()
+                    manager.handle_frame(time.time(), message)
+                    latencies.append(time.perf_counter_ns() - t0)
+        elapsed = time.perf_counter() - started
+        for manager in managers:
+            manager.close()
+    return summarize(latencies, elapsed, len(latencies), source.fetches)
+
+
+STAGES = {
+    "book_update": bench_book_update,
+    "spread": bench_spread,
+    "cvd": bench_cvd,
+    "divergences": bench_divergences,
+    "end_to_end": bench_end_to_end,
+}
+
+
+def run_stage(name, config, divergence_rows):
+    """Entry point of the per-stage worker process."""
+    if name == "divergences":
+        return STAGES[name](config, divergence_rows)
+    return STAGES[name](config)
+
+
+def run_all(config, stages, divergence_rows):
+    """Runs each stage in a fresh process and collects results."""
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        own_log = "LIVE_LOG_FILE" not in os.environ
+        if own_log:
+            os.environ["LIVE_LOG_FILE"] = os.path.join(tmp, "live.log")  # Inherited by the stage processes
+        try:
+            for name in stages:
+                with context.Pool(1) as pool:
+                    results[name] = pool.apply(run_stage, (name, config, divergence_rows))
+                r = results[name]
+                print(
+                    f"[BENCH] {name:<12} {r['msgs_per_sec']:>12.0f} msgs/sec  "
+                    f"p50 {r['latency_us']['p50']:>9.1f}us  p99 {r['latency_us']['p99']:>9.1f}us  "
+                    f"peak RSS {r['peak_rss_mb']:.0f} MB"
+                    + (f"  snapshots {r['snapshot_fetches']}" if r.get("snapshot_fetches") is not None else "")
+                )
+        finally:
+            if own_log:
+                del os.environ["LIVE_LOG_FILE"]
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regression messages against a saved baseline."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("stages", {}).get(name)
+        if previous is None:
+            continue
+        if current["msgs_per_sec"] < previous["msgs_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['msgs_per_sec']:.0f} < baseline {previous['msgs_per_sec']:.0f} msgs/sec")
+        if current["latency_us"]["p99"] > previous["latency_us"]["p99"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {current['latency_us']['p99']:.1f}us > baseline {previous['latency_us']['p99']:.1f}us")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion and analysis hot paths.")
+    parser.add_argument("--symbols", type=int, default=1)
+    parser.add_argument("--levels", type=int, default=1000, help="Snapshot depth per side")
+    parser.add_argument("--rate", type=float, default=100, help="Messages per second per symbol")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of synthetic stream per symbol")
+    parser.add_argument("--snapshot-offset", type=int, default=25, help="Update ids the REST snapshot is ahead of the first diff (0 = no buffered diffs)")
+    parser.add_argument("--divergence-rows", type=int, default=10000)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--save", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a saved results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    config = {"symbols": args.symbols, "levels": args.levels, "rate": args.rate, "duration": args.duration, "snapshot_offset": args.snapshot_offset}
+    results = run_all(config, args.stages, args.divergence_rows)
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": dict(config, divergence_rows=args.divergence_rows),
+        "stages": results,
+    }
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"[INFO] Benchmark results saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"[REGRESSION] {message}")
+        if regressions:
+            return 1
+        print("[INFO] No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
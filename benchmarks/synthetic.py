@@ -0,0 +1,100 @@
+import json
+import numpy as np
+
+
+class SyntheticDepthStream:
+    """Generates a reproducible Binance-style `@depth` stream without network access.
+
+    For each symbol the stream starts from a REST-style snapshot with `levels`
+    price levels per side, then emits diffs with consecutive `U`/`u` update
+    ids. Each diff touches `levels_per_diff` levels near the top of the book,
+    some of them with quantity 0 (level removal). Event times (`E`) are
+    spaced to match `rate` messages per second per symbol.
+
+    The snapshot's update id is `snapshot_offset` ids past the one just
+    before the first diff, as when the REST snapshot lands after some diffs
+    were already buffered: the diffs it covers are dropped and the book
+    syncs on the diff that straddles it. 0 = the first diff follows it exactly.
+    """
+
+    def __init__(self, symbols=1, levels=1000, rate=100, duration=10, levels_per_diff=10, tick=0.01, seed=42, snapshot_offset=0):
+        self.symbols = [f"SYM{i}USDT" for i in range(symbols)]
+        self.levels = levels
+        self.rate = rate
+        self.duration = duration
+        self.levels_per_diff = levels_per_diff
+        self.tick = tick
+        self.seed = seed
+        self.snapshot_offset = snapshot_offset
+
+    @property
+    def messages_per_symbol(self):
+        return int(self.rate * self.duration)
+
+    def trading_pair(self, symbol):
+        """Maps SYM0USDT -> SYM0/USDT."""
+        return f"{symbol[:-4]}/USDT"
+
+    def snapshot(self, symbol_index, mid=100.0):
+        """Returns a ccxt-style snapshot (bids/asks/nonce) for one symbol."""
+        rng = np.random.default_rng(self.seed + symbol_index)
+        offsets = np.arange(1, self.levels + 1) * self.tick
+        bid_qty = rng.exponential(2.0, self.levels).round(5)
+        ask_qty = rng.exponential(2.0, self.levels).round(5)
+        return {
+            "bids": [[round(mid - o, 2), q] for o, q in zip(offsets, bid_qty)],
+            "asks": [[round(mid + o, 2), q] for o, q in zip(offsets, ask_qty)],
+            "nonce": 1000 + self.snapshot_offset,
+        }
+
+    def diffs(self, symbol_index, mid=100.0):
+        """Yields decoded diff events for one symbol."""
+        rng = np.random.default_rng(self.seed + 1000 + symbol_index)
+        symbol = self.symbols[symbol_index]
+        update_id = 1001
+        event_time = 1_700_000_000_000
+        step_ms = 1000.0 / self.rate
+        n = self.messages_per_symbol
+        k = self.levels_per_diff
+
+        # Draw everything up front so generation cost stays out of timed loops
+        drift = np.cumsum(rng.choice([-1, 0, 1], size=n, p=[0.3, 0.4, 0.3])) * self.tick
+        depth_offsets = rng.integers(1, max(2, self.levels // 10), size=(n, 2, k)) * self.tick
+        quantities = rng.exponential(2.0, size=(n, 2, k)).round(5)
+        quantities[rng.random((n, 2, k)) < 0.2] = 0.0  # Some levels get removed
+
+        for i in range(n):
+            m = mid + drift[i]
+            bids = [[f"{m - o:.2f}", f"{q:.5f}"] for o, q in zip(depth_offsets[i, 0], quantities[i, 0])]
+            asks = [[f"{m + o:.2f}", f"{q:.5f}"] for o, q in zip(depth_offsets[i, 1], quantities[i, 1])]
+            last_id = update_id + k - 1
+            yield {
+                "e": "depthUpdate",
+                "E": int(event_time + i * step_ms),
+                "s": symbol,
+                "U": update_id,
+                "u": last_id,
+                "b": bids,
+                "a": asks,
+            }
+            update_id = last_id + 1
+
+    def frames(self, symbol_index, mid=100.0):
+        """Yields diffs as raw JSON text, as received from the socket."""
+        for diff in self.diffs(symbol_index, mid):
+            yield json.dumps(diff)
+
+
+class StaticSnapshotSource:
+    """Snapshot source for benchmarks: returns a pre-built snapshot per trading pair."""
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+        self.fetches = 0
+
+    def fetch_order_book(self, symbol):
+        self.fetches += 1
+        return self.snapshots[symbol]
+
+    def fetch_futures_order_book(self, symbol):
+        return {"bids": [], "asks": []}
@@ -1,3 +1,104 @@
+import os
+
 TRADING_PAIR = "BTC/USDT"
 LARGE_ORDER_THRESHOLD = 50
 STOP_LOSS_BUFFER = 50
+
+# Append-only persistence of live series (see src/utils/series_log.py)
+PRICE_DATA_FILE = "data/price_data.ndjson"
+CVD_DATA_FILE = "data/cvd_data.ndjson"
+PERSIST_BATCH_SIZE = 100
+PERSIST_FLUSH_INTERVAL = 1.0
+PERSIST_FSYNC_INTERVAL = 5.0
+
+# Ingestion pipeline (see src/utils/pipeline.py): decode -> book -> analytics -> persistence
+PIPELINE_QUEUE_SIZE = 10000
+PIPELINE_RAW_OVERFLOW = "drop_oldest"  # Dropped diffs show up as a sequence gap and trigger a resync
+PIPELINE_BOOK_OVERFLOW = "block"
+PIPELINE_ANALYTICS_OVERFLOW = "coalesce"  # Analytics only needs the latest book per symbol
+
+# Raw frame capture / replay (see src/utils/frame_capture.py and src/exchanges/replay.py)
+CAPTURE_DIR = "data/captures"
+REPLAY_PRICE_DATA_FILE = "data/replay/price_data.ndjson"
+REPLAY_CVD_DATA_FILE = "data/replay/cvd_data.ndjson"
+
+# Partitioned columnar series (see src/utils/timeseries_store.py), one store root per series
+CVD_STORE_DIR = "data/series/cvd"
+PRICE_STORE_DIR = "data/series/price"
+
+# Local order book (see src/trading/order_book_tracker.py)
+ORDER_BOOK_BUFFER_SIZE = 600  # Top-of-book snapshots kept per symbol: one minute of @depth@100ms diffs (~200 KB at depth 5)
+
+# Historical order books (see src/trading/order_book_storage.py)
+ORDER_BOOK_FLUSH_INTERVAL = 60.0  # Seconds before a partial keyframe block is written anyway
+
+# Live CVD smoothing (see src/analysis/online_smoothing.py)
+CVD_SMOOTHING_WINDOWS = (10,)
+CVD_SMOOTHING_KINDS = ("sma", "ema")  # Also available: "wma", "hma"
+
+# REST snapshot cache (see src/exchanges/snapshot_cache.py)
+SNAPSHOT_CACHE_TTL = 1.0  # Seconds; keep short, a resync needs a snapshot newer than the buffered diffs
+SNAPSHOT_CACHE_SIZE = 512
+SNAPSHOT_RETRY_DELAY = 0.5  # Seconds before refetching after a failed snapshot (error, empty book, no update id); doubles per failure
+SNAPSHOT_RETRY_MAX_DELAY = 30.0
+
+# Combined-stream multiplexer (see src/exchanges/stream_multiplexer.py)
+MULTIPLEX_QUEUE_SIZE = 10000  # Events buffered per symbol between the event loop and the dispatch thread
+MULTIPLEX_OVERFLOW = "drop_oldest"  # Never "block": the event loop reads every socket. A dropped diff triggers a resync
+MULTIPLEX_DISPATCH_BATCH = 100  # Events handled per symbol before the dispatch thread moves to the next symbol
+SNAPSHOT_FETCH_WORKERS = 4  # Threads fetching resync snapshots, so a resync never stalls the other symbols
+
+# Per-stage latency histograms (see src/utils/latency.py)
+LATENCY_METRICS_ENABLED = True
+LATENCY_METRICS_PORT = 9101  # Local JSON endpoint: http://127.0.0.1:9101/metrics
+
+# Live-path logging (see src/utils/logger.py): queued, rate limited per symbol
+LOG_LEVEL = "INFO"
+LOG_FILE = os.environ.get("LIVE_LOG_FILE", "data/logs/live.log")  # JSON lines; tests and benchmarks point it at a temp dir
+LOG_CONSOLE = True
+LOG_QUEUE_SIZE = 10000  # Records beyond this are dropped, never block ingestion
+LOG_BOOK_INTERVAL = 1.0  # Seconds between order book tables per symbol
+LOG_STATUS_INTERVAL = 1.0  # Seconds between spread / CVD / price lines per symbol
+
+# Order flow imbalance (see src/analysis/order_flow.py)
+OFI_LEVELS = 5  # Levels summed into the aggregate OFI (None = all buffered levels)
+OFI_WINDOWS = (1.0, 10.0)  # Trailing time windows in seconds
+
+# Trade-based CVD from @aggTrade (see src/trading/trade_cvd.py); same record format as CVD_DATA_FILE
+TRADE_CVD_DATA_FILE = "data/trade_cvd_data.ndjson"
+TRADE_CVD_INTERVAL = 1.0  # Seconds per bucket
+REPLAY_TRADE_CVD_DATA_FILE = "data/replay/trade_cvd_data.ndjson"
+
+# Trade bars (see src/trading/bar_builder.py); one file per spec, e.g. data/bars_time_60.ndjson
+BAR_SPECS = (("time", 60), ("tick", 1000), ("volume", 100.0))  # (kind, size): seconds, trades or base volume per bar
+BAR_FOOTPRINT_TICK = None  # Price bin for footprint bars (e.g. 10.0); None = no footprints
+BAR_CAPACITY = 100000  # Closed bars kept in memory per spec
+BAR_DATA_FILE = "data/bars.ndjson"
+REPLAY_BAR_DATA_FILE = "data/replay/bars.ndjson"
+
+# Bullish order block detector (see src/analysis/order_blocks.py, port of PineScripts/BullishOrderBlock.pine)
+ORDER_BLOCK_IMPULSE_THRESHOLD = 0.03  # Minimum (close - open) / open of the impulse candle
+ORDER_BLOCK_CONSOLIDATION_RANGE = 0.005  # Maximum (high - low) / low of the base candle before it
+ORDER_BLOCK_LOOKBACK = 50  # Bars in the rolling volume window
+ORDER_BLOCK_VOLUME_PERCENTILE = 75  # Impulse volume must reach this percentile of the window
+
+# Multi-process symbol sharding (see src/exchanges/sharding.py)
+SHARD_COUNT = None  # Worker processes; None = one per CPU
+SHARD_RESTART_DELAY = 1.0  # Seconds before a crashed worker is restarted
+SHARD_CHECK_INTERVAL = 1.0  # Supervisor poll interval (seconds)
+TOP_OF_BOOK_SHM_NAME = "trade_strategy_top_of_book"  # Shared-memory table readable by other processes
+
+# Plot rendering (see src/utils/plotting.py)
+PLOT_HEADLESS = False  # True = Agg backend, save only (no window); batch renders are always headless
+PLOT_DOWNSAMPLE = "minmax"  # "minmax" (first/last/min/max per pixel column), "lttb", or None for every point
+PLOT_DPI = 100
+PLOT_RENDER_PROCESSES = None  # Worker processes for render_batch(); None = one per CPU
+
+# Live dashboard (see src/utils/dashboard.py)
+DASHBOARD_PORT = 8050
+DASHBOARD_FPS = 5  # Frames pushed to browsers per second
+DASHBOARD_POINTS_PER_FRAME = 4  # Per series per frame: first/last/min/max of the updates since the last frame
+DASHBOARD_HISTORY = 3000  # Points per series kept for new browsers (and in each browser trace)
+DASHBOARD_SMOOTHED_CVD = "ema_10"  # One of the CVD_SMOOTHING_KINDS x CVD_SMOOTHING_WINDOWS outputs
+DASHBOARD_PENDING_SIZE = 10000  # Updates buffered per symbol between frames
+DASHBOARD_CLIENT_QUEUE = 100  # Frames buffered per browser before it starts dropping them
@@ -1,35 +1,37 @@
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 from datetime import datetime
 
+# Add the repository root to Python's module search path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.timeseries_store import load_frame
+
 class CVDAnalysis:
     """Class to analyze Cumulative Volume Delta (CVD) and price data."""
 
-    def __init__(self, cvd_file="data/cvd_data.json", price_file="data/price_data.json", plot_dir="plots"):
+    def __init__(self, cvd_file="data/cvd_data.json", price_file="data/price_data.json", plot_dir="plots", symbol=None, start=None, end=None):
         self.cvd_file = cvd_file
         self.price_file = price_file
+        self.symbol = symbol  # Set to read from a TimeSeriesStore directory (cvd_file/price_file are store roots)
+        self.start = start
+        self.end = end
         self.plot_dir = plot_dir  # Directory to save plots
-        self.cvd_data = []
-        self.price_data = []
+        self.cvd_data = pd.DataFrame()
+        self.price_data = pd.DataFrame()
 
         # Ensure plot directory exists
         os.makedirs(self.plot_dir, exist_ok=True)
 
     def load_data(self):
-        """Loads CVD and price data from JSON files."""
-        if os.path.exists(self.cvd_file):
-            with open(self.cvd_file, "r") as f:
-                self.cvd_data = json.load(f)
-
-        if os.path.exists(self.price_file):
-            with open(self.price_file, "r") as f:
-                self.price_data = json.load(f)
+        """Loads CVD and price data (from series files, or only the needed partitions of a TimeSeriesStore)."""
+        self.cvd_data = load_frame(self.cvd_file, self.symbol, self.start, self.end)
+        self.price_data = load_frame(self.price_file, self.symbol, self.start, self.end)
 
     def process_data(self):
         """Converts loaded data into Pandas DataFrames for analysis."""
-        if not self.cvd_data or not self.price_data:
+        if self.cvd_data.empty or self.price_data.empty:
             print("[ERROR] No CVD or price data available for analysis.")
             return None, None
 
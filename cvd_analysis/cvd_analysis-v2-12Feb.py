@@ -1,30 +1,33 @@
-import json
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
 
+# Add the repository root to Python's module search path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.analysis.divergence import detect_divergences
+from src.utils.timeseries_store import load_frame
+
 class CVDAnalysis:
     """Class to analyze Cumulative Volume Delta (CVD) and price data with divergences."""
 
-    def __init__(self, cvd_file="data/cvd_data.json", price_file="data/price_data.json"):
+    def __init__(self, cvd_file="data/cvd_data.json", price_file="data/price_data.json", symbol=None, start=None, end=None):
         self.cvd_file = cvd_file
         self.price_file = price_file
-        self.cvd_data = []
-        self.price_data = []
+        self.symbol = symbol  # Set to read from a TimeSeriesStore directory (cvd_file/price_file are store roots)
+        self.start = start
+        self.end = end
+        self.cvd_data = pd.DataFrame()
+        self.price_data = pd.DataFrame()
 
     def load_data(self):
-        """Loads CVD and price data from JSON files."""
-        if os.path.exists(self.cvd_file):
-            with open(self.cvd_file, "r") as f:
-                self.cvd_data = json.load(f)
-
-        if os.path.exists(self.price_file):
-            with open(self.price_file, "r") as f:
-                self.price_data = json.load(f)
+        """Loads CVD and price data (from series files, or only the needed partitions of a TimeSeriesStore)."""
+        self.cvd_data = load_frame(self.cvd_file, self.symbol, self.start, self.end)
+        self.price_data = load_frame(self.price_file, self.symbol, self.start, self.end)
 
     def process_data(self):
         """Converts loaded data into Pandas DataFrames for analysis."""
-        if not self.cvd_data or not self.price_data:
+        if self.cvd_data.empty or self.price_data.empty:
             print("[ERROR] No CVD or price data available for analysis.")
             return None, None
 
@@ -52,22 +55,12 @@ class CVDAnalysis:
 
     def detect_divergences(self, df):
         """Detects bullish and bearish divergences between CVD and Price."""
-        bullish_divs = []
-        bearish_divs = []
-
-        for i in range(1, len(df)):
-            prev_cvd, current_cvd = df["cvd"].iloc[i - 1], df["cvd"].iloc[i]
-            prev_price, current_price = df["price"].iloc[i - 1], df["price"].iloc[i]
-
-            # Bullish Divergence: CVD increasing, Price flat/decreasing
-            if current_cvd > prev_cvd and current_price <= prev_price:
-                bullish_divs.append(df.iloc[i])
-
-            # Bearish Divergence: CVD decreasing, Price flat/increasing
-            elif current_cvd < prev_cvd and current_price >= prev_price:
-                bearish_divs.append(df.iloc[i])
+        # Bullish Divergence: CVD increasing, Price flat/decreasing
+        # Bearish Divergence: CVD decreasing, Price flat/increasing
+        divergences = detect_divergences(df["cvd"].to_numpy(), df["price"].to_numpy())
 
-        return pd.DataFrame(bullish_divs), pd.DataFrame(bearish_divs)
+        # One vectorized take per side instead of copying rows in a loop
+        return df.iloc[divergences.bullish], df.iloc[divergences.bearish]
 
     def plot_cvd_and_price(self, df, bullish_divs, bearish_divs):
         """Plots CVD trends and Price trends with divergences highlighted."""
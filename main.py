@@ -1,5 +1,6 @@
 import time
 from src.exchanges.websockets import WebSocketManager
+from src.utils.dashboard import LiveDashboard
 
 if __name__ == "__main__":
     trading_pair = "BTC/USDT"
@@ -7,6 +8,14 @@ if __name__ == "__main__":
     print(f"\nStarting WebSocket for {trading_pair}...")
     ws_manager = WebSocketManager()
     ws_manager.start_all(trading_pair)
+    ws_manager.serve_metrics()  # Stage latencies + queue depths at http://127.0.0.1:9101/metrics
+    dashboard = LiveDashboard().start()  # Live price / spread / CVD charts at http://127.0.0.1:8050/
+    dashboard.attach(ws_manager)
 
-    while True:
-        time.sleep(10)  # Keeps the script running
\ No newline at end of file
+    try:
+        while True:
+            time.sleep(10)  # Keeps the script running
+    except KeyboardInterrupt:
+        dashboard.stop()
+        ws_manager.close()  # Flush pending price/CVD records
+        print("\n[EXIT] WebSocket stopped.")
\ No newline at end of file
@@ -84,69 +84,65 @@
 import time
 import threading
 from src.exchanges.websockets import WebSocketManager
-from src.trading.order_book_tracker import OrderBookTracker
+from src.trading.wall_index import print_large_orders
+from configs.settings import LARGE_ORDER_THRESHOLD
 
-def monitor_order_books(order_book_tracker):
+def monitor_order_books(order_book_tracker, min_interval=1.0, timeout=10):
     """
-    Periodically print the latest order book summary.
+    Print the latest order book summary whenever the live book changes
+    (at most once per `min_interval` seconds).
     Detects large orders and prints key insights.
     """
+    exchange = "binance"  # The live tracker follows the Binance diff stream
+    version = 0
     while True:
-        time.sleep(10)  # Update every 10 seconds
-        print("\n--- Live Order Book Update ---")
-        
-        for exchange in ["binance", "mexc"]:
-            order_book = order_book_tracker.get_order_book(exchange)
-
-            if order_book["bids"] and order_book["asks"]:
-                top_bid = max(order_book["bids"], key=lambda x: float(x[0]))
-                top_ask = min(order_book["asks"], key=lambda x: float(x[0]))
-                spread = float(top_ask[0]) - float(top_bid[0])
-
-                print(f"\n[{exchange.upper()}] Order Book Snapshot")
-                print(f"Top Bid: {top_bid}")
-                print(f"Top Ask: {top_ask}")
-                print(f"Spread: {spread:.5f} USDT")
-
-                detect_large_orders(order_book, exchange)
-            else:
-                print(f"[{exchange.upper()}] No recent order book data.")
-
-def detect_large_orders(order_book, exchange):
+        snapshot = order_book_tracker.wait_for_version(version, timeout=timeout)  # Wakes on the next update
+        if snapshot is None:
+            print(f"[{exchange.upper()}] No recent order book data.")
+            continue
+        version = snapshot.version
+
+        if snapshot.bids and snapshot.asks:
+            top_bid = snapshot.bids[0]  # Best first
+            top_ask = snapshot.asks[0]
+            spread = top_ask[0] - top_bid[0]
+
+            print("\n--- Live Order Book Update ---")
+            print(f"\n[{exchange.upper()}] Order Book Snapshot (version {snapshot.version})")
+            print(f"Top Bid: {top_bid}")
+            print(f"Top Ask: {top_ask}")
+            print(f"Spread: {spread:.5f} USDT")
+
+            detect_large_orders(snapshot)
+
+        time.sleep(min_interval)
+
+def detect_large_orders(snapshot, threshold=LARGE_ORDER_THRESHOLD):
     """
-    Identify large buy and sell orders in the order book.
+    Identify large buy and sell orders in the full live book, read from the
+    walls published with the snapshot (same walls as the tracker reports).
+    Thresholds below the tracker's wall threshold only see its walls.
     """
-    threshold = 50000  # Set large order threshold (modify as needed)
-    
-    large_bids = [bid for bid in order_book["bids"] if float(bid[1]) > threshold]
-    large_asks = [ask for ask in order_book["asks"] if float(ask[1]) > threshold]
-
-    if large_bids or large_asks:
-        print(f"\n[ALERT] Large Orders Detected on {exchange.upper()}:")
-        if large_bids:
-            print("🔹 Large Buy Orders:")
-            for bid in large_bids:
-                print(f"  Price: {bid[0]}, Volume: {bid[1]}")
-        if large_asks:
-            print("🔻 Large Sell Orders:")
-            for ask in large_asks:
-                print(f"  Price: {ask[0]}, Volume: {ask[1]}")
+    large_bids = [level for level in snapshot.bid_walls if level[1] >= threshold]
+    large_asks = [level for level in snapshot.ask_walls if level[1] >= threshold]
+    print_large_orders("binance", large_bids, large_asks)
+    return {"bids": large_bids, "asks": large_asks}
 
 if __name__ == "__main__":
     trading_pair = "BTC/USDT"
 
     # Start WebSockets for live order book tracking
-    ws_manager = WebSocketManager()
+    ws_manager = WebSocketManager(trading_pair)
     ws_manager.start_all(trading_pair)
 
-    # Initialize Order Book Tracker
-    order_book_tracker = OrderBookTracker()
-
-    # Start monitoring in a separate thread
-    monitor_thread = threading.Thread(target=monitor_order_books, args=(order_book_tracker,))
+    # Monitor the live tracker (lock-free snapshots published by the WebSocket pipeline)
+    monitor_thread = threading.Thread(target=monitor_order_books, args=(ws_manager.order_book_tracker,))
     monitor_thread.daemon = True
     monitor_thread.start()
 
     # Keep the script running
-    while True:
-        time.sleep(1)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        ws_manager.close()
@@ -1,40 +1,47 @@
-import json
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
-from datetime import datetime
+from src.utils.timeseries_store import load_frame
+from src.utils.plotting import use_headless, downsample, plot_points, plot_path, finish_figure
+from src.trading.bar_builder import resample_time_bars
+from configs.settings import PLOT_HEADLESS, PLOT_DOWNSAMPLE
 
 class CVDSmoothing:
     """Class to apply SMA & EMA smoothing to CVD and plot it."""
 
-    def __init__(self, cvd_file="../../data/cvd_data.json", price_file="../../data/price_data.json", plot_dir="../../plots"):
+    def __init__(self, cvd_file="../../data/cvd_data.ndjson", price_file="../../data/price_data.ndjson", plot_dir="../../plots", symbol=None, start=None, end=None, bar_interval=None, headless=PLOT_HEADLESS, downsample_method=PLOT_DOWNSAMPLE):
         self.cvd_file = cvd_file
         self.price_file = price_file
+        self.symbol = symbol  # Set to read from a TimeSeriesStore directory (cvd_file/price_file are store roots)
+        self.start = start
+        self.end = end
+        self.bar_interval = bar_interval  # Seconds; set to analyze time bars (close per bar) instead of raw points
         self.plot_dir = plot_dir
-        self.cvd_data = []
-        self.price_data = []
+        self.headless = headless  # Agg backend, save without opening a window
+        self.downsample_method = downsample_method  # Shape-preserving reduction to the plot's pixel width ("minmax" / "lttb" / None)
+        self.cvd_data = pd.DataFrame()
+        self.price_data = pd.DataFrame()
 
         os.makedirs(self.plot_dir, exist_ok=True)  # Ensure plot directory exists
 
     def load_data(self):
-        """Loads CVD and price data from JSON files."""
-        if os.path.exists(self.cvd_file):
-            with open(self.cvd_file, "r") as f:
-                self.cvd_data = json.load(f)
-
-        if os.path.exists(self.price_file):
-            with open(self.price_file, "r") as f:
-                self.price_data = json.load(f)
+        """Loads CVD and price data (from series files, or only the needed partitions of a TimeSeriesStore)."""
+        self.cvd_data = load_frame(self.cvd_file, self.symbol, self.start, self.end)
+        self.price_data = load_frame(self.price_file, self.symbol, self.start, self.end)
 
     def process_data(self):
         """Converts loaded data into Pandas DataFrames and applies smoothing."""
-        if not self.cvd_data or not self.price_data:
+        if self.cvd_data.empty or self.price_data.empty:
             print("[ERROR] No CVD or price data available for analysis.")
             return None, None
 
         cvd_df = pd.DataFrame(self.cvd_data)
         price_df = pd.DataFrame(self.price_data)
 
+        if self.bar_interval:
+            cvd_df = resample_time_bars(cvd_df, self.bar_interval, "cvd")
+            price_df = resample_time_bars(price_df, self.bar_interval, "price")
+
         cvd_df = cvd_df.sort_values(by="timestamp")
         price_df = price_df.sort_values(by="timestamp")
 
@@ -50,14 +57,16 @@ class CVDSmoothing:
             print("[WARNING] No data available for plotting.")
             return
 
-        timestamp_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        if self.headless:
+            use_headless()
 
         fig, ax1 = plt.subplots(2, 1, figsize=(12, 8))
+        points = plot_points(fig)
 
-        # CVD with smoothing
-        ax1[0].plot(cvd_df["timestamp"], cvd_df["cvd"], label="Raw CVD", color="blue", alpha=0.4)
-        ax1[0].plot(cvd_df["timestamp"], cvd_df["SMA_CVD"], label="SMA CVD", color="green")
-        ax1[0].plot(cvd_df["timestamp"], cvd_df["EMA_CVD"], label="EMA CVD", color="red")
+        # CVD with smoothing (each line reduced on its own, so extremes of every curve survive)
+        ax1[0].plot(*downsample(cvd_df["timestamp"], cvd_df["cvd"], points, self.downsample_method), label="Raw CVD", color="blue", alpha=0.4)
+        ax1[0].plot(*downsample(cvd_df["timestamp"], cvd_df["SMA_CVD"], points, self.downsample_method), label="SMA CVD", color="green")
+        ax1[0].plot(*downsample(cvd_df["timestamp"], cvd_df["EMA_CVD"], points, self.downsample_method), label="EMA CVD", color="red")
         ax1[0].set_xlabel("Timestamp")
         ax1[0].set_ylabel("CVD")
         ax1[0].set_title("CVD Trend with Smoothing")
@@ -65,7 +74,7 @@ class CVDSmoothing:
         ax1[0].grid()
 
         # Price trend
-        ax1[1].plot(price_df["timestamp"], price_df["price"], label="Price", color="black")
+        ax1[1].plot(*downsample(price_df["timestamp"], price_df["price"], points, self.downsample_method), label="Price", color="black")
         ax1[1].set_xlabel("Timestamp")
         ax1[1].set_ylabel("Price (USD)")
         ax1[1].set_title("Price Trend Over Time")
@@ -74,11 +83,9 @@ class CVDSmoothing:
 
         plt.tight_layout()
 
-        plot_filename = f"{self.plot_dir}/cvd_smoothing_{timestamp_str}.png"
-        plt.savefig(plot_filename)
-        print(f"[INFO] Plot saved as {plot_filename}")
-
-        plt.show()
+        plot_filename = plot_path(self.plot_dir, "cvd_smoothing", self.symbol, self.start, self.end)
+        finish_figure(fig, plot_filename, self.headless)
+        return plot_filename
 
     def run(self):
         """Runs the full analysis workflow."""
@@ -86,7 +93,8 @@ class CVDSmoothing:
         cvd_df, price_df = self.process_data()
 
         if cvd_df is not None and price_df is not None:
-            self.plot_cvd_with_smoothing(cvd_df, price_df)
+            return self.plot_cvd_with_smoothing(cvd_df, price_df)
+        return None
 
 
 if __name__ == "__main__":
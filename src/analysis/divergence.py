@@ -0,0 +1,73 @@
+import collections
+import numpy as np
+import pandas as pd
+
+# Index arrays into the input series; for swing divergences each row is [previous swing, current swing]
+Divergences = collections.namedtuple("Divergences", ["bullish", "bearish"])
+
+
+def detect_divergences(cvd, price, lag=1, cvd_threshold=0.0, price_threshold=0.0):
+    """Point-to-point CVD/price divergences, vectorized.
+
+    Compares each row with the row `lag` positions earlier:
+    - bullish: CVD rose by more than `cvd_threshold` while price did not rise by more than `price_threshold`
+    - bearish: CVD fell by more than `cvd_threshold` while price did not fall by more than `price_threshold`
+    With the defaults this matches the original loop (CVD up / price flat or down).
+    Returns a `Divergences` of row index arrays.
+    """
+    cvd = np.asarray(cvd, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    if len(cvd) <= lag:
+        empty = np.empty(0, dtype=np.int64)
+        return Divergences(empty, empty)
+
+    cvd_change = cvd[lag:] - cvd[:-lag]
+    price_change = price[lag:] - price[:-lag]
+
+    bullish = (cvd_change > cvd_threshold) & (price_change <= price_threshold)
+    bearish = (cvd_change < -cvd_threshold) & (price_change >= -price_threshold)
+    return Divergences(np.flatnonzero(bullish) + lag, np.flatnonzero(bearish) + lag)
+
+
+def swing_points(values, order=5):
+    """Indices of swing lows and highs: local extrema over `order` bars on each side.
+
+    The last `order` bars are never swings because they are not confirmed yet.
+    Uses pandas' O(n) rolling min/max, so cost does not grow with `order`.
+    """
+    series = pd.Series(np.asarray(values, dtype=np.float64))
+    window = 2 * order + 1
+    rolling_min = series.rolling(window, center=True, min_periods=window).min().to_numpy()
+    rolling_max = series.rolling(window, center=True, min_periods=window).max().to_numpy()
+    values = series.to_numpy()
+    lows = np.flatnonzero(values == rolling_min)
+    highs = np.flatnonzero(values == rolling_max)
+    return lows, highs
+
+
+def detect_swing_divergences(cvd, price, order=5, cvd_threshold=0.0, price_threshold=0.0, max_gap=None):
+    """Classic swing divergences between consecutive price swing points.
+
+    - bullish: price makes a lower low (by more than `price_threshold`) while CVD makes a
+      higher low (by more than `cvd_threshold`) at the same two swing lows
+    - bearish: price makes a higher high while CVD makes a lower high
+    `max_gap` ignores swing pairs that are more than that many rows apart.
+    Returns a `Divergences` whose arrays have shape (k, 2): [previous swing, current swing].
+    """
+    cvd = np.asarray(cvd, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    lows, highs = swing_points(price, order)
+
+    def pairs(swings, price_sign):
+        if len(swings) < 2:
+            return np.empty((0, 2), dtype=np.int64)
+        prev, curr = swings[:-1], swings[1:]
+        price_move = (price[curr] - price[prev]) * price_sign
+        cvd_move = (cvd[curr] - cvd[prev]) * price_sign
+        mask = (price_move > price_threshold) & (cvd_move < -cvd_threshold)
+        if max_gap is not None:
+            mask &= (curr - prev) <= max_gap
+        return np.column_stack((prev[mask], curr[mask]))
+
+    # Lower low in price (sign -1 turns it into a positive move) against a higher CVD low, and vice versa
+    return Divergences(pairs(lows, -1.0), pairs(highs, 1.0))
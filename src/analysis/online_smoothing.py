@@ -0,0 +1,125 @@
+import collections
+import math
+
+
+class RollingSMA:
+    """Simple moving average with an O(1) rolling sum.
+
+    Matches `series.rolling(window, min_periods=1).mean()`. The running sum is
+    recomputed from the window every `resync_every` updates so floating-point
+    drift cannot accumulate over long sessions.
+    """
+
+    def __init__(self, window, resync_every=10000):
+        self.window = window
+        self.values = collections.deque(maxlen=window)
+        self.total = 0.0
+        self.resync_every = resync_every
+        self.updates = 0
+        self.value = None
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+
+        self.updates += 1
+        if self.updates % self.resync_every == 0:
+            self.total = math.fsum(self.values)
+
+        self.value = self.total / len(self.values)
+        return self.value
+
+
+class RecursiveEMA:
+    """Exponential moving average, matches `series.ewm(span=span, adjust=False).mean()`."""
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = None
+
+    def update(self, x):
+        self.value = x if self.value is None else self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class RollingWMA:
+    """Linearly weighted moving average (newest weight = window) with O(1) updates.
+
+    Keeps the plain sum and the weighted sum of the window: when a value
+    enters, every older weight drops by one, which is subtracting the plain
+    sum. Before the window is full the available values get weights 1..k.
+    """
+
+    def __init__(self, window, resync_every=10000):
+        self.window = window
+        self.values = collections.deque(maxlen=window)
+        self.total = 0.0
+        self.weighted_total = 0.0
+        self.resync_every = resync_every
+        self.updates = 0
+        self.value = None
+
+    def update(self, x):
+        n = len(self.values)
+        if n == self.window:
+            self.weighted_total += self.window * x - self.total
+            self.total += x - self.values[0]
+        else:
+            self.weighted_total += (n + 1) * x
+            self.total += x
+        self.values.append(x)
+
+        self.updates += 1
+        if self.updates % self.resync_every == 0:
+            self.total = math.fsum(self.values)
+            self.weighted_total = math.fsum((i + 1) * v for i, v in enumerate(self.values))
+
+        k = len(self.values)
+        self.value = self.weighted_total / (k * (k + 1) / 2.0)
+        return self.value
+
+
+class HullMA:
+    """Hull moving average: WMA(2 * WMA(x, n/2) - WMA(x, n), sqrt(n)), O(1) per update."""
+
+    def __init__(self, window):
+        self.window = window
+        self.half = RollingWMA(max(1, window // 2))
+        self.full = RollingWMA(window)
+        self.smooth = RollingWMA(max(1, int(math.sqrt(window))))
+        self.value = None
+
+    def update(self, x):
+        self.value = self.smooth.update(2.0 * self.half.update(x) - self.full.update(x))
+        return self.value
+
+
+SMOOTHERS = {
+    "sma": RollingSMA,
+    "ema": RecursiveEMA,
+    "wma": RollingWMA,
+    "hma": HullMA,
+}
+
+
+class CVDSmoother:
+    """Streams CVD through several smoothing operators and window lengths at once.
+
+    `update(cvd)` returns a dict such as {"sma_10": ..., "ema_10": ..., "ema_50": ...}.
+    """
+
+    def __init__(self, windows=(10,), kinds=("sma", "ema")):
+        self.operators = {}
+        for kind in kinds:
+            if kind not in SMOOTHERS:
+                raise ValueError(f"Unknown smoother: {kind}. Use one of {list(SMOOTHERS)}.")
+            for window in windows:
+                self.operators[f"{kind}_{window}"] = SMOOTHERS[kind](window)
+        self.latest = {}
+
+    def update(self, cvd):
+        self.latest = {name: operator.update(cvd) for name, operator in self.operators.items()}
+        return self.latest
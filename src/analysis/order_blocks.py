@@ -0,0 +1,172 @@
+import bisect
+import collections
+import functools
+import sys
+import numpy as np
+import pandas as pd
+from sortedcontainers import SortedList
+from configs.settings import (
+    ORDER_BLOCK_IMPULSE_THRESHOLD, ORDER_BLOCK_CONSOLIDATION_RANGE, ORDER_BLOCK_LOOKBACK, ORDER_BLOCK_VOLUME_PERCENTILE,
+)
+
+SORTED_LIST_WINDOW = 1000  # Longer windows use SortedList; shorter ones a single bisect-maintained list (what SortedList holds at that size anyway)
+
+
+def _sorted_window(values, window):
+    """A sorted container of `values` with (add, remove) for a rolling window."""
+    if window > SORTED_LIST_WINDOW:
+        container = SortedList(values)
+        return container, container.add, container.remove
+    container = sorted(values)
+    return container, functools.partial(bisect.insort, container), lambda value: container.pop(bisect.bisect_left(container, value))
+
+
+def rolling_percentile(values, window, percentile):
+    """Percentile of the trailing `window` values (current one included) at every step, O(log w) per step.
+
+    Uses the same linear interpolation as `f_percentile` in
+    BullishOrderBlock.pine. `values` is 1-D or 2-D (one row per symbol,
+    NaN-padded at the end); steps before a full window are NaN. NaNs
+    inside a row (missing values) are skipped: they get NaN and the window
+    is made of the last `window` non-missing values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    index = percentile / 100.0 * (window - 1)
+    k = int(index)
+    frac = index - k
+    upper = min(k + 1, window - 1)
+
+    for row, out in zip(values.reshape(-1, values.shape[-1]), result.reshape(-1, result.shape[-1])):
+        present = np.flatnonzero(~np.isnan(row))  # Skips interior gaps and the trailing padding alike
+        if len(present) < window:
+            continue
+        data = row[present].tolist()
+        ordered, add, remove = _sorted_window(data[:window - 1], window)
+        percentiles = []
+        for i in range(window - 1, len(data)):
+            add(data[i])
+            percentiles.append(ordered[k] * (1 - frac) + ordered[upper] * frac)
+            remove(data[i - window + 1])
+        out[present[window - 1:]] = percentiles
+    return result
+
+
+class RollingPercentile:
+    """Streaming version of `rolling_percentile` for bars arriving one at a time."""
+
+    def __init__(self, window=ORDER_BLOCK_LOOKBACK, percentile=ORDER_BLOCK_VOLUME_PERCENTILE):
+        self.window = window
+        index = percentile / 100.0 * (window - 1)
+        self.k = int(index)
+        self.frac = index - self.k
+        self.upper = min(self.k + 1, window - 1)
+        self.values = collections.deque()  # Arrival order, trimmed to the window
+        self.ordered, self._add, self._remove = _sorted_window([], window)
+
+    def update(self, value):
+        """Adds one value; returns the percentile of the window, or None until it is full (and for a missing value)."""
+        if value is None or value != value:  # Missing (None/NaN) values are skipped, as in `rolling_percentile`
+            return None
+        self.values.append(value)
+        self._add(value)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+        if len(self.values) < self.window:
+            return None
+        return self.ordered[self.k] * (1 - self.frac) + self.ordered[self.upper] * self.frac
+
+
+def bullish_order_blocks(open_, high, low, close, volume,
+                         impulse_threshold=ORDER_BLOCK_IMPULSE_THRESHOLD,
+                         consolidation_range=ORDER_BLOCK_CONSOLIDATION_RANGE,
+                         lookback=ORDER_BLOCK_LOOKBACK,
+                         volume_percentile=ORDER_BLOCK_VOLUME_PERCENTILE):
+    """Bullish order blocks (port of BullishOrderBlock.pine) over candle arrays.
+
+    A bar is flagged when it is an impulse up ((close - open) / open >=
+    `impulse_threshold`), the previous bar is a base ((high - low) / low <=
+    `consolidation_range`) and its volume is at or above the
+    `volume_percentile` of the last `lookback` volumes. Arrays are 1-D or
+    2-D (symbols x bars, NaN-padded at the end); all conditions are
+    evaluated for every symbol at once. A bar with a missing (NaN) volume
+    never signals and is left out of later volume windows; the bars after
+    it are still evaluated.
+
+    The Pine script fills its volume window only on the last bar, so the
+    threshold is 0 on every other bar; here it is rolling, as intended.
+
+    Returns a dict of arrays shaped like the input: "signal" (bool),
+    "volume_threshold", and the order block zone "zone_low" / "zone_high"
+    (the base candle's low and high).
+    """
+    open_, high, low, close, volume = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close, volume))
+    previous_high = np.full(high.shape, np.nan)
+    previous_low = np.full(low.shape, np.nan)
+    previous_high[..., 1:] = high[..., :-1]
+    previous_low[..., 1:] = low[..., :-1]
+    threshold = rolling_percentile(volume, lookback, volume_percentile)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        impulse = (close - open_) / open_ >= impulse_threshold
+        consolidation = (previous_high - previous_low) / previous_low <= consolidation_range
+    high_volume = volume >= threshold  # NaN (no full window yet) compares False
+    return {
+        "signal": impulse & consolidation & high_volume,
+        "volume_threshold": threshold,
+        "zone_low": previous_low,
+        "zone_high": previous_high,
+    }
+
+
+def stack_candles(candles, columns=("open", "high", "low", "close", "volume")):
+    """Stacks per-symbol candle frames ({symbol: DataFrame}) into NaN-padded (symbols x bars) arrays per column."""
+    symbols = list(candles)
+    length = max((len(frame) for frame in candles.values()), default=0)
+    arrays = {column: np.full((len(symbols), length), np.nan) for column in columns}
+    for row, symbol in enumerate(symbols):
+        frame = candles[symbol]
+        for column in columns:
+            arrays[column][row, :len(frame)] = frame[column].to_numpy(dtype=np.float64)
+    return symbols, arrays
+
+
+def scan_order_blocks(candles, time_column="timestamp", **params):
+    """Runs `bullish_order_blocks` over many symbols in one pass.
+
+    `candles` maps symbol -> DataFrame with open/high/low/close/volume
+    columns in time order (e.g. `BarBuilder.bars.to_frame()` or a bar file
+    loaded with `load_frame`). Returns one row per order block found.
+    """
+    symbols, arrays = stack_candles(candles)
+    if not symbols:
+        return pd.DataFrame()
+    blocks = bullish_order_blocks(arrays["open"], arrays["high"], arrays["low"], arrays["close"], arrays["volume"], **params)
+    rows, bars = np.nonzero(blocks["signal"])
+
+    found = pd.DataFrame({
+        "symbol": [symbols[row] for row in rows.tolist()],
+        "bar": bars,
+        "zone_low": blocks["zone_low"][rows, bars],
+        "zone_high": blocks["zone_high"][rows, bars],
+        "close": arrays["close"][rows, bars],
+        "volume": arrays["volume"][rows, bars],
+        "volume_threshold": blocks["volume_threshold"][rows, bars],
+    })
+    found.insert(2, time_column, [
+        candles[symbol][time_column].iloc[bar] if time_column in candles[symbol] else np.nan
+        for symbol, bar in zip(found["symbol"], bars.tolist())
+    ])
+    return found
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.analysis.order_blocks <bar_file> [<bar_file> ...]
+    # e.g.   python -m src.analysis.order_blocks data/bars_time_60.ndjson
+    from src.utils.timeseries_store import load_frame
+
+    frames = {path: load_frame(path) for path in sys.argv[1:]}
+    blocks = scan_order_blocks({path: frame.sort_values(by="timestamp") for path, frame in frames.items() if not frame.empty})
+    print(f"[INFO] {len(blocks)} bullish order blocks found")
+    if not blocks.empty:
+        print(blocks.to_string(index=False))
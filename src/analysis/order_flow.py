@@ -0,0 +1,156 @@
+import collections
+import math
+import numpy as np
+
+PRICE = 0
+QTY = 1
+
+
+def _prices(levels, side):
+    """Level prices with empty (NaN-padded) levels pushed out of the book: -inf for bids, +inf for asks."""
+    prices = levels[..., PRICE]
+    return np.where(np.isnan(prices), -np.inf if side == "bids" else np.inf, prices)
+
+
+def level_ofi(prev_bids, prev_asks, bids, asks):
+    """Order flow imbalance per level between two books (Cont-Kukanov-Stoikov, applied level by level).
+
+    Arrays are (..., depth, 2) [price, qty] with the best level first; any
+    leading dimensions broadcast, so the same code serves one update or a
+    whole history. Bid side: +q(t) if the level's price held or rose,
+    -q(t-1) if it held or fell. Ask side mirrored and subtracted. Positive
+    values mean net buying pressure.
+    """
+    pb0, pb1 = _prices(prev_bids, "bids"), _prices(bids, "bids")
+    pa0, pa1 = _prices(prev_asks, "asks"), _prices(asks, "asks")
+    qb0, qb1 = prev_bids[..., QTY], bids[..., QTY]
+    qa0, qa1 = prev_asks[..., QTY], asks[..., QTY]
+
+    bid_flow = np.where(pb1 >= pb0, qb1, 0.0) - np.where(pb1 <= pb0, qb0, 0.0)
+    ask_flow = np.where(pa1 <= pa0, qa1, 0.0) - np.where(pa1 >= pa0, qa0, 0.0)
+    return bid_flow - ask_flow
+
+
+def multi_level_ofi(bids, asks):
+    """Vectorized OFI over a stored history: (n, depth, 2) books -> (n - 1, depth) per-level OFI."""
+    bids = np.asarray(bids, dtype=np.float64)
+    asks = np.asarray(asks, dtype=np.float64)
+    if len(bids) < 2:
+        return np.empty((0, bids.shape[1] if bids.ndim == 3 else 0))
+    return level_ofi(bids[:-1], asks[:-1], bids[1:], asks[1:])
+
+
+def aggregate_ofi(ofi, levels=None, weights=None):
+    """Sums per-level OFI over the top `levels` levels (optionally weighted) -> one value per update."""
+    ofi = np.asarray(ofi, dtype=np.float64)[..., :levels]
+    if weights is not None:
+        ofi = ofi * np.asarray(weights, dtype=np.float64)[:ofi.shape[-1]]
+    return ofi.sum(axis=-1)
+
+
+def windowed_ofi(total, timestamps, window):
+    """Trailing sum of `total` over the last `window` seconds at every update (cumsum + binary search)."""
+    total = np.asarray(total, dtype=np.float64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    cumulative = np.concatenate(([0.0], np.cumsum(total)))
+    start = np.searchsorted(timestamps, timestamps - window, side="right")
+    return cumulative[1:] - cumulative[start]
+
+
+def ofi_features(timestamps, bids, asks, levels=None, windows=(1.0, 10.0), weights=None):
+    """Batch OFI features for a history of books.
+
+    Returns a dict of arrays aligned with `timestamps[1:]`: "timestamp",
+    "level_ofi" (n - 1, depth), "ofi" (aggregated over `levels`) and
+    "ofi_<w>s" for every trailing time window.
+    """
+    per_level = multi_level_ofi(bids, asks)
+    timestamps = np.asarray(timestamps, dtype=np.float64)[1:]
+    total = aggregate_ofi(per_level, levels, weights)
+    features = {"timestamp": timestamps, "level_ofi": per_level, "ofi": total}
+    for window in windows:
+        features[f"ofi_{window:g}s"] = windowed_ofi(total, timestamps, window)
+    return features
+
+
+def books_to_arrays(books, depth=5):
+    """Converts stored books ({"timestamp", "bids", "asks"}, e.g. `OrderBookStore.iter_books`) to padded arrays."""
+    timestamps = []
+    bid_rows = []
+    ask_rows = []
+    for book in books:
+        bids = np.full((depth, 2), [np.nan, 0.0])
+        asks = np.full((depth, 2), [np.nan, 0.0])
+        top_bids = np.asarray(book["bids"][:depth], dtype=np.float64).reshape(-1, 2)
+        top_asks = np.asarray(book["asks"][:depth], dtype=np.float64).reshape(-1, 2)
+        bids[:len(top_bids)] = top_bids
+        asks[:len(top_asks)] = top_asks
+        timestamps.append(book["timestamp"])
+        bid_rows.append(bids)
+        ask_rows.append(asks)
+    return np.asarray(timestamps, dtype=np.float64), np.asarray(bid_rows).reshape(-1, depth, 2), np.asarray(ask_rows).reshape(-1, depth, 2)
+
+
+class OnlineOFI:
+    """Incremental multi-level OFI, updated once per book update.
+
+    `update()` takes the new top-of-book rows ((depth, 2) arrays, e.g. the
+    ring-buffer row just written) and returns the per-level OFI array (same
+    rule as `level_ofi`, looped in Python over the few levels); the
+    aggregate and the trailing time-window sums are kept in `ofi` and
+    `windowed` (running sums over a deque per window, O(1) amortized,
+    re-summed every `resync_every` updates against float drift). The values
+    match `ofi_features` on the same sequence of books.
+    """
+
+    def __init__(self, depth=5, levels=None, windows=(1.0, 10.0), weights=None, resync_every=10000):
+        self.depth = depth
+        self.levels = levels
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.windows = tuple(windows)
+        self.previous = None
+        self.level_ofi = np.zeros(depth)
+        self.ofi = 0.0
+        self.recent = {window: collections.deque() for window in self.windows}  # (timestamp, ofi)
+        self.windowed = {window: 0.0 for window in self.windows}
+        self.resync_every = resync_every
+        self.updates = 0
+
+    def update(self, timestamp, bids, asks):
+        # Plain floats: a handful of levels is far cheaper in Python than in numpy calls
+        bids = bids.tolist() if hasattr(bids, "tolist") else [list(level) for level in bids]  # Copies the buffer row
+        asks = asks.tolist() if hasattr(asks, "tolist") else [list(level) for level in asks]
+        if self.previous is None:
+            self.previous = (bids, asks)
+            return None
+
+        previous_bids, previous_asks = self.previous
+        per_level = []
+        for (pb0, qb0), (pb1, qb1), (pa0, qa0), (pa1, qa1) in zip(previous_bids, bids, previous_asks, asks):
+            pb0, pb1 = (-math.inf if pb0 != pb0 else pb0), (-math.inf if pb1 != pb1 else pb1)  # NaN = empty level
+            pa0, pa1 = (math.inf if pa0 != pa0 else pa0), (math.inf if pa1 != pa1 else pa1)
+            bid_flow = (qb1 if pb1 >= pb0 else 0.0) - (qb0 if pb1 <= pb0 else 0.0)
+            ask_flow = (qa1 if pa1 <= pa0 else 0.0) - (qa0 if pa1 >= pa0 else 0.0)
+            per_level.append(bid_flow - ask_flow)
+        self.previous = (bids, asks)
+        self.level_ofi = np.array(per_level)
+        top = per_level[:self.levels]
+        self.ofi = math.fsum(top) if self.weights is None else math.fsum(w * x for w, x in zip(self.weights.tolist(), top))
+        self.updates += 1
+
+        for window, recent in self.recent.items():
+            recent.append((timestamp, self.ofi))
+            total = self.windowed[window] + self.ofi
+            while recent[0][0] <= timestamp - window:
+                total -= recent.popleft()[1]
+            if self.updates % self.resync_every == 0:
+                total = math.fsum(value for _, value in recent)
+            self.windowed[window] = total
+        return self.level_ofi
+
+    def latest(self):
+        """Latest features as a dict: per-level array, aggregate and window sums."""
+        features = {"level_ofi": self.level_ofi, "ofi": self.ofi}
+        for window, total in self.windowed.items():
+            features[f"ofi_{window:g}s"] = total
+        return features
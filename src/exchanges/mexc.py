@@ -10,6 +10,7 @@ class MEXCExchange(BaseExchange):
             "enableRateLimit": True
         })
         self.futures_base_url = "https://contract.mexc.com/api/v1"
+        self.session = requests.Session()  # Keep-alive: reuse the TLS connection across calls
 
     def fetch_order_book(self, symbol):
         """Fetch the full spot order book for a given symbol."""
@@ -23,7 +24,7 @@ class MEXCExchange(BaseExchange):
         """Fetch the full futures order book for a given symbol."""
         endpoint = f"{self.futures_base_url}/contract/depth/{symbol.replace('/', '_')}"
         try:
-            response = requests.get(endpoint, params={"limit": 500})  # Request all levels
+            response = self.session.get(endpoint, params={"limit": 500}, timeout=10)  # Request all levels
             if response.status_code == 200:
                 data = response.json()
                 if "data" in data:
@@ -0,0 +1,99 @@
+import sys
+import time
+from src.exchanges.websockets import WebSocketManager
+from src.utils.frame_capture import read_frames, DEPTH_FRAME, SNAPSHOT_FRAME, TRADE_FRAME
+from configs.settings import REPLAY_PRICE_DATA_FILE, REPLAY_CVD_DATA_FILE, REPLAY_TRADE_CVD_DATA_FILE, REPLAY_BAR_DATA_FILE
+
+
+class ReplaySnapshotSource:
+    """Serves the recorded REST snapshots back in the order they were fetched."""
+
+    def __init__(self, snapshots):
+        self.snapshots = list(snapshots)
+        self.position = 0
+
+    def fetch_order_book(self, symbol):
+        if self.position >= len(self.snapshots):
+            print(f"[WARNING] Capture has no more snapshots for {symbol}.")
+            return {"bids": [], "asks": []}
+        snapshot = self.snapshots[self.position]
+        self.position += 1
+        return snapshot
+
+    def fetch_futures_order_book(self, symbol):
+        return {"bids": [], "asks": []}
+
+
+class CaptureReplayer:
+    """Replays a raw frame capture through WebSocketManager -> OrderBookTracker -> OrderBookAnalysis.
+
+    Frames are processed synchronously on the calling thread, so a replay is
+    deterministic. `speed=None` replays as fast as possible (throughput
+    benchmark); otherwise recorded inter-arrival gaps are scaled by 1/speed.
+    No network access is needed: REST snapshots come from the capture too.
+    """
+
+    def __init__(self, capture_file, trading_pair="BTC/USDT", speed=None, price_file=REPLAY_PRICE_DATA_FILE, cvd_file=REPLAY_CVD_DATA_FILE, trade_cvd_file=REPLAY_TRADE_CVD_DATA_FILE, bar_file=REPLAY_BAR_DATA_FILE):
+        self.capture_file = capture_file
+        self.trading_pair = trading_pair
+        self.speed = speed
+        self.price_file = price_file
+        self.cvd_file = cvd_file
+        self.trade_cvd_file = trade_cvd_file
+        self.bar_file = bar_file
+        self.manager = None
+
+    def build_manager(self):
+        """Creates a WebSocketManager fed by the recorded snapshots."""
+        snapshots = [payload for _, _, payload in read_frames(self.capture_file, kinds={SNAPSHOT_FRAME})]
+        return WebSocketManager(
+            self.trading_pair,
+            exchange=ReplaySnapshotSource(snapshots),
+            price_file=self.price_file,
+            cvd_file=self.cvd_file,
+            trade_cvd_file=self.trade_cvd_file,
+            bar_file=self.bar_file,
+        )
+
+    def run(self, start_time=None, end_time=None):
+        """Replays the capture (optionally a time range of it) and returns throughput stats."""
+        self.manager = self.build_manager()
+        frames = 0
+        first_ts = None
+        started = time.perf_counter()
+
+        try:
+            for received_at, kind, message in read_frames(self.capture_file, start_time, end_time, kinds={DEPTH_FRAME, TRADE_FRAME}):
+                if self.speed:
+                    if first_ts is None:
+                        first_ts = received_at
+                    delay = (received_at - first_ts) / self.speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if kind == TRADE_FRAME:
+                    self.manager.handle_trade_frame(received_at, message)
+                else:
+                    self.manager.handle_frame(received_at, message)
+                frames += 1
+        finally:
+            self.manager.close()
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            "frames": frames,
+            "elapsed": elapsed,
+            "frames_per_sec": frames / elapsed if elapsed > 0 else 0.0,
+            "cvd": self.manager.order_book_analysis.cvd_accumulator.cvd,
+            "trade_cvd": self.manager.trade_cvd.cvd,
+            "bars": {f"{kind}_{size:g}": builder.bars.total_appended for (kind, size), builder in self.manager.bars.items()},
+        }
+        print(f"[REPLAY] {frames} frames in {elapsed:.2f}s ({stats['frames_per_sec']:.0f} frames/sec), final CVD: {stats['cvd']}")
+        return stats
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.exchanges.replay <capture_file> [speed]
+    capture_file = sys.argv[1]
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    CaptureReplayer(capture_file, speed=speed).run()
@@ -0,0 +1,293 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from src.exchanges.stream_multiplexer import CombinedStreamManager
+from src.utils.logger import get_live_logger
+from configs.settings import SHARD_COUNT, SHARD_RESTART_DELAY, SHARD_CHECK_INTERVAL, TOP_OF_BOOK_SHM_NAME
+
+TOP_OF_BOOK_DTYPE = np.dtype([
+    ("sequence", "<u8"),  # Seqlock: odd while the row is being written
+    ("symbol", "S24"),
+    ("timestamp", "<f8"),
+    ("best_bid", "<f8"),
+    ("best_ask", "<f8"),
+    ("mid", "<f8"),
+    ("spread", "<f8"),
+    ("cvd", "<f8"),
+    ("trade_cvd", "<f8"),
+    ("updates", "<u8"),
+])
+HEADER = np.dtype([("rows", "<u8")])  # So readers can attach by name alone
+
+
+class TopOfBookTable:
+    """Fixed table of per-symbol top-of-book rows in `multiprocessing.shared_memory`.
+
+    Every row has exactly one writer (the shard that owns the symbol) and
+    is guarded by a seqlock: the writer makes `sequence` odd, writes the
+    fields, then makes it even again. Readers copy the row and retry if the
+    sequence was odd or changed meanwhile, so neither side locks or pickles.
+    The parity is set on every write rather than derived from the stored
+    value, so a row left odd by a killed writer is repaired by the next
+    write; `reset_rows` also clears it when a shard is restarted.
+    """
+
+    def __init__(self, trading_pairs=None, name=None, create=True, untrack=True):
+        if create:
+            trading_pairs = list(trading_pairs)
+            size = HEADER.itemsize + max(len(trading_pairs), 1) * TOP_OF_BOOK_DTYPE.itemsize
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:  # Left over by a crashed run
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            if untrack:
+                # Attaching registers the segment with this process's resource tracker, which would unlink it on exit.
+                # Worker processes share their parent's tracker and must leave its registration alone.
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        self.owner = create
+        self.header = np.ndarray((1,), dtype=HEADER, buffer=self.shm.buf)
+        if create:
+            self.header["rows"] = len(trading_pairs)
+        rows = int(self.header["rows"][0])
+        self.rows = np.ndarray((rows,), dtype=TOP_OF_BOOK_DTYPE, buffer=self.shm.buf, offset=HEADER.itemsize)
+        if create:
+            self.rows[:] = np.zeros(rows, dtype=TOP_OF_BOOK_DTYPE)
+            for field in ("timestamp", "best_bid", "best_ask", "mid", "spread", "cvd", "trade_cvd"):
+                self.rows[field] = np.nan
+            self.rows["symbol"] = [pair.encode() for pair in trading_pairs]
+        self.index = {symbol.decode(): i for i, symbol in enumerate(self.rows["symbol"].tolist())}
+
+    @classmethod
+    def attach(cls, name, untrack=True):
+        """Opens an existing table read/write (workers, or any other process on the host)."""
+        return cls(name=name, create=False, untrack=untrack)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def row(self, trading_pair):
+        return self.index[trading_pair]
+
+    def reset_rows(self, trading_pairs):
+        """Makes the rows of `trading_pairs` readable again (even sequence) after their writer died mid-write."""
+        for trading_pair in trading_pairs:
+            record = self.rows[self.row(trading_pair):self.row(trading_pair) + 1]
+            sequence = int(record["sequence"][0])
+            if sequence & 1:
+                record["sequence"] = sequence + 1
+
+    def publish(self, row, timestamp, best_bid, best_ask, cvd=None, trade_cvd=None):
+        """Writes one row (single writer per row)."""
+        record = self.rows[row:row + 1]  # View, so field writes go straight to shared memory
+        begin = int(record["sequence"][0]) | 1  # Odd while writing, even when done, even if a killed writer left it odd
+        record["sequence"] = begin
+        record["timestamp"] = timestamp
+        record["best_bid"] = best_bid
+        record["best_ask"] = best_ask
+        record["mid"] = (best_bid + best_ask) / 2
+        record["spread"] = best_ask - best_bid
+        record["cvd"] = math.nan if cvd is None else cvd
+        record["trade_cvd"] = math.nan if trade_cvd is None else trade_cvd
+        record["updates"] += 1
+        record["sequence"] = begin + 1
+
+    def publisher(self, trading_pair):
+        """A `WebSocketManager.publishers` callable bound to the symbol's row."""
+        row = self.row(trading_pair)
+        return lambda timestamp, best_bid, best_ask, cvd, trade_cvd: self.publish(row, timestamp, best_bid, best_ask, cvd, trade_cvd)
+
+    def snapshot(self, retries=100):
+        """Consistent copy of every row (structured array); rows caught mid-write are re-read."""
+        before = self.rows["sequence"].copy()
+        rows = self.rows.copy()
+        torn = np.flatnonzero((before & 1).astype(bool) | (self.rows["sequence"] != before))
+        for i in torn.tolist():
+            rows[i] = self._read_row(i, retries)
+        return rows
+
+    def _read_row(self, i, retries):
+        for _ in range(retries):
+            sequence = int(self.rows["sequence"][i])
+            row = self.rows[i].copy()
+            if not sequence & 1 and int(self.rows["sequence"][i]) == sequence:
+                return row
+            time.sleep(0)
+        return row  # Writer stalled mid-row (e.g. killed); return the last copy
+
+    def read(self, trading_pair):
+        """One symbol's row as a dict."""
+        row = self._read_row(self.row(trading_pair), 100)
+        return {name: (row[name].decode() if name == "symbol" else row[name].item()) for name in TOP_OF_BOOK_DTYPE.names}
+
+    def close(self):
+        # Drop the numpy views first; the buffer cannot be released while they exist
+        self.rows = None
+        self.header = None
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+class ShardStreamManager(CombinedStreamManager):
+    """`CombinedStreamManager` whose symbol pipelines publish into a shared `TopOfBookTable`."""
+
+    def __init__(self, table, **kwargs):
+        super().__init__(**kwargs)
+        self.table = table
+
+    def create_handler(self, trading_pair):
+        handler = super().create_handler(trading_pair)
+        handler.publishers.append(self.table.publisher(trading_pair))
+        return handler
+
+
+def run_shard(shard_id, trading_pairs, table_name, manager_kwargs):
+    """Worker process entry point: runs one shard's symbols until SIGTERM."""
+    table = TopOfBookTable.attach(table_name, untrack=False)
+    manager = ShardStreamManager(table, **manager_kwargs)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, lambda: setattr(manager, "running", False))
+        await manager.run(trading_pairs)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        table.close()
+        get_live_logger().close()
+
+
+def partition(trading_pairs, shards):
+    """Splits symbols round-robin into `shards` non-empty lists."""
+    shards = max(1, min(shards, len(trading_pairs)))
+    return [list(trading_pairs[i::shards]) for i in range(shards)]
+
+
+class ShardedIngestion:
+    """Runs the ingestion stack for many symbols across worker processes.
+
+    Symbols are partitioned over `shards` processes (default: one per
+    CPU). Each worker runs a `ShardStreamManager` (combined streams ->
+    `WebSocketManager` -> `OrderBookTracker` / `OrderBookAnalysis`) for its
+    symbols and publishes best bid/ask, mid, spread and CVD into a shared
+    `TopOfBookTable` that this process (or any other, by name) reads
+    without pickling. A supervisor thread restarts workers that exit
+    unexpectedly with the same symbol set.
+    """
+
+    def __init__(self, trading_pairs, shards=SHARD_COUNT, table_name=TOP_OF_BOOK_SHM_NAME,
+                 restart_delay=SHARD_RESTART_DELAY, check_interval=SHARD_CHECK_INTERVAL, **manager_kwargs):
+        self.trading_pairs = list(trading_pairs)
+        self.shards = partition(self.trading_pairs, shards or os.cpu_count() or 1)
+        self.table_name = table_name
+        self.restart_delay = restart_delay
+        self.check_interval = check_interval
+        self.manager_kwargs = manager_kwargs  # Passed to every worker's manager (e.g. base_url, exchange); must be picklable
+        self.context = multiprocessing.get_context("spawn")  # No fork of a process with live threads
+        self.table = None
+        self.processes = [None] * len(self.shards)
+        self.restarts = [0] * len(self.shards)
+        self.running = False
+        self.supervisor = None
+        self.log = get_live_logger()
+
+    def start(self):
+        self.table = TopOfBookTable(self.trading_pairs, name=self.table_name)
+        self.running = True
+        for shard_id in range(len(self.shards)):
+            self._spawn(shard_id)
+        self.supervisor = threading.Thread(target=self._supervise, name="shard-supervisor", daemon=True)
+        self.supervisor.start()
+        return self
+
+    def _spawn(self, shard_id):
+        process = self.context.Process(
+            target=run_shard,
+            args=(shard_id, self.shards[shard_id], self.table.name, self.manager_kwargs),
+            name=f"shard-{shard_id}",
+        )
+        process.start()
+        self.processes[shard_id] = process
+
+    def _supervise(self):
+        while self.running:
+            time.sleep(self.check_interval)
+            for shard_id, process in enumerate(self.processes):
+                if not self.running or process.is_alive():
+                    continue
+                self.log.warning(
+                    f"Shard {shard_id} exited with code {process.exitcode}; restarting",
+                    shard=shard_id, symbols=len(self.shards[shard_id]), restarts=self.restarts[shard_id] + 1,
+                )
+                self.restarts[shard_id] += 1
+                time.sleep(self.restart_delay)
+                if self.running:
+                    self.table.reset_rows(self.shards[shard_id])  # The dead worker may have stopped mid-write
+                    self._spawn(shard_id)
+
+    def top_of_book(self):
+        """{symbol: row dict} for every symbol, read from shared memory."""
+        rows = self.table.snapshot()
+        return {
+            symbol.decode(): {name: rows[name][i].item() for name in TOP_OF_BOOK_DTYPE.names if name != "symbol"}
+            for i, symbol in enumerate(rows["symbol"].tolist())
+        }
+
+    def metrics(self):
+        return [
+            {"shard": shard_id, "pid": process.pid, "alive": process.is_alive(), "restarts": self.restarts[shard_id], "symbols": self.shards[shard_id]}
+            for shard_id, process in enumerate(self.processes)
+        ]
+
+    def stop(self, timeout=10):
+        """Stops the workers (SIGTERM, so they flush their logs), then frees the table."""
+        self.running = False
+        if self.supervisor is not None:
+            self.supervisor.join()
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        if self.table is not None:
+            self.table.close()
+            self.table.unlink()
+            self.table = None
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.exchanges.sharding <shards> <pair> [<pair> ...]
+    # e.g.   python -m src.exchanges.sharding 4 BTC/USDT ETH/USDT SOL/USDT BNB/USDT
+    ingestion = ShardedIngestion(sys.argv[2:], shards=int(sys.argv[1])).start()
+    try:
+        while True:
+            time.sleep(5)
+            for symbol, row in ingestion.top_of_book().items():
+                print(f"{symbol}: bid {row['best_bid']} ask {row['best_ask']} spread {row['spread']} CVD {row['cvd']}")
+    except KeyboardInterrupt:
+        ingestion.stop()
+        print("\n[EXIT] Shards stopped.")
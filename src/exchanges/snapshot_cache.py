@@ -0,0 +1,116 @@
+import collections
+import threading
+import time
+from src.exchanges.base_exchange import BaseExchange
+from configs.settings import SNAPSHOT_CACHE_TTL, SNAPSHOT_CACHE_SIZE
+
+SPOT = "spot"
+FUTURES = "futures"
+
+
+class _Flight:
+    """One in-flight fetch that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CachedExchange(BaseExchange):
+    """Caches order book snapshots of an exchange adapter with a TTL and LRU eviction.
+
+    Callers asking for a (market, symbol) that is already being fetched wait
+    for that request instead of sending their own (single-flight), so several
+    components resyncing at once cost one snapshot of rate-limit weight.
+    Entries expire after `ttl` seconds (`symbol_ttls` overrides it per
+    symbol; 0 disables caching but keeps single-flight) and the least
+    recently used entry is evicted beyond `max_entries`. Empty books (failed
+    fetches) are never cached. Returned snapshots are shared: treat them as read-only.
+    """
+
+    def __init__(self, exchange, ttl=SNAPSHOT_CACHE_TTL, symbol_ttls=None, max_entries=SNAPSHOT_CACHE_SIZE):
+        self.exchange = exchange
+        self.ttl = ttl
+        self.symbol_ttls = dict(symbol_ttls or {})
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()  # (market, symbol) -> (expires_at, snapshot), oldest use first
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # Callers served by another caller's in-flight request
+        self.evictions = 0
+
+    def fetch_order_book(self, symbol):
+        return self._get(SPOT, symbol, self.exchange.fetch_order_book)
+
+    def fetch_futures_order_book(self, symbol):
+        return self._get(FUTURES, symbol, self.exchange.fetch_futures_order_book)
+
+    def _get(self, market, symbol, fetch):
+        key = (market, symbol)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self.entries[key]
+
+            flight = self.in_flight.get(key)
+            if flight is not None:
+                self.shared += 1
+                leader = False
+            else:
+                self.misses += 1
+                flight = self.in_flight[key] = _Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch(symbol)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+                if flight.error is None:
+                    self._store(key, symbol, flight.result)
+            flight.done.set()
+        return flight.result
+
+    def _store(self, key, symbol, snapshot):
+        ttl = self.symbol_ttls.get(symbol, self.ttl)
+        if ttl <= 0 or not snapshot or not (snapshot.get("bids") or snapshot.get("asks")):
+            return
+        self.entries[key] = (time.monotonic() + ttl, snapshot)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, symbol=None):
+        """Drops cached snapshots of `symbol` (all markets), or everything."""
+        with self.lock:
+            for key in [k for k in self.entries if symbol is None or k[1] == symbol]:
+                del self.entries[key]
+
+    def metrics(self):
+        with self.lock:
+            requests = self.hits + self.misses + self.shared
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "evictions": self.evictions,
+                "size": len(self.entries),
+                "hit_rate": (self.hits + self.shared) / requests if requests else 0.0,
+            }
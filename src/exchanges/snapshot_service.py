@@ -0,0 +1,142 @@
+import asyncio
+import time
+import aiohttp
+import ccxt.async_support as ccxt_async
+
+MEXC_FUTURES_BASE_URL = "https://contract.mexc.com/api/v1"
+
+# Depth requested per exchange/market, same as the synchronous adapters
+SNAPSHOT_LIMITS = {
+    ("binance", "spot"): 500,
+    ("binance", "futures"): 500,
+    ("mexc", "spot"): 100,
+    ("mexc", "futures"): 500,
+}
+
+DEFAULT_CONCURRENCY = {"binance": 10, "mexc": 5}  # In-flight requests per exchange
+
+
+def empty_snapshot(exchange, market, symbol, error=None):
+    return {"exchange": exchange, "market": market, "symbol": symbol, "timestamp": time.time(), "nonce": None, "bids": [], "asks": [], "error": error}
+
+
+class SnapshotService:
+    """Fetches spot and futures order book snapshots for many symbols across exchanges concurrently.
+
+    Uses ccxt's asyncio clients (aiohttp under the hood, so connections are
+    kept alive and reused) plus one pooled aiohttp session for the MEXC
+    futures REST endpoint. A semaphore per exchange caps in-flight requests,
+    so a refresh of N books takes roughly as long as the slowest request
+    instead of the sum of all of them. ccxt's own throttle (`rate_limit`)
+    is off by default because it spaces every request of a client behind
+    the previous one, which serializes a refresh again; the semaphores are
+    the limit. Turn it on for long-running loops that refresh back to back
+    and could exceed the exchange's request weight. Results share one schema:
+    {exchange, market, symbol, timestamp, nonce, bids, asks, error}.
+    """
+
+    def __init__(self, exchanges=("binance", "mexc"), concurrency=None, timeout=10, credentials=None, rate_limit=False):
+        self.exchange_names = list(exchanges)
+        self.rate_limit = rate_limit  # ccxt enableRateLimit
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.timeout = timeout
+        self.credentials = credentials or {}
+        self.clients = {}  # (exchange, market) -> ccxt async client
+        self.semaphores = {}
+        self.session = None
+
+    async def open(self):
+        """Creates the pooled clients. Called automatically by `fetch`."""
+        if self.clients:
+            return
+        for name in self.exchange_names:
+            keys = self.credentials.get(name, {})
+            options = {"apiKey": keys.get("apiKey"), "secret": keys.get("secret"), "enableRateLimit": self.rate_limit, "timeout": self.timeout * 1000}
+            if name == "binance":
+                self.clients[(name, "spot")] = ccxt_async.binance(options)
+                self.clients[(name, "futures")] = ccxt_async.binanceusdm(options)
+            elif name == "mexc":
+                self.clients[(name, "spot")] = ccxt_async.mexc(options)
+            else:
+                raise ValueError(f"Unsupported exchange: {name}")
+            self.semaphores[name] = asyncio.Semaphore(self.concurrency.get(name, 5))
+
+        connector = aiohttp.TCPConnector(limit_per_host=self.concurrency.get("mexc", 5), keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.close()
+        self.clients = {}
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def fetch_one(self, exchange, market, symbol):
+        """Fetches and normalizes one snapshot; errors are returned in the `error` field, never raised."""
+        async with self.semaphores[exchange]:
+            try:
+                if exchange == "mexc" and market == "futures":
+                    return await self._fetch_mexc_futures(symbol)
+
+                client = self.clients.get((exchange, market))
+                if client is None:
+                    return empty_snapshot(exchange, market, symbol, "market not supported")
+                book = await client.fetch_order_book(symbol, params={"limit": SNAPSHOT_LIMITS[(exchange, market)]})
+                return {
+                    "exchange": exchange,
+                    "market": market,
+                    "symbol": symbol,
+                    "timestamp": (book.get("timestamp") or time.time() * 1000) / 1000,
+                    "nonce": book.get("nonce"),
+                    "bids": [[float(p), float(q)] for p, q, *_ in book["bids"]],
+                    "asks": [[float(p), float(q)] for p, q, *_ in book["asks"]],
+                    "error": None,
+                }
+            except Exception as e:
+                print(f"[ERROR] Failed to fetch {market} order book for {symbol} from {exchange}: {e}")
+                return empty_snapshot(exchange, market, symbol, str(e))
+
+    async def _fetch_mexc_futures(self, symbol):
+        endpoint = f"{MEXC_FUTURES_BASE_URL}/contract/depth/{symbol.replace('/', '_')}"
+        async with self.session.get(endpoint, params={"limit": SNAPSHOT_LIMITS[("mexc", "futures")]}) as response:
+            data = await response.json(content_type=None)
+        if response.status != 200 or "data" not in data:
+            return empty_snapshot("mexc", "futures", symbol, f"unexpected response: {data}")
+        return {
+            "exchange": "mexc",
+            "market": "futures",
+            "symbol": symbol,
+            "timestamp": data["data"].get("timestamp", time.time() * 1000) / 1000,
+            "nonce": data["data"].get("version"),
+            "bids": [[float(b[0]), float(b[1])] for b in data["data"]["bids"]],
+            "asks": [[float(a[0]), float(a[1])] for a in data["data"]["asks"]],
+            "error": None,
+        }
+
+    async def fetch(self, symbols, markets=("spot", "futures")):
+        """Fetches every (exchange, market, symbol) combination concurrently."""
+        await self.open()
+        jobs = [
+            self.fetch_one(exchange, market, symbol)
+            for exchange in self.exchange_names
+            for market in markets
+            for symbol in symbols
+        ]
+        return await asyncio.gather(*jobs)
+
+
+def fetch_snapshots(symbols, exchanges=("binance", "mexc"), markets=("spot", "futures"), **kwargs):
+    """Synchronous helper: one concurrent refresh, returns the normalized snapshots."""
+    async def run():
+        async with SnapshotService(exchanges, **kwargs) as service:
+            return await service.fetch(symbols, markets)
+
+    return asyncio.run(run())
@@ -0,0 +1,288 @@
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+import time
+import websockets
+from src.exchanges.websockets import WebSocketManager
+from src.exchanges.binance import BinanceExchange
+from src.exchanges.snapshot_cache import CachedExchange
+from src.utils.latency import LatencyMonitor
+from src.utils.series_log import SeriesFlusher
+from src.utils.pipeline import BoundedQueue, Stage, COALESCE
+from src.utils.logger import get_live_logger
+from configs.settings import PRICE_DATA_FILE, CVD_DATA_FILE, TRADE_CVD_DATA_FILE, BAR_DATA_FILE, LATENCY_METRICS_ENABLED, LOG_STATUS_INTERVAL, PERSIST_FLUSH_INTERVAL
+from configs.settings import MULTIPLEX_QUEUE_SIZE, MULTIPLEX_OVERFLOW, MULTIPLEX_DISPATCH_BATCH, SNAPSHOT_FETCH_WORKERS
+
+# Binance combined stream endpoint: /stream?streams=btcusdt@depth/ethusdt@depth
+BINANCE_COMBINED_WS_URL = "wss://stream.binance.com:9443/stream"
+MAX_STREAMS_PER_CONNECTION = 200  # Binance allows 1024, keep connections small enough to reconnect quickly
+CHANNELS = ("depth", "aggTrade")  # Per symbol: book diffs and trades (true CVD)
+SNAPSHOT_READY = "snapshot"  # Queued after an off-thread snapshot fetch, so the symbol resyncs without waiting for its next diff
+CLOSE = "close"  # Queued on unsubscribe/stop; runs after the symbol's already queued events
+
+
+def stream_name(trading_pair, channel="depth"):
+    """Returns the Binance stream name for a trading pair, e.g. BTC/USDT -> btcusdt@depth."""
+    return f"{trading_pair.replace('/', '').lower()}@{channel}"
+
+
+def symbol_path(path, trading_pair):
+    """Returns a per-symbol variant of a data file path, e.g. data/cvd_data_btcusdt.ndjson."""
+    root, ext = os.path.splitext(path)
+    return f"{root}_{trading_pair.replace('/', '').lower()}{ext}"
+
+
+class StreamConnection:
+    """One combined-stream WebSocket carrying a subset of the subscribed streams."""
+
+    def __init__(self, manager, url, max_streams):
+        self.manager = manager
+        self.url = url
+        self.max_streams = max_streams
+        self.streams = set()
+        self.ws = None
+        self.task = None
+        self.request_ids = itertools.count(1)
+
+    def free_slots(self):
+        return self.max_streams - len(self.streams)
+
+    async def send_request(self, method, streams):
+        """Sends a SUBSCRIBE/UNSUBSCRIBE request on the live socket (no-op while disconnected)."""
+        if self.ws is None or not streams:
+            return
+        request = {"method": method, "params": sorted(streams), "id": next(self.request_ids)}
+        try:
+            await self.ws.send(json.dumps(request))
+        except websockets.ConnectionClosed:
+            pass  # The reconnect URL is built from self.streams, so nothing is lost
+
+    async def run(self):
+        """Connects, reads frames and reconnects until stopped or left without streams."""
+        while self.manager.running and self.streams:
+            connected_streams = set(self.streams)
+            url = f"{self.url}?streams={'/'.join(sorted(connected_streams))}"
+            try:
+                async with websockets.connect(url, max_size=None) as ws:
+                    self.ws = ws
+                    # Catch up on changes made while the handshake was in flight
+                    await self.send_request("SUBSCRIBE", self.streams - connected_streams)
+                    await self.send_request("UNSUBSCRIBE", connected_streams - self.streams)
+                    async for message in ws:
+                        self.manager.on_frame(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Binance WS Error] {e}")
+            finally:
+                self.ws = None
+
+            if self.manager.running and self.streams:
+                print(f"[Binance WS] Closed. Reconnecting in {self.manager.reconnect_delay} seconds...")
+                await asyncio.sleep(self.manager.reconnect_delay)
+
+    async def close(self):
+        """Closes the socket and stops the read loop."""
+        if self.ws is not None:
+            await self.ws.close()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.task = None
+
+
+class CombinedStreamManager:
+    """asyncio runtime multiplexing many symbols over a few Binance combined-stream connections.
+
+    Each subscribed symbol gets its own `WebSocketManager` state (local book,
+    spread, CVD, series files), but no thread or socket of its own: frames
+    are read on the event loop, routed by their `stream` field into that
+    symbol's bounded queue (dropping its oldest events on overflow, never
+    blocking reads), and one dispatch stage drains the symbols with pending
+    events in turn, a batch at a time, keeping per-symbol ordering. Resync
+    snapshots are fetched on a small pool off the dispatch thread, so a
+    symbol waiting for one buffers its own diffs while the others keep
+    flowing. The per-symbol pipeline stages are never started, and every
+    symbol's series files are written by one shared `SeriesFlusher` thread,
+    so the thread count does not grow with the number of symbols.
+    Symbols can be added or removed at runtime with SUBSCRIBE/UNSUBSCRIBE requests,
+    without reconnecting.
+    """
+
+    def __init__(self, exchange=None, base_url=BINANCE_COMBINED_WS_URL, max_streams_per_connection=MAX_STREAMS_PER_CONNECTION, reconnect_delay=5, channels=CHANNELS):
+        self.exchange = exchange or CachedExchange(BinanceExchange(None, None))  # Shared REST client (one rate limiter, one snapshot cache)
+        self.base_url = base_url
+        self.max_streams_per_connection = max_streams_per_connection
+        self.reconnect_delay = reconnect_delay
+        self.channels = tuple(channels)
+        self.handlers = {}  # stream name -> per-symbol WebSocketManager (one entry per channel)
+        self.latency = LatencyMonitor(LATENCY_METRICS_ENABLED)  # One set of histograms, keyed by symbol
+        self.connections = []
+        self.queues = {}  # per-symbol WebSocketManager -> BoundedQueue of (received_at, data | SNAPSHOT_READY | CLOSE)
+        self.ready = BoundedQueue(sys.maxsize, COALESCE, key=id, name="ready")  # Symbols with queued events, at most one entry each
+        self.dispatcher = Stage("dispatch", self.drain, self.ready)
+        self.snapshot_pool = concurrent.futures.ThreadPoolExecutor(SNAPSHOT_FETCH_WORKERS, thread_name_prefix="snapshot")
+        self.flusher = SeriesFlusher(PERSIST_FLUSH_INTERVAL)  # Writes every symbol's series files
+        self.running = False
+
+    def create_handler(self, trading_pair):
+        """Builds the per-symbol processing pipeline."""
+        handler = WebSocketManager(
+            trading_pair,
+            exchange=self.exchange,
+            price_file=symbol_path(PRICE_DATA_FILE, trading_pair),
+            cvd_file=symbol_path(CVD_DATA_FILE, trading_pair),
+            latency_monitor=self.latency,
+            trade_cvd_file=symbol_path(TRADE_CVD_DATA_FILE, trading_pair),
+            bar_file=symbol_path(BAR_DATA_FILE, trading_pair),
+            flusher=self.flusher,
+        )
+        handler.order_book_tracker.snapshot_fetcher = lambda tracker: self.snapshot_pool.submit(self.fetch_snapshot, handler)
+        self.queues[handler] = BoundedQueue(MULTIPLEX_QUEUE_SIZE, MULTIPLEX_OVERFLOW, name=handler.order_book_tracker.trading_pair)
+        return handler
+
+    def fetch_snapshot(self, handler):
+        """Fetches a resync snapshot on the snapshot pool, then queues the symbol to load it."""
+        tracker = handler.order_book_tracker
+        try:
+            snapshot = tracker.snapshot_source.fetch_order_book(tracker.trading_pair)
+        except Exception as e:
+            get_live_logger().error(f"Snapshot fetch failed: {e}", key=("snapshot_error", tracker.trading_pair), every=LOG_STATUS_INTERVAL)
+            snapshot = {}  # Rejected by load_snapshot; the tracker backs off before requesting another
+        tracker.deliver_snapshot(snapshot)
+        self.enqueue(handler, SNAPSHOT_READY)
+
+    def enqueue(self, handler, event):
+        """Queues one event for a symbol and marks the symbol ready for dispatch."""
+        queue = self.queues.get(handler)
+        if queue is not None:
+            queue.put((time.time(), event))
+            self.ready.put(handler)
+
+    async def subscribe(self, trading_pairs):
+        """Adds symbols, packing them onto existing connections before opening new ones."""
+        self.running = True
+        if not self.dispatcher.running:
+            self.dispatcher.start()
+        new_streams = []
+        for trading_pair in trading_pairs:
+            streams = [stream_name(trading_pair, channel) for channel in self.channels]
+            if streams[0] not in self.handlers:
+                handler = self.create_handler(trading_pair)
+                for stream in streams:
+                    self.handlers[stream] = handler
+                new_streams.extend(streams)
+
+        while new_streams:
+            connection = next((c for c in self.connections if c.free_slots() > 0), None)
+            if connection is None:
+                connection = StreamConnection(self, self.base_url, self.max_streams_per_connection)
+                self.connections.append(connection)
+
+            batch = set(new_streams[:connection.free_slots()])
+            new_streams = new_streams[len(batch):]
+            connection.streams |= batch
+
+            if connection.task is None:
+                connection.task = asyncio.create_task(connection.run())
+            else:
+                await connection.send_request("SUBSCRIBE", batch)
+
+    async def unsubscribe(self, trading_pairs):
+        """Removes symbols at runtime; connections left without streams are closed."""
+        streams = {stream_name(trading_pair, channel) for trading_pair in trading_pairs for channel in self.channels}
+        for connection in list(self.connections):
+            removed = connection.streams & streams
+            if not removed:
+                continue
+            connection.streams -= removed
+            if connection.streams:
+                await connection.send_request("UNSUBSCRIBE", removed)
+            else:
+                await connection.close()
+                self.connections.remove(connection)
+
+        handlers = {id(h): h for h in (self.handlers.pop(stream, None) for stream in streams) if h is not None}
+        for handler in handlers.values():
+            self.enqueue(handler, CLOSE)
+
+    def on_frame(self, message):
+        """Decodes one combined-stream frame and routes it to the symbol's pipeline."""
+        try:
+            frame = json.loads(message)
+        except json.JSONDecodeError as e:
+            get_live_logger().error(f"Undecodable frame: {e}", key="undecodable", every=LOG_STATUS_INTERVAL)
+            return
+
+        stream = frame.get("stream")
+        if stream is None:  # Reply to a SUBSCRIBE/UNSUBSCRIBE request
+            if frame.get("error"):
+                print(f"[Binance WS Error] Subscription request failed: {frame['error']}")
+            return
+
+        handler = self.handlers.get(stream)
+        if handler is not None:  # Frames may still arrive briefly after an unsubscribe
+            self.enqueue(handler, frame["data"])
+
+    def drain(self, handler):
+        """Dispatch stage: runs up to MULTIPLEX_DISPATCH_BATCH of one symbol's events, then yields to the other symbols."""
+        queue = self.queues[handler]
+        for _ in range(MULTIPLEX_DISPATCH_BATCH):
+            item = queue.get(timeout=0)
+            if item is None:
+                return
+            received_at, event = item
+            if event is CLOSE:
+                handler.close()
+                del self.queues[handler]
+                return
+            self.dispatch(handler, received_at, event)
+        if len(queue):
+            self.ready.put(handler)
+
+    @staticmethod
+    def dispatch(handler, received_at, event):
+        """Runs one event through a symbol pipeline on the dispatch thread."""
+        try:
+            if event is SNAPSHOT_READY:
+                handler.handle_snapshot(received_at)
+            elif event.get("e") == "aggTrade":
+                handler.handle_trade(event)
+            else:
+                handler.handle_depth(event, received_at)
+        except Exception as e:
+            get_live_logger().error(f"WebSocket message handling failed: {e}", key=("dispatch_error", handler.order_book_tracker.trading_pair), every=LOG_STATUS_INTERVAL)
+
+    def queue_metrics(self):
+        """Per-symbol queue depth and drop counters, plus the dispatch stage's."""
+        metrics = {queue.name: queue.metrics() for queue in list(self.queues.values())}
+        metrics["dispatch"] = dict(self.ready.metrics(), errors=self.dispatcher.errors)
+        return metrics
+
+    async def run(self, trading_pairs):
+        """Subscribes `trading_pairs` and runs until cancelled."""
+        await self.subscribe(trading_pairs)
+        try:
+            while self.running:
+                await asyncio.sleep(1)
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Closes every connection and flushes every symbol pipeline."""
+        self.running = False
+        for connection in self.connections:
+            await connection.close()
+        self.connections = []
+        self.snapshot_pool.shutdown(wait=False, cancel_futures=True)
+        for handler in {id(h): h for h in self.handlers.values()}.values():
+            self.enqueue(handler, CLOSE)
+        self.handlers = {}
+        self.dispatcher.stop()  # Drains every queued event and close first
+        self.flusher.close()
@@ -1,66 +1,270 @@
 import threading
 import json
+import collections
 import websocket
 import time
 from src.trading.order_book_tracker import OrderBookTracker
 from src.trading.order_book_analysis import OrderBookAnalysis
+from src.trading.trade_cvd import TradeCVDAggregator
+from src.trading.bar_builder import BarBuilder, bar_path
+from src.analysis.online_smoothing import CVDSmoother
+from src.exchanges.binance import BinanceExchange
+from src.exchanges.snapshot_cache import CachedExchange
+from src.utils.series_log import SeriesWriter
+from src.utils.pipeline import BoundedQueue, Stage, Pipeline
+from src.utils.frame_capture import FrameRecorder, RecordingSnapshotSource, DEPTH_FRAME, TRADE_FRAME
+from src.utils.latency import LatencyMonitor
+from src.utils.logger import get_live_logger
+from configs.settings import (
+    PRICE_DATA_FILE, CVD_DATA_FILE, PERSIST_BATCH_SIZE, PERSIST_FLUSH_INTERVAL, PERSIST_FSYNC_INTERVAL,
+    PIPELINE_QUEUE_SIZE, PIPELINE_RAW_OVERFLOW, PIPELINE_BOOK_OVERFLOW, PIPELINE_ANALYTICS_OVERFLOW,
+    LATENCY_METRICS_ENABLED, LATENCY_METRICS_PORT, LOG_STATUS_INTERVAL,
+    TRADE_CVD_DATA_FILE, TRADE_CVD_INTERVAL, CVD_SMOOTHING_WINDOWS, CVD_SMOOTHING_KINDS,
+    BAR_SPECS, BAR_FOOTPRINT_TICK, BAR_CAPACITY, BAR_DATA_FILE,
+)
 
 # Binance WebSocket URL
 BINANCE_WS_URL = "wss://stream.binance.com:9443/ws/{symbol}@depth"
+BINANCE_TRADE_WS_URL = "wss://stream.binance.com:9443/ws/{symbol}@aggTrade"
 
 class WebSocketManager:
     """Manages Binance WebSocket for order book updates and CVD analysis."""
 
-    def __init__(self):
-        self.order_book_tracker = OrderBookTracker()
-        self.order_book_analysis = OrderBookAnalysis(self.order_book_tracker.order_book_buffer)  # Pass buffer
+    def __init__(self, trading_pair="BTC/USDT", exchange=None, price_file=PRICE_DATA_FILE, cvd_file=CVD_DATA_FILE, capture_file=None, latency_monitor=None, trade_cvd_file=TRADE_CVD_DATA_FILE, bar_file=BAR_DATA_FILE, flusher=None):
+        self.exchange = exchange or CachedExchange(BinanceExchange(None, None))  # REST snapshots for the local book (public endpoint)
+        self.recorder = FrameRecorder(capture_file) if capture_file else None  # Raw frames + snapshots for replay
+        snapshot_source = RecordingSnapshotSource(self.exchange, self.recorder) if self.recorder else self.exchange
+        self.order_book_tracker = OrderBookTracker(trading_pair=trading_pair, snapshot_source=snapshot_source)
+        self.flusher = flusher  # Shared SeriesFlusher (e.g. one per CombinedStreamManager); None = one flusher thread per file
+        self.order_book_analysis = OrderBookAnalysis(self.order_book_tracker.order_book_buffer, cvd_file=cvd_file, symbol=trading_pair, flusher=flusher)  # Pass buffer
+        self.latency = latency_monitor or LatencyMonitor(LATENCY_METRICS_ENABLED)  # Per-stage histograms, shareable across symbols
+        self.log = get_live_logger()  # Queued and rate limited per symbol, so logging never stalls the pipeline
+        self.publishers = []  # callable(timestamp, best_bid, best_ask, cvd, trade_cvd) per update, e.g. a shared-memory row (sharding.py) or the dashboard; must be O(1)
         self.threads = []
-        self.price_data = []  # Store real-time price movements
+        self.price_data = collections.deque(maxlen=10000)  # Recent real-time price movements
+        self.price_writer = self.series_writer(price_file)  # Append-only price log, flushed in the background (persistence stage)
+        self.trade_cvd_writer = self.series_writer(trade_cvd_file)
+        self.trade_cvd = TradeCVDAggregator(
+            TRADE_CVD_INTERVAL, self.trade_cvd_writer, CVDSmoother(CVD_SMOOTHING_WINDOWS, CVD_SMOOTHING_KINDS)
+        )  # True CVD from @aggTrade, one record per interval
+        self.bar_writers = {}
+        self.bars = {}  # (kind, size) -> BarBuilder, fed from the same trades
+        for kind, size in BAR_SPECS:
+            self.bar_writers[(kind, size)] = self.series_writer(bar_path(bar_file, kind, size))
+            self.bars[(kind, size)] = BarBuilder(kind, size, BAR_CAPACITY, BAR_FOOTPRINT_TICK, self.bar_writers[(kind, size)])
+
+        # Socket threads only enqueue; decode -> book -> analytics run on their own threads.
+        # Trades go straight to the analytics stage, so trade CVD and bars share its thread.
+        self.analytics_queue = BoundedQueue(PIPELINE_QUEUE_SIZE, PIPELINE_ANALYTICS_OVERFLOW, key=self.analytics_key)
+        self.pipeline = Pipeline([
+            Stage("decode", self.decode_frame, BoundedQueue(PIPELINE_QUEUE_SIZE, PIPELINE_RAW_OVERFLOW)),
+            Stage("book", self.apply_book_update, BoundedQueue(PIPELINE_QUEUE_SIZE, PIPELINE_BOOK_OVERFLOW)),
+            Stage("analytics", self.analytics_stage, self.analytics_queue),
+        ])
+
+    def series_writer(self, path):
+        """Append-only NDJSON log for one series, on the shared flusher if there is one."""
+        return SeriesWriter(
+            path,
+            batch_size=PERSIST_BATCH_SIZE,
+            flush_interval=PERSIST_FLUSH_INTERVAL,
+            fsync_interval=PERSIST_FSYNC_INTERVAL,
+            flusher=self.flusher,
+        )
 
     def on_message(self, ws, message):
-        """Handles incoming WebSocket messages."""
+        """Handles incoming WebSocket messages: timestamps the raw frame and enqueues it."""
+        received_at = time.time()
+        if self.recorder is not None:
+            self.recorder.record(received_at, DEPTH_FRAME, message)
+        self.pipeline.submit((received_at, message, time.perf_counter_ns()))
+
+    def handle_frame(self, received_at, message):
+        """Runs one raw frame through decode, book, spread, CVD and persistence on the calling thread (used by replay)."""
+        decoded = self.decode_frame((received_at, message, time.perf_counter_ns()))
+        if decoded is None:
+            return
+        update = self.apply_book_update(decoded)
+        if update is not None:
+            self.run_analytics(update)
+
+    def decode_frame(self, item):
+        """Decode stage: parses one raw frame. Items carry the perf_counter_ns stamp of the previous hop."""
+        received_at, message, stamp = item
         try:
             data = json.loads(message)
+            now = time.perf_counter_ns()
+            self.latency.record("decode", self.order_book_tracker.trading_pair, stamp, now)  # receive -> decoded (incl. queue wait)
+            return received_at, data, now
+        except json.JSONDecodeError as e:
+            self.log.error(f"WebSocket message handling failed: {e}", key=("decode_error", self.order_book_tracker.trading_pair), every=LOG_STATUS_INTERVAL)
+            return None
+
+    def apply_book_update(self, item):
+        """Book stage: applies one `@depth` event to the local book. Returns (received_at, symbol, order_book) if it changed."""
+        received_at, data, stamp = item
+        if "b" not in data or "a" not in data:
+            self.log.warning("Missing bids/asks in message", key=("missing", self.order_book_tracker.trading_pair), every=LOG_STATUS_INTERVAL, data=data)
+            return None
+
+        symbol = self.order_book_tracker.trading_pair
+        if "E" in data:  # Exchange event time (ms) -> our receive time
+            self.latency.record("event_lag", symbol, data["E"] * 1000000, int(received_at * 1e9))
+
+        gaps = self.order_book_tracker.sequence_gaps
+        changed = self.order_book_tracker.update_order_book("binance", data, received_at)  # Same clock as the price series, also on replay
+        if self.order_book_tracker.sequence_gaps != gaps:
+            self.latency.count("sequence_gaps", symbol)
+        if not changed:
+            return None  # Local book not synced yet or diff was stale
+
+        order_book = self.order_book_tracker.get_order_book()
+        now = time.perf_counter_ns()
+        self.latency.record("book", symbol, stamp, now)
+        if not order_book["a"]:
+            return None
+        return received_at, symbol, order_book, now
+
+    @staticmethod
+    def analytics_key(item):
+        """Coalescing key of the analytics queue: book updates by symbol, trades never (each one counts)."""
+        return id(item) if item[1] == TRADE_FRAME else item[1]
+
+    def analytics_stage(self, item):
+        """Analytics stage: a (received_at, TRADE_FRAME, message) trade or a book update from the book stage."""
+        if item[1] == TRADE_FRAME:
+            self.handle_trade_frame(item[0], item[2])
+        else:
+            self.run_analytics(item)
+
+    def run_analytics(self, item):
+        """Analytics stage: spread, CVD and price for the latest book; records go to the background writers."""
+        received_at, symbol, order_book, stamp = item
+
+        # ✅ Extract the lowest ask price (market price)
+        latest_price = float(order_book["a"][0][0])
+
+        # Compute bid-ask spread
+        self.order_book_analysis.compute_bid_ask_spread(order_book, received_at)
+        spread_done = time.perf_counter_ns()
+        self.latency.record("spread", symbol, stamp, spread_done)  # Includes the analytics queue wait
+
+        # ✅ Compute CVD using latest price (folds in every snapshot since the last call, even if coalesced)
+        cvd = self.order_book_analysis.compute_cvd(latest_price)
+        cvd_done = time.perf_counter_ns()
+        self.latency.record("cvd", symbol, spread_done, cvd_done)
+
+        # Store price data (constant cost per tick, written by the flusher thread)
+        price_point = {"timestamp": received_at, "price": latest_price}
+        self.price_data.append(price_point)
+        self.price_writer.append(price_point)
+        persisted = time.perf_counter_ns()
+        self.latency.record("persist", symbol, cvd_done, persisted)  # Enqueue to the background writers
+        self.latency.record("end_to_end", symbol, int(received_at * 1e9), time.time_ns())
+
+        if self.publishers:
+            best_bid = float(order_book["b"][0][0]) if order_book["b"] else float("nan")
+            for publish in self.publishers:
+                publish(received_at, best_bid, latest_price, cvd, self.trade_cvd.cvd)
+
+        self.log.info("Latest Price | CVD Updated", key=("price", symbol), every=LOG_STATUS_INTERVAL, symbol=symbol, price=latest_price)
 
-            if "b" in data and "a" in data:
-                self.order_book_tracker.update_order_book("binance", data)
-                
-                # ✅ Extract the lowest ask price (market price)
-                latest_price = float(data["a"][0][0])  
-
-                # Compute bid-ask spread
-                order_book = self.order_book_tracker.get_order_book()
-                self.order_book_analysis.compute_bid_ask_spread(order_book)
-                
-                # ✅ Compute CVD using latest price
-                self.order_book_analysis.compute_cvd(latest_price)
-                
-                # Store price data
-                self.price_data.append({"timestamp": time.time(), "price": latest_price})
-                with open("data/price_data.json", "w") as f:
-                    json.dump(self.price_data, f, indent=4)
-
-                print(f"[INFO] Latest Price: {latest_price} | CVD Updated")
-            
-            else:
-                print(f"[Binance WS Error] Missing bids/asks in message: {data}")
-
-        except Exception as e:
-            print(f"[ERROR] WebSocket message handling failed: {e}")
+    def on_trade_message(self, ws, message):
+        """Handles `@aggTrade` messages: timestamps the raw frame and enqueues it for the analytics stage."""
+        received_at = time.time()
+        if self.recorder is not None:
+            self.recorder.record(received_at, TRADE_FRAME, message)
+        self.analytics_queue.put((received_at, TRADE_FRAME, message))
+
+    def handle_trade_frame(self, received_at, message):
+        """Decodes one raw `@aggTrade` frame and folds it into the trade CVD (used live and by replay)."""
+        try:
+            self.handle_trade(json.loads(message))
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            self.log.error(f"Trade message handling failed: {e}", key=("trade_error", self.order_book_tracker.trading_pair), every=LOG_STATUS_INTERVAL)
+
+    def handle_trade(self, data):
+        """Adds one decoded `@aggTrade` event: `m` True means the buyer was the maker, so the aggressor sold."""
+        trade_id = data.get("a")
+        last_trade_id = self.trade_cvd.last_trade_id
+        if trade_id is not None and last_trade_id is not None and trade_id <= last_trade_id:
+            return  # Replayed after a reconnect
+        timestamp, price, qty = data["T"] / 1000.0, float(data["p"]), float(data["q"])
+        closed = self.trade_cvd.add_trade(timestamp, price, qty, data["m"], trade_id)
+        for builder in self.bars.values():
+            builder.add_trade(timestamp, price, qty, data["m"])
+        if closed is not None:
+            symbol = self.order_book_tracker.trading_pair
+            self.log.info("Trade CVD", key=("trade_cvd", symbol), every=LOG_STATUS_INTERVAL, symbol=symbol, cvd=closed["cvd"], delta=closed["delta"], trades=closed["trades"])
+
+    def handle_depth(self, data, received_at=None):
+        """Runs one decoded `@depth` event through book, spread, CVD and persistence on the calling thread."""
+        update = self.apply_book_update((received_at or time.time(), data, time.perf_counter_ns()))
+        if update is not None:
+            self.run_analytics(update)
+
+    def handle_snapshot(self, received_at=None):
+        """Seeds the book from a snapshot fetched on another thread, replaying the diffs buffered meanwhile (calling thread)."""
+        received_at = received_at or time.time()
+        if not self.order_book_tracker.resume_sync(received_at):
+            return
+        order_book = self.order_book_tracker.get_order_book()
+        if order_book["a"]:
+            self.run_analytics((received_at, self.order_book_tracker.trading_pair, order_book, time.perf_counter_ns()))
+
+    def get_pipeline_metrics(self):
+        """Returns queue depth / overflow counters for every stage, including the persistence writers."""
+        metrics = self.pipeline.metrics()
+        metrics["persist_price"] = self.price_writer.metrics()
+        metrics["persist_cvd"] = self.order_book_analysis.cvd_writer.metrics()
+        metrics["persist_trade_cvd"] = self.trade_cvd_writer.metrics()
+        for (kind, size), writer in self.bar_writers.items():
+            metrics[f"persist_bars_{kind}_{size:g}"] = writer.metrics()
+        metrics["log"] = self.log.metrics()
+        return metrics
+
+    def get_latency_metrics(self):
+        """Pull API: per-stage latency summaries (µs) and sequence-gap counters per symbol."""
+        return self.latency.snapshot()
+
+    def get_metrics(self):
+        """Latency and pipeline metrics together (served by `serve_metrics`)."""
+        return {"latency": self.get_latency_metrics(), "pipeline": self.get_pipeline_metrics()}
+
+    def serve_metrics(self, port=None):
+        """Exposes `get_metrics()` as JSON on a local HTTP endpoint."""
+        return self.latency.serve(port or LATENCY_METRICS_PORT, source=self.get_metrics)
+
+    def close(self):
+        """Drains the pipeline, then flushes and closes the price and CVD logs and the capture file."""
+        self.pipeline.stop()
+        self.price_writer.close()
+        self.trade_cvd.flush()  # Writes the partial last interval
+        self.trade_cvd_writer.close()
+        for spec, builder in self.bars.items():
+            builder.flush()  # Writes the partial last bar
+            self.bar_writers[spec].close()
+        self.order_book_analysis.close()
+        if self.recorder is not None:
+            self.recorder.close()
 
     def on_error(self, ws, error):
         """Handles WebSocket errors."""
-        print(f"[Binance WS Error] {error}")
+        self.log.error(f"[Binance WS Error] {error}")
 
     def on_close(self, ws, close_status_code, close_msg):
         """Handles WebSocket closure and reconnects."""
-        print("[Binance WS] Closed. Reconnecting in 5 seconds...")
+        self.log.warning("[Binance WS] Closed. Reconnecting in 5 seconds...")
         ws.close()  # Ensure proper closure
         time.sleep(5)
-        self.start_binance_ws()  # Restart WebSocket
+        self.start_binance_ws(self.order_book_tracker.trading_pair)  # Restart WebSocket (local book resyncs on the sequence gap)
 
     def start_binance_ws(self, trading_pair="BTC/USDT"):
         """Connects to Binance WebSocket and receives order book updates."""
+        self.pipeline.start()  # No-op if already running (e.g. on reconnect)
+        self.order_book_tracker.trading_pair = trading_pair
+        self.order_book_tracker.order_book.symbol = trading_pair
+        self.order_book_analysis.symbol = trading_pair
         symbol = trading_pair.replace("/", "").lower()
         url = BINANCE_WS_URL.format(symbol=symbol)
 
@@ -72,9 +276,30 @@ class WebSocketManager:
         )
         ws.run_forever()
 
-    def start_all(self, trading_pair="BTC/USDT"):
-        """Starts WebSocket in a separate thread to keep it running."""
-        thread = threading.Thread(target=self.start_binance_ws, args=(trading_pair,))
-        thread.daemon = True
-        thread.start()
-        self.threads.append(thread)
\ No newline at end of file
+    def on_trade_close(self, ws, close_status_code, close_msg):
+        """Reconnects the trade stream; trades replayed by Binance are skipped by aggregate id."""
+        self.log.warning("[Binance WS] Trade stream closed. Reconnecting in 5 seconds...")
+        ws.close()
+        time.sleep(5)
+        self.start_binance_trade_ws(self.order_book_tracker.trading_pair)
+
+    def start_binance_trade_ws(self, trading_pair="BTC/USDT"):
+        """Connects to the Binance `@aggTrade` stream for trade-based CVD."""
+        self.pipeline.start()  # No-op if already running
+        symbol = trading_pair.replace("/", "").lower()
+        ws = websocket.WebSocketApp(
+            BINANCE_TRADE_WS_URL.format(symbol=symbol),
+            on_message=self.on_trade_message,
+            on_error=self.on_error,
+            on_close=self.on_trade_close
+        )
+        ws.run_forever()
+
+    def start_all(self, trading_pair="BTC/USDT", trades=True):
+        """Starts the depth WebSocket (and the `@aggTrade` one) in separate threads to keep them running."""
+        targets = [self.start_binance_ws] + ([self.start_binance_trade_ws] if trades else [])
+        for target in targets:
+            thread = threading.Thread(target=target, args=(trading_pair,))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
\ No newline at end of file
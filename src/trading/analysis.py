@@ -1,26 +1,16 @@
+from src.trading.wall_index import BIDS, ASKS, print_large_orders
+from configs.settings import LARGE_ORDER_THRESHOLD
+
+
 class OrderBookAnalysis:
     """Provides real-time analysis of the order book."""
 
     def __init__(self, tracker):
         self.tracker = tracker
 
-    def detect_large_orders(self, exchange, threshold=10):
-        """Identifies large buy/sell orders in the order book."""
-        bids = self.tracker.order_books[exchange]["bids"]
-        asks = self.tracker.order_books[exchange]["asks"]
-
-        large_bids = [bid for bid in bids if bid[1] >= threshold]
-        large_asks = [ask for ask in asks if ask[1] >= threshold]
-
-        if large_bids or large_asks:
-            print(f"\n🚨 [ALERT] Large Orders Detected on {exchange.upper()} 🚨")
-
-        if large_bids:
-            print("🔵 Large Buy Orders:")
-            for price, volume in large_bids:
-                print(f"  Price: {price}, Volume: {volume}")
-
-        if large_asks:
-            print("🔴 Large Sell Orders:")
-            for price, volume in large_asks:
-                print(f"  Price: {price}, Volume: {volume}")
+    def detect_large_orders(self, exchange, threshold=LARGE_ORDER_THRESHOLD, within_pct=None):
+        """Identifies large buy/sell orders in the order book (read from the tracker's wall index)."""
+        large_bids = self.tracker.wall_index.levels_above(BIDS, threshold, within_pct)
+        large_asks = self.tracker.wall_index.levels_above(ASKS, threshold, within_pct)
+        print_large_orders(exchange, large_bids, large_asks)
+        return {"bids": large_bids, "asks": large_asks}
@@ -0,0 +1,219 @@
+import collections
+import os
+import numpy as np
+import pandas as pd
+
+TIME_BARS = "time"  # `size` seconds per bar
+TICK_BARS = "tick"  # `size` trades per bar
+VOLUME_BARS = "volume"  # Closes once `size` base volume has traded (the closing trade is not split)
+BAR_KINDS = (TIME_BARS, TICK_BARS, VOLUME_BARS)
+
+BAR_DTYPE = np.dtype([
+    ("start", "<f8"),
+    ("end", "<f8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("buy_volume", "<f8"),
+    ("sell_volume", "<f8"),
+    ("delta", "<f8"),
+    ("cvd", "<f8"),
+    ("trades", "<i8"),
+])
+
+
+class BarBuffer:
+    """Fixed-capacity ring of closed bars in one structured NumPy array.
+
+    Like `OrderBookRingBuffer`, every bar is written twice (at i and
+    i + capacity), so `window()` is always a contiguous, zero-copy view.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.bars = np.zeros(2 * capacity, dtype=BAR_DTYPE)
+        self.position = 0
+        self.count = 0
+        self.total_appended = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        """Appends one bar given as a tuple in `BAR_DTYPE` field order."""
+        self.bars[self.position] = row
+        self.bars[self.position + self.capacity] = row
+        self.position = (self.position + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total_appended += 1
+
+    def window(self, n=None):
+        """The last `n` closed bars (all by default), oldest first, as a view."""
+        n = self.count if n is None else min(n, self.count)
+        end = self.position + self.capacity
+        return self.bars[end - n:end]
+
+    def to_frame(self, n=None):
+        return pd.DataFrame(self.window(n))
+
+
+class BarBuilder:
+    """Builds time, tick or volume bars from trades, one O(1) update per trade.
+
+    Each bar carries OHLC, volume, buy/sell (aggressor) volume, delta and
+    the running CVD at its close. Closed bars go to a `BarBuffer` and, if a
+    `writer` is set, are appended as records whose `timestamp` (bar end),
+    `price` (close) and `cvd` fields are what `CVDAnalysis` reads. With
+    `footprint_tick` set, every bar also keeps volume per price bin as
+    {bin price: [buy volume, sell volume]} (`footprints`).
+    """
+
+    def __init__(self, kind=TIME_BARS, size=60, capacity=100000, footprint_tick=None, writer=None, initial_cvd=0.0):
+        if kind not in BAR_KINDS:
+            raise ValueError(f"Unknown bar kind: {kind}. Use one of {BAR_KINDS}.")
+        self.kind = kind
+        self.size = size
+        self.bars = BarBuffer(capacity)
+        self.footprint_tick = footprint_tick
+        self.footprints = collections.deque(maxlen=capacity) if footprint_tick else None
+        self.writer = writer
+        self.cvd = initial_cvd
+        self._reset()
+
+    def _reset(self):
+        self.bucket = None
+        self.start = self.end = None
+        self.open = self.high = self.low = self.close = None
+        self.volume = self.buy_volume = self.sell_volume = 0.0
+        self.trades = 0
+        self.footprint = {} if self.footprint_tick else None
+
+    def add_trade(self, timestamp, price, qty, buyer_is_maker):
+        """Adds one trade (`buyer_is_maker` True = aggressive sell). Returns the bar it closed as a dict, if any."""
+        closed = None
+        if self.kind == TIME_BARS:
+            bucket = int(timestamp // self.size)
+            if self.trades and bucket > self.bucket:
+                closed = self._close()
+            if not self.trades:
+                self.bucket = bucket
+                self.start = bucket * self.size
+
+        if not self.trades:
+            if self.start is None:
+                self.start = timestamp
+            self.open = self.high = self.low = price
+        elif price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.end = timestamp
+        self.volume += qty
+        if buyer_is_maker:
+            self.sell_volume += qty
+        else:
+            self.buy_volume += qty
+        self.trades += 1
+
+        if self.footprint is not None:
+            price_bin = round(price / self.footprint_tick) * self.footprint_tick
+            level = self.footprint.get(price_bin)
+            if level is None:
+                level = self.footprint[price_bin] = [0.0, 0.0]
+            level[1 if buyer_is_maker else 0] += qty
+
+        if (self.kind == TICK_BARS and self.trades >= self.size) or (self.kind == VOLUME_BARS and self.volume >= self.size):
+            closed = self._close()
+        return closed
+
+    def add_trades(self, timestamps, prices, qtys, buyer_is_maker):
+        """Adds a batch of trades (arrays or lists). Returns the bars it closed."""
+        closed = []
+        for trade in zip(np.asarray(timestamps).tolist(), np.asarray(prices).tolist(), np.asarray(qtys).tolist(), np.asarray(buyer_is_maker).tolist()):
+            bar = self.add_trade(*trade)
+            if bar is not None:
+                closed.append(bar)
+        return closed
+
+    def _close(self):
+        delta = self.buy_volume - self.sell_volume
+        self.cvd += delta
+        end = (self.bucket + 1) * self.size if self.kind == TIME_BARS else self.end
+        self.bars.append((
+            self.start, end, self.open, self.high, self.low, self.close,
+            self.volume, self.buy_volume, self.sell_volume, delta, self.cvd, self.trades,
+        ))
+        bar = {
+            "timestamp": end,
+            "start": self.start,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "price": self.close,
+            "volume": self.volume,
+            "buy_volume": self.buy_volume,
+            "sell_volume": self.sell_volume,
+            "delta": delta,
+            "cvd": self.cvd,
+            "trades": self.trades,
+        }
+        if self.footprint is not None:
+            self.footprints.append((end, self.footprint))
+            bar["footprint"] = self.footprint
+        if self.writer is not None:
+            self.writer.append(bar)
+        self._reset()
+        return bar
+
+    def flush(self):
+        """Closes the open bar early (on shutdown). Returns it, or None if it had no trades."""
+        return self._close() if self.trades else None
+
+    def open_bar(self):
+        """The bar being built, as a dict, or None."""
+        if not self.trades:
+            return None
+        return {
+            "start": self.start, "open": self.open, "high": self.high, "low": self.low, "close": self.close,
+            "volume": self.volume, "buy_volume": self.buy_volume, "sell_volume": self.sell_volume,
+            "delta": self.buy_volume - self.sell_volume, "trades": self.trades,
+        }
+
+
+def bar_path(path, kind, size):
+    """Returns the data file of one bar spec, e.g. data/bars_time_60.ndjson."""
+    root, ext = os.path.splitext(path)
+    return f"{root}_{kind}_{size:g}{ext}"
+
+
+def resample_time_bars(frame, interval, column, time_column="timestamp"):
+    """Vectorized OHLC time bars of one point series column (e.g. stored CVD or price points).
+
+    Returns a DataFrame with one row per non-empty interval: `timestamp`
+    (bar end, epoch seconds), `open`/`high`/`low`/`close` of `column`, the
+    closing value again under `column`, and the number of points.
+    """
+    timestamps = frame[time_column].to_numpy(dtype=np.float64)
+    values = frame[column].to_numpy(dtype=np.float64)
+    if not len(timestamps):
+        return pd.DataFrame(columns=[time_column, "open", "high", "low", "close", column, "points"])
+
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, values = timestamps[order], values[order]
+    buckets = np.floor(timestamps / interval).astype(np.int64)
+    starts = np.r_[0, np.flatnonzero(np.diff(buckets)) + 1]
+    ends = np.r_[starts[1:], len(buckets)]
+    close = values[ends - 1]
+    return pd.DataFrame({
+        time_column: (buckets[starts] + 1) * float(interval),
+        "open": values[starts],
+        "high": np.maximum.reduceat(values, starts),
+        "low": np.minimum.reduceat(values, starts),
+        "close": close,
+        column: close,
+        "points": ends - starts,
+    })
@@ -0,0 +1,39 @@
+import collections
+import itertools
+
+
+class CVDAccumulator:
+    """Stateful Cumulative Volume Delta (CVD) with O(1) updates.
+
+    Each update adds one volume delta to a running total, so the value
+    carries across ring-buffer evictions and never needs a re-scan.
+    Only the last `history_size` points are kept for plotting/persistence.
+    """
+
+    def __init__(self, history_size=10000, initial_cvd=0.0):
+        self.cvd = initial_cvd
+        self.updates = 0
+        self.history = collections.deque(maxlen=history_size)
+
+    def update(self, delta_v, timestamp, price=None):
+        """Adds one volume delta and records the new point. Returns the running CVD."""
+        self.cvd += delta_v
+        self.updates += 1
+        self.history.append({"timestamp": timestamp, "cvd": self.cvd, "price": price})
+        return self.cvd
+
+    def latest(self):
+        """Returns the most recent history point, or None if nothing was accumulated."""
+        return self.history[-1] if self.history else None
+
+    def get_history(self, n=None):
+        """Returns the last `n` history points (all retained points if n is None)."""
+        if n is None or n >= len(self.history):
+            return list(self.history)
+        return list(itertools.islice(reversed(self.history), n))[::-1]
+
+    def reset(self, initial_cvd=0.0):
+        """Restarts the running total and clears the retained history."""
+        self.cvd = initial_cvd
+        self.updates = 0
+        self.history.clear()
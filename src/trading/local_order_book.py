@@ -0,0 +1,117 @@
+import time
+from sortedcontainers import SortedDict
+from src.utils.logger import get_live_logger
+from configs.settings import LOG_STATUS_INTERVAL
+
+
+class LocalOrderBook:
+    """Full-depth local order book maintained from a REST snapshot plus diff-depth updates.
+
+    Follows Binance's "how to manage a local order book" procedure:
+    the book is seeded from a snapshot carrying `lastUpdateId`, diffs with
+    `u <= lastUpdateId` are dropped, the first applied diff must straddle
+    `lastUpdateId + 1`, and every later diff must start at `previous u + 1`.
+    Price levels live in sorted maps, so updates are O(log n) and the
+    best bid/ask is read from the ends of the map.
+    """
+
+    def __init__(self, symbol=None):
+        self.symbol = symbol
+        self.bids = SortedDict()  # price -> qty, best bid is the last key
+        self.asks = SortedDict()  # price -> qty, best ask is the first key
+        self.last_update_id = None
+        self.last_event_time = None
+        self.synced = False
+        self.wall_index = None  # Optional WallIndex notified of every level change
+
+    def reset(self):
+        """Drops all levels and marks the book as out of sync."""
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+
+    def load_snapshot(self, snapshot):
+        """Seeds the book from a REST snapshot (ccxt format or raw Binance format)."""
+        last_update_id = snapshot.get("nonce", snapshot.get("lastUpdateId"))
+        if last_update_id is None:
+            get_live_logger().warning("Snapshot has no update id. Cannot seed book.", key=("snapshot_no_id", self.symbol), every=LOG_STATUS_INTERVAL, symbol=self.symbol)
+            return False
+        if not snapshot.get("bids") and not snapshot.get("asks"):
+            get_live_logger().warning("Snapshot is empty. Cannot seed book.", key=("snapshot_empty", self.symbol), every=LOG_STATUS_INTERVAL, symbol=self.symbol)
+            return False
+
+        self.reset()
+        for price, qty in snapshot.get("bids", []):
+            qty = float(qty)
+            if qty > 0:
+                self.bids[float(price)] = qty
+        for price, qty in snapshot.get("asks", []):
+            qty = float(qty)
+            if qty > 0:
+                self.asks[float(price)] = qty
+
+        self.last_update_id = int(last_update_id)
+        if self.wall_index is not None:
+            self.wall_index.rebuild()
+        return True
+
+    def apply_diff(self, data):
+        """Applies one `@depth` diff. Returns True if applied, False if stale or out of sequence.
+
+        On a sequence gap the book is marked out of sync and the caller
+        is expected to reseed it from a fresh snapshot.
+        """
+        if self.last_update_id is None:
+            return False
+
+        first_id = data["U"]
+        final_id = data["u"]
+
+        if final_id <= self.last_update_id:
+            return False  # Already covered by the snapshot / previous diffs
+
+        if self.synced:
+            if first_id != self.last_update_id + 1:
+                get_live_logger().warning("Sequence gap", key=("gap", self.symbol), every=LOG_STATUS_INTERVAL, symbol=self.symbol, expected=self.last_update_id + 1, got=first_id)
+                self.synced = False
+                return False
+        elif not first_id <= self.last_update_id + 1 <= final_id:
+            return False  # Snapshot is older than this diff, wait for a newer one
+
+        timestamp = data["E"] / 1000.0 if "E" in data else time.time()
+        self._apply_side(self.bids, data.get("b", []), "bids", timestamp)
+        self._apply_side(self.asks, data.get("a", []), "asks", timestamp)
+        self.last_update_id = final_id
+        self.last_event_time = data.get("E")
+        self.synced = True
+        return True
+
+    def _apply_side(self, side, levels, name, timestamp):
+        """Sets or removes (qty == 0) each price level on one side of the book."""
+        wall_index = self.wall_index
+        for price, qty in levels:
+            price = float(price)
+            qty = float(qty)
+            if qty == 0:
+                side.pop(price, None)
+            else:
+                side[price] = qty
+            if wall_index is not None:
+                wall_index.on_level(name, price, qty, timestamp)
+
+    def best_bid(self):
+        """Returns (price, qty) of the best bid, or None if the side is empty."""
+        return self.bids.peekitem(-1) if self.bids else None
+
+    def best_ask(self):
+        """Returns (price, qty) of the best ask, or None if the side is empty."""
+        return self.asks.peekitem(0) if self.asks else None
+
+    def top(self, depth=5):
+        """Returns the best `depth` levels per side as lists of [price, qty], best first."""
+        bid_count = min(depth, len(self.bids))
+        ask_count = min(depth, len(self.asks))
+        bids = [list(self.bids.peekitem(-1 - i)) for i in range(bid_count)]
+        asks = [list(self.asks.peekitem(i)) for i in range(ask_count)]
+        return bids, asks
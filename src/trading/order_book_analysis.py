@@ -3,45 +3,66 @@ import time
 import json
 import os
 import matplotlib.pyplot as plt
-
-CVD_FILE = "data/cvd_data.json"  # Define JSON file path
+from src.trading.cvd_accumulator import CVDAccumulator
+from src.analysis.online_smoothing import CVDSmoother
+from src.utils.series_log import SeriesWriter, read_series
+from src.utils.logger import get_live_logger
+from src.utils.plotting import use_headless, downsample, plot_points, finish_figure
+from configs.settings import (
+    CVD_DATA_FILE, PERSIST_BATCH_SIZE, PERSIST_FLUSH_INTERVAL, PERSIST_FSYNC_INTERVAL,
+    CVD_SMOOTHING_WINDOWS, CVD_SMOOTHING_KINDS, LOG_STATUS_INTERVAL,
+)
+
+CVD_FILE = "data/cvd_data.json"  # Full-history snapshot written by save_cvd_history()
 
 class OrderBookAnalysis:
     """Analyzes order book data for trend detection."""
 
-    def __init__(self, order_book_buffer=None):
+    def __init__(self, order_book_buffer=None, cvd_history_size=10000, cvd_file=CVD_DATA_FILE, symbol=None, flusher=None):
         self.order_book_buffer = order_book_buffer
+        self.symbol = symbol  # Only used to key log rate limits
+        self.log = get_live_logger()
         self.spread_history = []  # Store bid-ask spreads
-        self.cvd_history = []
+        self.cvd_accumulator = CVDAccumulator(history_size=cvd_history_size)  # Running CVD, O(1) per update
+        self.cvd_history = self.cvd_accumulator.history  # Bounded CVD/price history
+        self.cvd_smoother = CVDSmoother(CVD_SMOOTHING_WINDOWS, CVD_SMOOTHING_KINDS)  # Live SMA/EMA of CVD, O(1) per point
+        self.snapshots_seen = 0  # Buffer snapshots already folded into the CVD
+        self.cvd_writer = SeriesWriter(
+            cvd_file,
+            batch_size=PERSIST_BATCH_SIZE,
+            flush_interval=PERSIST_FLUSH_INTERVAL,
+            fsync_interval=PERSIST_FSYNC_INTERVAL,
+            flusher=flusher,
+        )  # Append-only CVD log, flushed in the background (by a shared SeriesFlusher if given)
         self.price_history = []  # Store price data alongside CVD
 
-    def compute_bid_ask_spread(self, order_book):
-        """Computes the bid-ask spread and logs it over time."""
+    def compute_bid_ask_spread(self, order_book, timestamp=None):
+        """Computes the bid-ask spread and logs it over time (`timestamp` defaults to now)."""
         
-        if isinstance(order_book, dict):  
-            order_book = pd.DataFrame({
-                "Bid Price": [b[0] for b in order_book.get("b", [])],  
-                "Bid Volume": [b[1] for b in order_book.get("b", [])],  
-                "Ask Price": [a[0] for a in order_book.get("a", [])],  
-                "Ask Volume": [a[1] for a in order_book.get("a", [])]  
-            })
-
-        if order_book.empty:
-            print("[WARNING] Order book is empty. Cannot compute spread.")
+        if isinstance(order_book, dict):
+            bids = order_book.get("b", [])
+            asks = order_book.get("a", [])
+        else:
+            bids = order_book[["Bid Price", "Bid Volume"]].values.tolist()
+            asks = order_book[["Ask Price", "Ask Volume"]].values.tolist()
+
+        if not bids or not asks:
+            self.log.warning("Order book is empty. Cannot compute spread.", key=("spread_empty", self.symbol), every=LOG_STATUS_INTERVAL)
             return None
 
         try:
-            highest_bid = order_book["Bid Price"].iloc[0]  
-            lowest_ask = order_book["Ask Price"].iloc[0]   
+            highest_bid = float(bids[0][0])
+            lowest_ask = float(asks[0][0])
             spread = lowest_ask - highest_bid
-            timestamp = time.time()
+            if timestamp is None:
+                timestamp = time.time()
             self.spread_history.append((timestamp, spread))
 
-            print(f"[SPREAD] Time: {timestamp}, Bid: {highest_bid}, Ask: {lowest_ask}, Spread: {spread}")
+            self.log.info("Spread", key=("spread", self.symbol), every=LOG_STATUS_INTERVAL, symbol=self.symbol, time=timestamp, bid=highest_bid, ask=lowest_ask, spread=spread)
             return spread
 
         except (IndexError, ValueError, TypeError) as e:
-            print(f"[ERROR] Failed to compute bid-ask spread: {e}")
+            self.log.error(f"Failed to compute bid-ask spread: {e}", key=("spread_error", self.symbol), every=LOG_STATUS_INTERVAL)
             return None
 
     def get_spread_history(self):
@@ -49,57 +70,58 @@ class OrderBookAnalysis:
         return pd.DataFrame(self.spread_history, columns=['Timestamp', 'Spread'])
 
     def compute_cvd(self, latest_price):
-        """Computes Cumulative Volume Delta (CVD) and stores it in JSON."""
-        print("[DEBUG] compute_cvd() is running...")
+        """Applies the volume delta of each new buffered snapshot to the running CVD and appends it to the CVD log."""
+        self.log.debug("compute_cvd() is running...", key=("cvd_debug", self.symbol), every=LOG_STATUS_INTERVAL)
 
         if not self.order_book_buffer:
-            print("[WARNING] No order book data available.")
+            self.log.warning("No order book data available.", key=("cvd_empty", self.symbol), every=LOG_STATUS_INTERVAL)
             return None
 
-        #cvd = self.cvd_history[-1]["cvd"] if self.cvd_history else 0  # Start from last CVD
-        cvd = 0
-        cvd_values = []
-
-        for order_book in self.order_book_buffer:
-            bid_volume = order_book["Bid Volume"].sum()
-            ask_volume = order_book["Ask Volume"].sum()
-            delta_v = bid_volume - ask_volume  # Compute Volume Delta (ΔV)
-            cvd += delta_v  # Accumulate ΔV to compute CVD
-            cvd_values.append({"timestamp": time.time(), "cvd": cvd, "price": latest_price})
-
-        self.cvd_history = cvd_values  # Store computed CVD and price history
-        # Save data to JSON
-        with open("data/cvd_data.json", "w") as f:
-            json.dump(self.cvd_history, f, indent=4)
-
-        print(f"[CVD] Latest CVD: {cvd}, Price: {latest_price}")
+        start_seq = self.snapshots_seen
+        end_seq = self.order_book_buffer.total_appended  # Captured once; the writer may keep appending
+        self.snapshots_seen = end_seq
+        if end_seq <= start_seq:
+            return self.cvd_accumulator.cvd  # Nothing new since the last call
+
+        timestamps = self.order_book_buffer.slice(start_seq, end_seq)[0]  # Each point keeps its snapshot's time
+        bid_volume, ask_volume = self.order_book_buffer.volumes_between(start_seq, end_seq)  # Usually a single snapshot
+        for timestamp, delta_v in zip(timestamps.tolist(), (bid_volume - ask_volume).tolist()):  # Volume Delta (ΔV) per snapshot
+            cvd = self.cvd_accumulator.update(delta_v, timestamp, latest_price)  # Continue from last CVD
+            point = self.cvd_accumulator.latest()
+            point.update(self.cvd_smoother.update(cvd))  # Adds e.g. sma_10 / ema_10 to the point
+            self.cvd_writer.append(point)  # O(1), written by the flusher thread
+
+        self.log.info("CVD", key=("cvd", self.symbol), every=LOG_STATUS_INTERVAL, symbol=self.symbol, cvd=cvd, price=latest_price)
         return cvd
 
     def get_cvd_history(self):
         """Returns CVD history as a DataFrame."""
-        return pd.DataFrame(self.cvd_history)
+        return pd.DataFrame(list(self.cvd_history))
 
     def save_cvd_history(self):
         """Saves CVD values to a JSON file."""
         try:
             with open(CVD_FILE, "w") as f:
-                json.dump(self.cvd_history, f, indent=4)
+                json.dump(list(self.cvd_history), f, indent=4)
             print("[INFO] CVD history saved to JSON.")
         except Exception as e:
             print(f"[ERROR] Failed to save CVD history: {e}")
 
     def load_cvd_history(self):
-        """Loads previous CVD values from JSON if file exists."""
-        if os.path.exists(CVD_FILE):
-            try:
-                with open(CVD_FILE, "r") as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"[ERROR] Failed to load CVD history: {e}")
+        """Loads previous CVD values from the CVD log (or the legacy JSON file) if it exists."""
+        path = CVD_DATA_FILE if os.path.exists(CVD_DATA_FILE) else CVD_FILE
+        try:
+            return list(read_series(path))
+        except Exception as e:
+            print(f"[ERROR] Failed to load CVD history: {e}")
         return []
 
-    def plot_cvd(self):
-        """Plots the CVD trend over time."""
+    def close(self):
+        """Flushes and closes the CVD log."""
+        self.cvd_writer.close()
+
+    def plot_cvd(self, plot_file=None):
+        """Plots the CVD trend over time. With `plot_file`, renders headlessly (Agg) and saves it instead of showing."""
         if not self.cvd_history:
             print("[WARNING] No CVD data available for plotting.")
             return
@@ -107,11 +129,16 @@ class OrderBookAnalysis:
         timestamps = [entry["timestamp"] for entry in self.cvd_history]
         cvd_values = [entry["cvd"] for entry in self.cvd_history]
 
-        plt.figure(figsize=(10, 5))
-        plt.plot(timestamps, cvd_values, label='Cumulative Volume Delta', color='blue')
+        if plot_file:
+            use_headless()
+        fig = plt.figure(figsize=(10, 5))
+        plt.plot(*downsample(timestamps, cvd_values, plot_points(fig)), label='Cumulative Volume Delta', color='blue')
         plt.xlabel("Time (Timestamps)")
         plt.ylabel("CVD Value")
         plt.title("Cumulative Volume Delta (CVD) Over Time")
         plt.legend()
         plt.grid()
-        plt.show()
+        if plot_file:
+            finish_figure(fig, plot_file, headless=True)
+        else:
+            plt.show()
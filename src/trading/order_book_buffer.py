@@ -0,0 +1,101 @@
+import numpy as np
+
+PRICE = 0  # Index of the price column in the last axis
+QTY = 1  # Index of the quantity column in the last axis
+
+
+class OrderBookRingBuffer:
+    """Preallocated columnar ring buffer of top-of-book snapshots.
+
+    Snapshots are stored as float64 arrays shaped (snapshots, levels, {price, qty})
+    plus a timestamp column. Every row is written twice (at `i` and
+    `i + capacity`), so the last `n` snapshots are always one contiguous
+    slice and `window()` returns zero-copy views instead of concatenating.
+    Missing levels are stored as price NaN / qty 0 so volume sums stay valid.
+    The arrays are allocated uninitialized: readers only see the `count`
+    rows already written in full, so no memory is touched up front.
+    """
+
+    def __init__(self, capacity=600, depth=5):
+        self.capacity = capacity
+        self.depth = depth
+        self.timestamps = np.empty(2 * capacity, dtype=np.float64)
+        self.bids = np.empty((2 * capacity, depth, 2), dtype=np.float64)
+        self.asks = np.empty((2 * capacity, depth, 2), dtype=np.float64)
+        self.position = 0  # Next row to write, in [0, capacity)
+        self.count = 0  # Number of valid snapshots (<= capacity)
+        self.total_appended = 0  # Snapshots ever written, including evicted ones
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def append(self, timestamp, bids, asks):
+        """Writes one snapshot in place. `bids`/`asks` are sequences of (price, qty), best first.
+
+        Rows are written before the counters move, so a reader on another
+        thread that captured `total_appended` only sees fully written rows.
+        """
+        i = self.position
+        j = i + self.capacity
+        self._write_side(self.bids, i, j, bids)
+        self._write_side(self.asks, i, j, asks)
+        self.timestamps[i] = self.timestamps[j] = timestamp
+
+        self.position = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total_appended += 1
+
+    def _write_side(self, side, i, j, levels):
+        """Copies up to `depth` levels into rows i and j, padding the rest."""
+        row = side[i]
+        n = min(len(levels), self.depth)
+        if n:
+            row[:n] = levels[:n]
+        row[n:, PRICE] = np.nan
+        row[n:, QTY] = 0.0
+        side[j] = row
+
+    def window(self, n=None):
+        """Returns (timestamps, bids, asks) views over the last `n` snapshots, oldest first."""
+        n = self.count if n is None else min(n, self.count)
+        end = self.position + self.capacity
+        start = end - n
+        return self.timestamps[start:end], self.bids[start:end], self.asks[start:end]
+
+    def slice(self, start_seq, end_seq):
+        """Returns (timestamps, bids, asks) views for absolute sequence numbers [start_seq, end_seq).
+
+        Sequence numbers count every snapshot ever appended; rows older than
+        `total_appended - len(self)` have been evicted and are clipped off.
+        """
+        start_seq = max(start_seq, self.total_appended - self.count)
+        end_seq = min(end_seq, self.total_appended)
+        if end_seq <= start_seq:
+            start_seq = end_seq = self.total_appended
+        start = start_seq % self.capacity
+        end = start + (end_seq - start_seq)
+        return self.timestamps[start:end], self.bids[start:end], self.asks[start:end]
+
+    def latest(self):
+        """Returns (timestamp, bids, asks) views of the most recent snapshot, or None if empty."""
+        if not self.count:
+            return None
+        i = self.position - 1 + self.capacity
+        return self.timestamps[i], self.bids[i], self.asks[i]
+
+    def volumes(self, n=None):
+        """Returns (bid_volume, ask_volume) arrays summed across levels for the last `n` snapshots."""
+        _, bids, asks = self.window(n)
+        return bids[:, :, QTY].sum(axis=1), asks[:, :, QTY].sum(axis=1)
+
+    def volumes_between(self, start_seq, end_seq):
+        """Returns (bid_volume, ask_volume) arrays for absolute sequence numbers [start_seq, end_seq)."""
+        _, bids, asks = self.slice(start_seq, end_seq)
+        return bids[:, :, QTY].sum(axis=1), asks[:, :, QTY].sum(axis=1)
+
+    def clear(self):
+        """Forgets all snapshots without releasing the preallocated arrays."""
+        self.count = 0
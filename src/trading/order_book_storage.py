@@ -1,12 +1,270 @@
-import json
+import atexit
+import os
+import struct
 import time
+import zlib
+import numpy as np
+from configs.settings import ORDER_BOOK_FLUSH_INTERVAL
 
-def save_order_book(order_book, exchange):
-    """Saves the order book to a JSON file with a timestamp."""
-    timestamp = int(time.time())  # Unix timestamp
-    filename = f"data/historical/{exchange}_order_book_{timestamp}.json"
+HISTORICAL_DIR = "data/historical"
 
-    with open(filename, "w") as f:
-        json.dump(order_book, f, indent=4)
-    
-    print(f"[INFO] Order book saved: {filename}")
+KEYFRAME = 0  # Full book
+DELTA = 1  # Changed levels only (qty 0 = level removed)
+RECORD_HEADER = struct.Struct("<dBII")  # timestamp, kind, bid level count, ask level count
+INDEX_DTYPE = np.dtype([
+    ("first_ts", "<f8"),
+    ("last_ts", "<f8"),
+    ("segment", "<u4"),
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("count", "<u4"),
+])
+
+_default_stores = {}  # (exchange, symbol) -> OrderBookStore used by save_order_book
+
+
+def save_order_book(order_book, exchange, symbol="BTC/USDT"):
+    """Appends the order book to the historical store of this exchange/symbol."""
+    store = _default_stores.get((exchange, symbol))
+    if store is None:
+        if not _default_stores:
+            atexit.register(close_order_book_stores)  # Writes the partial blocks on exit
+        store = OrderBookStore(os.path.join(HISTORICAL_DIR, f"{exchange}_{symbol.replace('/', '')}"))
+        _default_stores[(exchange, symbol)] = store
+
+    bids = order_book.get("bids", order_book.get("b", []))
+    asks = order_book.get("asks", order_book.get("a", []))
+    store.append(time.time(), bids, asks)
+
+
+def close_order_book_stores():
+    """Flushes and closes every store opened by `save_order_book` (also runs at exit)."""
+    while _default_stores:
+        _, store = _default_stores.popitem()
+        store.close()
+
+
+class OrderBookStore:
+    """Historical order book store: periodic keyframes plus level deltas in compressed segments.
+
+    Every `keyframe_interval` records a full book (keyframe) is written; the
+    records in between only hold the levels that changed. A keyframe and its
+    deltas form one zlib-compressed block. Blocks are appended to segment
+    files (a new one every `blocks_per_segment` blocks), and every block gets
+    an entry in `index.bin` with its time range and location. Reconstructing
+    the book at time T decompresses a single block: binary-search the index,
+    start from the block's keyframe and apply deltas up to T.
+
+    A partial block is also written once it is `flush_interval` seconds
+    old, and on `close()`. Readers using this object also see the open
+    block; other processes only see flushed blocks. Before its first write
+    the store cuts what an interrupted flush left behind (a torn index
+    entry, unindexed segment bytes), so new blocks follow the last indexed one.
+    """
+
+    def __init__(self, path, keyframe_interval=100, blocks_per_segment=100, compression_level=6, flush_interval=ORDER_BOOK_FLUSH_INTERVAL):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.flush_interval = flush_interval  # Seconds; None = flush on count only
+        self.blocks_per_segment = blocks_per_segment
+        self.compression_level = compression_level
+        os.makedirs(path, exist_ok=True)
+
+        self.index_path = os.path.join(path, "index.bin")
+        self.index = self._load_index()
+        self.segment = int(self.index["segment"][-1]) if len(self.index) else 0
+        self.blocks_in_segment = int((self.index["segment"] == self.segment).sum()) if len(self.index) else 0
+        self.repaired = False  # Tail left by an interrupted flush cut yet (done on the first write, never by readers)
+
+        self.block = []  # Encoded records of the open block
+        self.block_opened = None  # time.monotonic() when the open block got its keyframe
+        self.block_first_ts = None
+        self.block_last_ts = None
+        self.previous_bids = {}
+        self.previous_asks = {}
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return np.empty(0, dtype=INDEX_DTYPE)
+        size = os.path.getsize(self.index_path) // INDEX_DTYPE.itemsize  # Ignore a torn last entry
+        return np.fromfile(self.index_path, dtype=INDEX_DTYPE, count=size)
+
+    def _repair(self):
+        """Truncates the index to its last complete entry and the segments to the end of their last indexed block."""
+        end = len(self.index) * INDEX_DTYPE.itemsize
+        if os.path.exists(self.index_path) and os.path.getsize(self.index_path) > end:
+            os.truncate(self.index_path, end)
+
+        segment_end = 0
+        if self.blocks_in_segment:
+            last = self.index[-1]
+            segment_end = int(last["offset"]) + int(last["length"])
+        segment_path = self.segment_path(self.segment)
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) > segment_end:
+            os.truncate(segment_path, segment_end)
+        next_path = self.segment_path(self.segment + 1)  # Started by a block whose index entry was lost
+        if os.path.exists(next_path):
+            os.remove(next_path)
+        self.repaired = True
+
+    def segment_path(self, segment):
+        return os.path.join(self.path, f"segment_{segment:06d}.obs")
+
+    # ---- Writing -------------------------------------------------------
+
+    def append(self, timestamp, bids, asks):
+        """Appends one book (sequences of (price, qty)); timestamps must be non-decreasing."""
+        bids = {float(p): float(q) for p, q in bids}
+        asks = {float(p): float(q) for p, q in asks}
+
+        if not self.block:
+            record = self._encode(timestamp, KEYFRAME, bids, asks)
+            self.block_first_ts = timestamp
+            self.block_opened = time.monotonic()
+        else:
+            record = self._encode(timestamp, DELTA, self._delta(self.previous_bids, bids), self._delta(self.previous_asks, asks))
+
+        self.block.append(record)
+        self.block_last_ts = timestamp
+        self.previous_bids, self.previous_asks = bids, asks
+
+        if len(self.block) >= self.keyframe_interval:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - self.block_opened >= self.flush_interval:
+            self.flush()
+
+    @staticmethod
+    def _delta(previous, current):
+        """Levels that changed between two books; removed levels get qty 0."""
+        delta = {price: qty for price, qty in current.items() if previous.get(price) != qty}
+        for price in previous.keys() - current.keys():
+            delta[price] = 0.0
+        return delta
+
+    @staticmethod
+    def _encode(timestamp, kind, bids, asks):
+        header = RECORD_HEADER.pack(timestamp, kind, len(bids), len(asks))
+        levels = np.array(list(bids.items()) + list(asks.items()), dtype=np.float64).reshape(-1, 2)
+        return header + levels.tobytes()
+
+    def flush(self):
+        """Compresses the open block, appends it to the current segment and indexes it."""
+        if not self.block:
+            return
+        if not self.repaired:
+            self._repair()
+        if self.blocks_in_segment >= self.blocks_per_segment:
+            self.segment += 1
+            self.blocks_in_segment = 0
+
+        compressed = zlib.compress(b"".join(self.block), self.compression_level)
+        segment_path = self.segment_path(self.segment)
+        with open(segment_path, "ab") as f:
+            offset = f.tell()
+            f.write(compressed)
+
+        entry = np.array([(self.block_first_ts, self.block_last_ts, self.segment, offset, len(compressed), len(self.block))], dtype=INDEX_DTYPE)
+        with open(self.index_path, "ab") as f:  # Written after the data, so the index never points at missing bytes
+            f.write(entry.tobytes())
+        self.index = np.concatenate([self.index, entry])
+
+        self.blocks_in_segment += 1
+        self.block = []
+
+    def close(self):
+        self.flush()
+
+    # ---- Reading -------------------------------------------------------
+
+    def _read_block(self, entry):
+        """Decodes one block into a list of (timestamp, kind, bids, asks) with bids/asks as (n, 2) arrays."""
+        if entry is None:  # The open block, still in memory
+            return self._decode(b"".join(self.block))
+        with open(self.segment_path(int(entry["segment"])), "rb") as f:
+            f.seek(int(entry["offset"]))
+            return self._decode(zlib.decompress(f.read(int(entry["length"]))))
+
+    @staticmethod
+    def _decode(raw):
+        records = []
+        position = 0
+        while position < len(raw):
+            timestamp, kind, n_bids, n_asks = RECORD_HEADER.unpack_from(raw, position)
+            position += RECORD_HEADER.size
+            levels = np.frombuffer(raw, dtype=np.float64, count=2 * (n_bids + n_asks), offset=position).reshape(-1, 2)
+            position += levels.nbytes
+            records.append((timestamp, kind, levels[:n_bids], levels[n_bids:]))
+        return records
+
+    @staticmethod
+    def _apply(book, levels):
+        for price, qty in levels:
+            if qty == 0:
+                book.pop(price, None)
+            else:
+                book[price] = qty
+
+    @staticmethod
+    def _as_book(timestamp, bids, asks):
+        """Returns a snapshot dict with sides sorted best first."""
+        return {
+            "timestamp": timestamp,
+            "bids": sorted(bids.items(), key=lambda level: -level[0]),
+            "asks": sorted(asks.items()),
+        }
+
+    def _iter_block(self, entry):
+        """Yields (timestamp, bids dict, asks dict) for every record of one block."""
+        bids, asks = {}, {}
+        for timestamp, kind, bid_levels, ask_levels in self._read_block(entry):
+            if kind == KEYFRAME:
+                bids, asks = {}, {}
+            self._apply(bids, bid_levels)
+            self._apply(asks, ask_levels)
+            yield timestamp, bids, asks
+
+    def book_at(self, timestamp):
+        """Returns the last book recorded at or before `timestamp`, or None."""
+        if self.block and timestamp >= self.block_first_ts:
+            entry = None
+        else:
+            block = int(np.searchsorted(self.index["first_ts"], timestamp, side="right")) - 1
+            if block < 0:
+                return None
+            entry = self.index[block]
+
+        bids, asks = {}, {}
+        found = None
+        for record_ts, kind, bid_levels, ask_levels in self._read_block(entry):
+            if record_ts > timestamp:
+                break
+            if kind == KEYFRAME:
+                bids, asks = {}, {}
+            self._apply(bids, bid_levels)
+            self._apply(asks, ask_levels)
+            found = record_ts
+        return self._as_book(found, bids, asks) if found is not None else None
+
+    def iter_books(self, start, end):
+        """Yields every book recorded in [start, end], oldest first."""
+        first_block = max(int(np.searchsorted(self.index["first_ts"], start, side="left")) - 1, 0)
+        last_block = int(np.searchsorted(self.index["first_ts"], end, side="right"))
+
+        entries = list(self.index[first_block:last_block])
+        if self.block and self.block_first_ts <= end and self.block_last_ts >= start:
+            entries.append(None)  # The open block
+        for entry in entries:
+            if entry is not None and entry["last_ts"] < start:
+                continue
+            for record_ts, bids, asks in self._iter_block(entry):
+                if record_ts > end:
+                    return
+                if record_ts >= start:
+                    yield self._as_book(record_ts, bids, asks)
+
+    def time_range(self):
+        """Returns (first, last) recorded timestamps, or None if the store is empty."""
+        if not len(self.index):
+            return (self.block_first_ts, self.block_last_ts) if self.block else None
+        last = self.block_last_ts if self.block else float(self.index["last_ts"][-1])
+        return float(self.index["first_ts"][0]), last
@@ -1,105 +1,281 @@
-import pandas as pd
 import collections
+import threading
+import time
+from src.trading.local_order_book import LocalOrderBook
+from src.trading.order_book_buffer import OrderBookRingBuffer
+from src.trading.wall_index import WallIndex, BIDS, ASKS, print_large_orders
+from src.analysis.order_flow import OnlineOFI, ofi_features
+from src.utils.logger import get_live_logger
+from configs.settings import LARGE_ORDER_THRESHOLD, LOG_BOOK_INTERVAL, LOG_STATUS_INTERVAL, OFI_LEVELS, OFI_WINDOWS, ORDER_BOOK_BUFFER_SIZE, SNAPSHOT_RETRY_DELAY, SNAPSHOT_RETRY_MAX_DELAY
+
+class BookSnapshot(collections.namedtuple("BookSnapshot", "version timestamp bids asks last_update_id bid_walls ask_walls")):
+    """Immutable top-of-book view: bids/asks are tuples of (price, qty), best first.
+
+    bid_walls/ask_walls are the full book's walls (levels at or above the
+    wall index threshold) as (price, qty) tuples, best price first.
+    """
+
+    __slots__ = ()
+
+    def as_order_book(self):
+        """The `get_order_book()` format: {"b": [...], "a": [...]}."""
+        return {"b": list(self.bids), "a": list(self.asks)}
+
+
+EMPTY_SNAPSHOT = BookSnapshot(0, None, (), (), None, (), ())
+
 
 class OrderBookTracker:
-    """Tracks Binance order book updates with a rolling buffer."""
+    """Tracks Binance order book updates with a rolling buffer.
 
-    def __init__(self, max_size=100):
-        self.max_size = max_size  # Store only last 100 updates
-        self.order_book_buffer = collections.deque(maxlen=max_size)  # Rolling buffer
+    Every applied update also publishes a new immutable `BookSnapshot`
+    (copy-on-write of the top levels) by swapping one reference, which is
+    atomic, so readers on any thread get a consistent view from
+    `snapshot()` without locks. The writer only touches the condition
+    variable when a reader is blocked in `wait_for_version()`.
+    """
 
-    def update_order_book(self, exchange, data):
-        """Processes incoming WebSocket order book data."""
-        try:
-            if "b" not in data or "a" not in data:
-                print(f"[WARNING] Missing bid/ask data in update: {data}")
-                return  # Skip processing if bids/asks are missing
+    def __init__(self, max_size=ORDER_BOOK_BUFFER_SIZE, depth=5, trading_pair="BTC/USDT", snapshot_source=None, max_pending=1000):
+        self.max_size = max_size  # Snapshots kept in the ring buffer
+        self.depth = depth  # Levels per side kept in each buffered snapshot
+        self.trading_pair = trading_pair
+        self.snapshot_source = snapshot_source  # Exchange adapter used to seed the local book
+        self.order_book = LocalOrderBook(trading_pair)  # Full-depth local book
+        self.wall_index = WallIndex(self.order_book, LARGE_ORDER_THRESHOLD)  # Large levels, updated per level change
+        self.pending_diffs = collections.deque(maxlen=max_pending)  # Diffs received while the book is not yet synced
+        self.order_book_buffer = OrderBookRingBuffer(max_size, depth)  # Preallocated rolling buffer
+        self.ofi = OnlineOFI(depth, OFI_LEVELS, OFI_WINDOWS)  # Multi-level order flow imbalance per update
+        self.needs_snapshot = True  # No usable snapshot loaded (start, sequence gap, or snapshot older than the diffs)
+        self.snapshot_fetches = 0  # REST snapshots fetched to (re)seed the book
+        self.snapshot_fetcher = None  # Optional callable(tracker) fetching off the update thread, see deliver_snapshot()
+        self.fetched_snapshot = None  # Snapshot delivered by the fetcher, loaded on the next update
+        self.snapshot_in_flight = False
+        self.snapshot_lock = threading.Lock()
+        self.snapshot_failures = 0  # Consecutive unusable snapshots; the retry delay doubles with each
+        self.snapshot_retry_at = 0.0  # time.monotonic() before which no snapshot is requested; diffs keep buffering
+        self.sequence_gaps = 0  # Diffs that did not follow the last applied update id
+        self.log = get_live_logger()  # Queued, rate-limited logging; never blocks the update path
+        self.published = EMPTY_SNAPSHOT  # Latest BookSnapshot, replaced (never mutated) on every update
+        self.published_walls = -1  # Wall index version behind the published walls
+        self.version_changed = threading.Condition()
+        self.waiters = 0  # Readers blocked in wait_for_version()
+
+    def sync_order_book(self):
+        """Brings the local book in sync: seeds it from a REST snapshot if needed, then replays buffered diffs.
 
-            bids = data.get("b", [])[:5]  # Top 5 bids
-            asks = data.get("a", [])[:5]  # Top 5 asks
+        A snapshot is fetched only when none is loaded, i.e. at start, after
+        a sequence gap, or when the buffered diffs start past
+        `lastUpdateId + 1` (snapshot too old). Otherwise the loaded snapshot
+        is kept: diffs it already covers are dropped, and the book syncs on
+        the first diff with U <= lastUpdateId + 1 <= u, which is usually a
+        later message than the one that triggered the fetch.
+        """
+        if self.needs_snapshot:
+            if self.snapshot_source is None:
+                self.log.warning("No snapshot source configured. Cannot sync order book.", key=("no_source", self.trading_pair), every=LOG_STATUS_INTERVAL)
+                return False
+            if time.monotonic() < self.snapshot_retry_at:
+                return False  # Backing off after a failed snapshot
+            try:
+                snapshot = self.take_snapshot()
+            except Exception as e:
+                self.log.error(f"Snapshot fetch failed: {e}", key=("snapshot_error", self.trading_pair), every=LOG_STATUS_INTERVAL)
+                snapshot = {}
+            if snapshot is None:
+                return False  # Still being fetched; diffs stay buffered meanwhile
+            if not self.order_book.load_snapshot(snapshot):
+                self.back_off_snapshot()
+                return False
+            self.snapshot_failures = 0
+            self.needs_snapshot = False
 
-            if not bids or not asks:
-                print(f"[WARNING] Empty bids or asks received: {data}")
+        while self.pending_diffs:
+            diff = self.pending_diffs.popleft()
+            if self.order_book.apply_diff(diff) or diff["u"] <= self.order_book.last_update_id:
+                continue  # Applied, or already covered by the snapshot / earlier diffs
+            # Diff starts past lastUpdateId + 1 (snapshot too old, or diffs lost): keep it and refetch on the next message
+            self.pending_diffs.appendleft(diff)
+            self.needs_snapshot = True
+            return False
 
-            # Convert to structured format
-            formatted_data = {
-                "Bid Price": [float(b[0]) for b in bids] if bids else [],
-                "Bid Volume": [float(b[1]) for b in bids] if bids else [],
-                "Ask Price": [float(a[0]) for a in asks] if asks else [],
-                "Ask Volume": [float(a[1]) for a in asks] if asks else [],
-            }
+        return self.order_book.synced
 
-            # Convert to DataFrame for better handling
-            df = pd.DataFrame(formatted_data)
+    def back_off_snapshot(self):
+        """Delays the next snapshot request exponentially after an unusable one."""
+        delay = min(SNAPSHOT_RETRY_DELAY * 2 ** self.snapshot_failures, SNAPSHOT_RETRY_MAX_DELAY)
+        self.snapshot_failures += 1
+        self.snapshot_retry_at = time.monotonic() + delay
+        self.log.warning("Snapshot unusable, retrying later", key=("snapshot_retry", self.trading_pair), every=LOG_STATUS_INTERVAL, symbol=self.trading_pair, failures=self.snapshot_failures, delay=delay)
 
-            # Store in rolling buffer
-            self.order_book_buffer.append(df)
+    def take_snapshot(self):
+        """The REST snapshot to seed from: fetched inline, or with a `snapshot_fetcher`, the one delivered since the last request (None until then)."""
+        if self.snapshot_fetcher is None:
+            self.snapshot_fetches += 1
+            return self.snapshot_source.fetch_order_book(self.trading_pair)
+        with self.snapshot_lock:
+            snapshot, self.fetched_snapshot = self.fetched_snapshot, None
+            request = snapshot is None and not self.snapshot_in_flight
+            if request:
+                self.snapshot_in_flight = True
+                self.snapshot_fetches += 1
+        if request:
+            self.snapshot_fetcher(self)
+        return snapshot
 
-            print("\n--- BINANCE Order Book ---")
-            print(df.to_string(index=False))
+    def deliver_snapshot(self, snapshot):
+        """Hands over a snapshot fetched on another thread; the update thread loads it with the next diff or `resume_sync()`."""
+        with self.snapshot_lock:
+            self.fetched_snapshot = snapshot
+            self.snapshot_in_flight = False
+
+    def update_order_book(self, exchange, data, timestamp=None):
+        """Processes incoming WebSocket order book data. Returns True if the local book changed.
+
+        `timestamp` is the event time stamped on the buffered snapshot (the
+        frame's receive time, also from a capture on replay); defaults to now.
+        """
+        try:
+            if "b" not in data or "a" not in data:
+                self.log.warning("Missing bid/ask data in update", key=("missing", self.trading_pair), every=LOG_STATUS_INTERVAL, symbol=self.trading_pair)
+                return False  # Skip processing if bids/asks are missing
+
+            if not self.order_book.synced:
+                self.pending_diffs.append(data)
+                if not self.sync_order_book():
+                    return False
+            elif not self.order_book.apply_diff(data):
+                if not self.order_book.synced:  # Sequence gap, resync from a fresh snapshot
+                    self.sequence_gaps += 1
+                    self.needs_snapshot = True
+                    self.pending_diffs.append(data)
+                    if not self.sync_order_book():
+                        return False
+                else:
+                    return False  # Stale diff, book unchanged
+
+            return self.record_update(timestamp)
 
         except KeyError as e:
-            print(f"[ERROR] Order Book Update Failed - Missing Key: {e}")
+            self.log.error(f"Order Book Update Failed - Missing Key: {e}", key=("update_error", self.trading_pair), every=LOG_STATUS_INTERVAL)
+        except Exception as e:
+            self.log.error(f"Order Book Update Failed: {e}", key=("update_error", self.trading_pair), every=LOG_STATUS_INTERVAL)
+        return False
+
+    def resume_sync(self, timestamp=None):
+        """Loads a snapshot delivered while no diff arrived and replays the buffered diffs. Returns True if the local book changed."""
+        if self.order_book.synced or self.fetched_snapshot is None:
+            return False
+        try:
+            if not self.sync_order_book():
+                return False
+            return self.record_update(timestamp)
         except Exception as e:
-            print(f"[ERROR] Order Book Update Failed: {e}")
+            self.log.error(f"Order Book Update Failed: {e}", key=("update_error", self.trading_pair), every=LOG_STATUS_INTERVAL)
+        return False
 
+    def record_update(self, timestamp=None):
+        """Buffers, scores and publishes the top of book after a change."""
+        bids, asks = self.order_book.top(self.depth)
+        if not bids or not asks:
+            self.log.warning("Empty bids or asks in local book", key=("empty", self.trading_pair), every=LOG_STATUS_INTERVAL, symbol=self.trading_pair)
+
+        # Store top-of-book snapshot in rolling buffer (written in place)
+        if timestamp is None:
+            timestamp = time.time()
+        self.order_book_buffer.append(timestamp, bids, asks)
+        _, bid_row, ask_row = self.order_book_buffer.latest()
+        self.ofi.update(timestamp, bid_row, ask_row)
+        self.publish_snapshot(timestamp, bids, asks)
+
+        self.log_order_book()  # At most once per LOG_BOOK_INTERVAL per symbol
+        if self.wall_index.events:
+            self.log_wall_events()
+        return True
+
+
+    def publish_snapshot(self, timestamp, bids, asks):
+        """Publishes the new top of book: version bump and one reference swap; notifies only if someone waits."""
+        bid_walls, ask_walls = self.published.bid_walls, self.published.ask_walls
+        if self.wall_index.version != self.published_walls:  # Walls rarely change; reuse the published tuples otherwise
+            bid_walls = tuple(self.wall_index.levels_above(BIDS))
+            ask_walls = tuple(self.wall_index.levels_above(ASKS))
+            self.published_walls = self.wall_index.version
+        self.published = BookSnapshot(
+            self.published.version + 1, timestamp, tuple(map(tuple, bids)), tuple(map(tuple, asks)), self.order_book.last_update_id,
+            bid_walls, ask_walls,
+        )
+        if self.waiters:  # Read after publishing, so a reader that registers later sees the new version itself
+            with self.version_changed:
+                self.version_changed.notify_all()
+
+    def snapshot(self):
+        """Latest `BookSnapshot` (version 0 = nothing applied yet). Safe from any thread."""
+        return self.published
+
+    def wait_for_version(self, version, timeout=None):
+        """Blocks until a snapshot newer than `version` is published. Returns it, or None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.version_changed:
+            self.waiters += 1
+            try:
+                while self.published.version <= version:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self.version_changed.wait(remaining)
+                return self.published
+            finally:
+                self.waiters -= 1
 
     def get_order_book(self):
         """Return the latest order book snapshot."""
-        if self.order_book_buffer:
-            latest_df = self.order_book_buffer[-1]  # Return latest DataFrame snapshot
-            order_book_dict = {
-                "b": latest_df[["Bid Price", "Bid Volume"]].values.tolist(),  # Convert back to list of lists
-                "a": latest_df[["Ask Price", "Ask Volume"]].values.tolist()
-            }
-            return order_book_dict
-        else:
-            return {"b": [], "a": []}  
-    
+        return self.published.as_order_book()
+
+    def format_order_book(self):
+        """Top bid/ask levels in tabular format."""
+        latest_order_book = self.get_order_book()  # Get latest snapshot
+        lines = [f"--- BINANCE Order Book {self.trading_pair} ---", f"{'Bid Price':>12} {'Bid Volume':>12} {'Ask Price':>12} {'Ask Volume':>12}"]
+        for bid, ask in zip(latest_order_book["b"], latest_order_book["a"]):
+            lines.append(f"{bid[0]:>12} {bid[1]:>12} {ask[0]:>12} {ask[1]:>12}")
+        return "\n".join(lines)
+
+    def log_order_book(self):
+        """Logs the top of book, sampled to once per LOG_BOOK_INTERVAL per symbol (the table is only built when emitted)."""
+        self.log.info(self.format_order_book, key=("book", self.trading_pair), every=LOG_BOOK_INTERVAL)
+
+    def log_wall_events(self):
+        """Logs walls that appeared, were pulled or were filled since the last update (rate limited per symbol)."""
+        for event, wall in self.wall_index.drain_events():
+            self.log.info(f"Wall {event}", key=("wall", self.trading_pair), every=LOG_STATUS_INTERVAL, symbol=self.trading_pair, **wall)
+
     def display_order_book(self):
         """Print top 5 bid/ask orders in tabular format."""
         if not self.order_book_buffer:
             print("[WARNING] No valid order book data yet.")
             return
-        
-        latest_order_book = self.order_book_buffer[-1]  # Get latest snapshot
-        print("\n--- BINANCE Order Book ---")
-        print(latest_order_book.to_string(index=False))  # Print formatted DataFrame
 
-    def detect_large_orders(self, threshold=5.0):
-        """Detects large buy/sell walls (orders > threshold BTC)."""
-        if not self.order_book_buffer:
-            return
-
-        latest_order_book = self.order_book_buffer[-1]
+        print("\n" + self.format_order_book())
 
-        large_bids = latest_order_book[latest_order_book["Bid Volume"] > threshold]
-        large_asks = latest_order_book[latest_order_book["Ask Volume"] > threshold]
-
-        if not large_bids.empty or not large_asks.empty:
-            print("\n🚨 [ALERT] Large Orders Detected 🚨")
-            if not large_bids.empty:
-                print(f"🔵 Large Buy Orders:\n{large_bids.to_string(index=False)}")
-            if not large_asks.empty:
-                print(f"🔴 Large Sell Orders:\n{large_asks.to_string(index=False)}")
+    def detect_large_orders(self, threshold=LARGE_ORDER_THRESHOLD, within_pct=None):
+        """Detects large buy/sell walls (orders >= threshold) in the full local book, read from the wall index (book thread only)."""
+        large_bids = self.wall_index.levels_above(BIDS, threshold, within_pct)
+        large_asks = self.wall_index.levels_above(ASKS, threshold, within_pct)
+        print_large_orders("binance", large_bids, large_asks)
+        return {"bids": large_bids, "asks": large_asks}
 
     def detect_order_flow_imbalance(self):
-        """Analyzes bid-ask volume imbalance."""
-        if len(self.order_book_buffer) < 2:
-            return
+        """Returns the latest multi-level OFI features (per-level array, aggregate, window sums) and prints the direction."""
+        if self.ofi.updates == 0:
+            return None
 
-        latest = self.order_book_buffer[-1]
-        prev = self.order_book_buffer[-2]
-
-        latest_bid_volume = latest["Bid Volume"].sum()
-        latest_ask_volume = latest["Ask Volume"].sum()
-        prev_bid_volume = prev["Bid Volume"].sum()
-        prev_ask_volume = prev["Ask Volume"].sum()
-
-        bid_change = latest_bid_volume - prev_bid_volume
-        ask_change = latest_ask_volume - prev_ask_volume
-
-        if bid_change > ask_change:
+        features = self.ofi.latest()
+        if features["ofi"] > 0:
             print("\n📈 Buyers are getting stronger!")
-        elif ask_change > bid_change:
+        elif features["ofi"] < 0:
             print("\n📉 Sellers are getting stronger!")
+        return features
+
+    def ofi_history(self, n=None):
+        """Vectorized OFI features over the last `n` buffered snapshots (see `ofi_features`)."""
+        timestamps, bids, asks = self.order_book_buffer.window(n)
+        return ofi_features(timestamps, bids, asks, OFI_LEVELS, OFI_WINDOWS)
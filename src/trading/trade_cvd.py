@@ -0,0 +1,124 @@
+import collections
+import numpy as np
+
+
+class TradeCVDAggregator:
+    """True cumulative volume delta from `@aggTrade` trades, bucketed per time interval.
+
+    Binance's `m` flag is True when the buyer is the maker, i.e. the taker
+    (aggressor) sold: that quantity counts as sell volume, otherwise as buy
+    volume. Trades are folded into the open bucket's scalar sums, so
+    `add_trade` allocates nothing; one record is emitted per interval that
+    had trades, with the same `timestamp` / `cvd` / `price` fields as the
+    book-based CVD log (plus buy/sell volume, delta and trade count), so
+    `CVDAnalysis` and `CVDSmoothing` read it unchanged.
+
+    A trade older than the open bucket (late delivery) is counted in the
+    open bucket. Trades with an aggregate id at or below the last one seen
+    (replayed after a reconnect) are ignored.
+    """
+
+    def __init__(self, interval=1.0, writer=None, smoother=None, history_size=10000, initial_cvd=0.0):
+        self.interval = interval
+        self.writer = writer  # e.g. a SeriesWriter; gets one record per closed bucket
+        self.smoother = smoother  # Optional CVDSmoother, adds e.g. sma_10 / ema_10 to each record
+        self.cvd = initial_cvd
+        self.history = collections.deque(maxlen=history_size)
+        self.last_trade_id = None
+        self.total_trades = 0
+
+        # Open bucket
+        self.bucket = None
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.trades = 0
+        self.last_price = None
+
+    def add_trade(self, timestamp, price, qty, buyer_is_maker, trade_id=None):
+        """Adds one trade. Returns the record of the bucket it closed, if any."""
+        if trade_id is not None:
+            if self.last_trade_id is not None and trade_id <= self.last_trade_id:
+                return None
+            self.last_trade_id = trade_id
+
+        closed = None
+        bucket = int(timestamp // self.interval)
+        if self.bucket is None or bucket > self.bucket:
+            if self.trades:
+                closed = self._close_bucket()
+            self.bucket = bucket
+
+        if buyer_is_maker:
+            self.sell_volume += qty
+        else:
+            self.buy_volume += qty
+        self.trades += 1
+        self.total_trades += 1
+        self.last_price = price
+        return closed
+
+    def add_trades(self, timestamps, prices, qtys, buyer_is_maker):
+        """Adds a time-ordered batch of trades (arrays), summing each interval with `np.add.reduceat`.
+
+        Returns the records of the buckets closed by the batch.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not len(timestamps):
+            return []
+        prices = np.asarray(prices, dtype=np.float64)
+        qtys = np.asarray(qtys, dtype=np.float64)
+        sells = np.asarray(buyer_is_maker, dtype=bool)
+
+        buckets = np.floor(timestamps / self.interval).astype(np.int64)
+        if self.bucket is not None:
+            buckets = np.maximum(buckets, self.bucket)
+        buckets = np.maximum.accumulate(buckets)  # Late trades stay in the open bucket
+
+        starts = np.r_[0, np.flatnonzero(np.diff(buckets)) + 1]
+        ends = np.r_[starts[1:], len(buckets)]
+        buy_sums = np.add.reduceat(np.where(sells, 0.0, qtys), starts)
+        sell_sums = np.add.reduceat(np.where(sells, qtys, 0.0), starts)
+
+        closed = []
+        for bucket, buy, sell, count, price in zip(
+            buckets[starts].tolist(), buy_sums.tolist(), sell_sums.tolist(), (ends - starts).tolist(), prices[ends - 1].tolist()
+        ):
+            if self.bucket is not None and bucket > self.bucket and self.trades:
+                closed.append(self._close_bucket())
+            self.bucket = bucket
+            self.buy_volume += buy
+            self.sell_volume += sell
+            self.trades += count
+            self.last_price = price
+        self.total_trades += len(timestamps)
+        return closed
+
+    def _close_bucket(self):
+        delta = self.buy_volume - self.sell_volume
+        self.cvd += delta
+        point = {
+            "timestamp": (self.bucket + 1) * self.interval,  # Bucket end: the value is known from then on
+            "cvd": self.cvd,
+            "price": self.last_price,
+            "buy_volume": self.buy_volume,
+            "sell_volume": self.sell_volume,
+            "delta": delta,
+            "trades": self.trades,
+        }
+        if self.smoother is not None:
+            point.update(self.smoother.update(self.cvd))
+        self.history.append(point)
+        if self.writer is not None:
+            self.writer.append(point)
+
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.trades = 0
+        return point
+
+    def flush(self):
+        """Closes the open bucket early (on shutdown). Returns its record, or None if it was empty."""
+        return self._close_bucket() if self.trades else None
+
+    def latest(self):
+        return self.history[-1] if self.history else None
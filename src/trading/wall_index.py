@@ -0,0 +1,186 @@
+import collections
+import math
+import time
+from sortedcontainers import SortedList
+from configs.settings import LARGE_ORDER_THRESHOLD
+
+BIDS = "bids"
+ASKS = "asks"
+
+ACTIVE = "active"
+PULLED = "pulled"  # Dropped below the threshold away from the touch: cancelled
+FILLED = "filled"  # Dropped below the threshold at the touch: traded away
+
+
+class Wall:
+    """Lifetime record of one price level that reached the wall threshold."""
+
+    __slots__ = ("side", "price", "size", "peak_size", "first_seen", "last_seen", "status")
+
+    def __init__(self, side, price, size, timestamp):
+        self.side = side
+        self.price = price
+        self.size = size
+        self.peak_size = size
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.status = ACTIVE
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class WallIndex:
+    """Incremental index of large resting orders (walls) on a `LocalOrderBook`.
+
+    The book reports every level change; levels at or above `threshold` are
+    kept in a per-side dict and a per-side size-ordered list, so
+    "levels above size X" and "top-K walls within a band around mid" are
+    range reads over the walls only, never a scan of the book. Levels below
+    the threshold cost one dict lookup per change.
+
+    When a wall drops below the threshold it is closed as FILLED if it was
+    at the touch (best price of its side) and PULLED otherwise, and moved to
+    `closed` with its first/last seen time and peak size.
+    """
+
+    def __init__(self, book=None, threshold=LARGE_ORDER_THRESHOLD, history_size=10000):
+        self.book = book
+        self.threshold = threshold
+        self.walls = {BIDS: {}, ASKS: {}}  # price -> Wall
+        self.by_size = {BIDS: SortedList(), ASKS: SortedList()}  # (-size, price), largest first
+        self.closed = collections.deque(maxlen=history_size)
+        self.events = collections.deque(maxlen=history_size)  # (event, Wall) for alerting, see drain_events()
+        self.version = 0  # Bumped whenever a wall appears, resizes or closes
+        if book is not None:
+            book.wall_index = self
+
+    def on_level(self, side, price, qty, timestamp):
+        """Called by the book after a level was set (qty 0 = removed)."""
+        wall = self.walls[side].get(price)
+        if qty >= self.threshold:
+            if wall is None:
+                wall = self.walls[side][price] = Wall(side, price, qty, timestamp)
+                self.events.append(("new", wall))
+            else:
+                if qty == wall.size:
+                    return
+                self.by_size[side].remove((-wall.size, price))
+                wall.size = qty
+                wall.last_seen = timestamp
+                if qty > wall.peak_size:
+                    wall.peak_size = qty
+            self.by_size[side].add((-qty, price))
+            self.version += 1
+        elif wall is not None:
+            self._close(wall, qty, timestamp)
+
+    def _close(self, wall, qty, timestamp):
+        side, price = wall.side, wall.price
+        del self.walls[side][price]
+        self.by_size[side].remove((-wall.size, price))
+
+        wall.size = qty
+        wall.last_seen = timestamp
+        wall.status = FILLED if self._at_touch(side, price) else PULLED
+        self.closed.append(wall)
+        self.events.append((wall.status, wall))
+        self.version += 1
+
+    def _at_touch(self, side, price):
+        """True if `price` is at or through the best price of its side (the level has just changed)."""
+        if self.book is None:
+            return False
+        best = self.book.best_bid() if side == BIDS else self.book.best_ask()
+        if best is None:
+            return True
+        return price >= best[0] if side == BIDS else price <= best[0]
+
+    def rebuild(self, timestamp=None):
+        """Re-indexes the whole book (after a snapshot load). Active walls start a new lifetime."""
+        timestamp = time.time() if timestamp is None else timestamp
+        for side in (BIDS, ASKS):
+            self.walls[side].clear()
+            self.by_size[side].clear()
+        self.version += 1
+        if self.book is None:
+            return
+        for side, levels in ((BIDS, self.book.bids), (ASKS, self.book.asks)):
+            for price, qty in levels.items():
+                if qty >= self.threshold:
+                    self.on_level(side, price, qty, timestamp)
+
+    # ---- Queries -------------------------------------------------------
+
+    def _band(self, within_pct):
+        """Price bounds (low, high) within `within_pct` percent of mid, or (None, None)."""
+        if within_pct is None or self.book is None:
+            return None, None
+        best_bid, best_ask = self.book.best_bid(), self.book.best_ask()
+        if best_bid is None or best_ask is None:
+            return None, None
+        mid = (best_bid[0] + best_ask[0]) / 2
+        return mid * (1 - within_pct / 100.0), mid * (1 + within_pct / 100.0)
+
+    def levels_above(self, side, size=None, within_pct=None):
+        """[(price, qty)] on `side` with qty >= `size` (default: the threshold), best price first.
+
+        Sizes at or above the threshold are read from the size-ordered index;
+        smaller sizes fall back to the book, limited to the band.
+        """
+        size = self.threshold if size is None else size
+        low, high = self._band(within_pct)
+        if size >= self.threshold or self.book is None:
+            levels = [
+                (price, -negative_size)
+                for negative_size, price in self.by_size[side].irange(maximum=(-size, math.inf))
+                if low is None or low <= price <= high
+            ]
+            levels.sort(reverse=side == BIDS)
+            return levels
+
+        book_side = self.book.bids if side == BIDS else self.book.asks
+        levels = [(price, book_side[price]) for price in book_side.irange(low, high) if book_side[price] >= size]
+        return levels[::-1] if side == BIDS else levels
+
+    def top_walls(self, side, k=5, within_pct=None):
+        """The `k` largest walls on `side` within the band as [(price, qty)], largest first."""
+        low, high = self._band(within_pct)
+        walls = []
+        for negative_size, price in self.by_size[side]:
+            if low is not None and not low <= price <= high:
+                continue
+            walls.append((price, -negative_size))
+            if len(walls) >= k:
+                break
+        return walls
+
+    def active_walls(self, side=None):
+        """Wall records currently in the book."""
+        sides = (side,) if side else (BIDS, ASKS)
+        return [wall for s in sides for wall in self.walls[s].values()]
+
+    def drain_events(self):
+        """Returns and clears [(event, wall dict)] since the last call; events are "new", "pulled" or "filled"."""
+        events = [(event, wall.as_dict()) for event, wall in self.events]
+        self.events.clear()
+        return events
+
+    def history(self):
+        """Closed walls as a list of dicts, oldest first."""
+        return [wall.as_dict() for wall in self.closed]
+
+
+def print_large_orders(exchange, bids, asks):
+    """Prints the large-order alert shared by every detector."""
+    if not bids and not asks:
+        return
+    print(f"\n🚨 [ALERT] Large Orders Detected on {exchange.upper()} 🚨")
+    if bids:
+        print("🔵 Large Buy Orders:")
+        for price, volume in bids:
+            print(f"  Price: {price}, Volume: {volume}")
+    if asks:
+        print("🔴 Large Sell Orders:")
+        for price, volume in asks:
+            print(f"  Price: {price}, Volume: {volume}")
@@ -0,0 +1,321 @@
+import asyncio
+import collections
+import json
+import math
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from src.utils.plotting import downsample
+from src.utils.logger import get_live_logger
+from configs.settings import (
+    DASHBOARD_PORT, DASHBOARD_FPS, DASHBOARD_POINTS_PER_FRAME, DASHBOARD_HISTORY, DASHBOARD_SMOOTHED_CVD,
+    DASHBOARD_PENDING_SIZE, DASHBOARD_CLIENT_QUEUE, LOG_STATUS_INTERVAL,
+)
+
+SERIES = ("price", "spread", "cvd", "cvd_smoothed")
+
+
+class DashboardFeed:
+    """Per-symbol tap on a `WebSocketManager`: one tuple appended per analytics update, nothing else.
+
+    `publish` runs on the ingestion (analytics) thread, so it only appends
+    to a bounded deque (atomic, O(1)); the dashboard thread drains it.
+    """
+
+    def __init__(self, manager, smoothed_key=DASHBOARD_SMOOTHED_CVD, max_pending=DASHBOARD_PENDING_SIZE):
+        self.symbol = manager.order_book_tracker.trading_pair
+        self.accumulator = manager.order_book_analysis.cvd_accumulator
+        self.smoothed_key = smoothed_key
+        self.pending = collections.deque(maxlen=max_pending)  # Oldest points are dropped if the dashboard stalls
+
+    def publish(self, timestamp, best_bid, best_ask, cvd, trade_cvd):
+        point = self.accumulator.latest()
+        smoothed = point.get(self.smoothed_key) if point else None
+        self.pending.append((
+            timestamp,
+            best_ask,  # Same "price" as the price log: the lowest ask
+            best_ask - best_bid,
+            math.nan if cvd is None else cvd,
+            math.nan if smoothed is None else smoothed,
+        ))
+
+    def drain(self):
+        points = []
+        for _ in range(len(self.pending)):
+            points.append(self.pending.popleft())
+        return points
+
+
+class LiveDashboard:
+    """Local browser dashboard of live price, spread, CVD and smoothed CVD per symbol.
+
+    A frame thread wakes `fps` times per second, drains every symbol's
+    feed and reduces each series to at most `points_per_frame` points
+    (first/last/min/max of the frame, as in `plotting.minmax_indices`).
+    Only these deltas are pushed to browsers as Server-Sent Events and
+    appended with `Plotly.extendTraces`; a new browser first gets the
+    decimated history kept here (`history` points per series). Ingestion
+    threads never wait on the dashboard: slow browsers drop frames.
+    """
+
+    def __init__(self, fps=DASHBOARD_FPS, points_per_frame=DASHBOARD_POINTS_PER_FRAME, history=DASHBOARD_HISTORY, smoothed_key=DASHBOARD_SMOOTHED_CVD):
+        self.fps = fps
+        self.points_per_frame = points_per_frame
+        self.history_size = history
+        self.smoothed_key = smoothed_key
+        self.feeds = {}  # symbol -> DashboardFeed
+        self.history = {}  # symbol -> {series: deque of (timestamp, value)}
+        self.clients = []  # One bounded queue of encoded frames per connected browser
+        self.lock = threading.Lock()  # Guards history and clients (dashboard and HTTP threads only)
+        self.frames = 0
+        self.dropped = 0
+        self.running = False
+        self.server = None
+        self.thread = None
+        self.log = get_live_logger()
+
+    def attach(self, manager):
+        """Starts following a `WebSocketManager` (can be called while running)."""
+        feed = DashboardFeed(manager, self.smoothed_key)
+        self.feeds[feed.symbol] = feed
+        manager.publishers.append(feed.publish)
+        return self
+
+    def detach(self, manager):
+        feed = self.feeds.pop(manager.order_book_tracker.trading_pair, None)
+        if feed is not None and feed.publish in manager.publishers:
+            manager.publishers.remove(feed.publish)
+
+    def frame(self):
+        """Drains all feeds into one delta: {symbol: {series: [timestamps, values]}} (only what is new)."""
+        delta = {}
+        for symbol, feed in list(self.feeds.items()):
+            points = feed.drain()
+            if not points:
+                continue
+            columns = np.array(points, dtype=np.float64)
+            series = {}
+            for i, name in enumerate(SERIES, start=1):
+                x, y = downsample(columns[:, 0], columns[:, i], self.points_per_frame, "minmax")
+                if len(y):
+                    series[name] = [x.tolist(), y.tolist()]
+            if series:
+                delta[symbol] = series
+        return delta
+
+    def _record(self, delta):
+        for symbol, series in delta.items():
+            history = self.history.setdefault(symbol, {name: collections.deque(maxlen=self.history_size) for name in SERIES})
+            for name, (x, y) in series.items():
+                history[name].extend(zip(x, y))
+
+    def snapshot(self):
+        """Decimated history in the delta format, for a newly connected browser."""
+        return {
+            symbol: {name: [[t for t, _ in points], [v for _, v in points]] for name, points in series.items() if points}
+            for symbol, series in self.history.items()
+        }
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        while self.running:
+            started = time.monotonic()
+            try:
+                delta = self.frame()
+                if delta:
+                    message = json.dumps(delta)
+                    with self.lock:
+                        self._record(delta)
+                        for client in self.clients:
+                            try:
+                                client.put_nowait(message)
+                            except queue.Full:
+                                self.dropped += 1
+                    self.frames += 1
+            except Exception as e:
+                self.log.error(f"Dashboard frame failed: {e}", key="dashboard_error", every=LOG_STATUS_INTERVAL)
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def start(self, port=DASHBOARD_PORT, host="127.0.0.1"):
+        """Starts the frame thread and the HTTP server (page, plotly.js and the /events stream)."""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="Dashboard", daemon=True)
+        self.thread.start()
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="DashboardServer", daemon=True).start()
+        print(f"[INFO] Live dashboard at http://{host}:{self.server.server_port}/")
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def metrics(self):
+        return {
+            "symbols": len(self.feeds),
+            "clients": len(self.clients),
+            "frames": self.frames,
+            "dropped_frames": self.dropped,
+            "pending": {symbol: len(feed.pending) for symbol, feed in list(self.feeds.items())},
+        }
+
+
+_plotly_js = None
+
+
+def plotly_js():
+    """plotly.js bundled with the `plotly` package (served locally, no CDN needed)."""
+    global _plotly_js
+    if _plotly_js is None:
+        from plotly.offline import get_plotlyjs
+        _plotly_js = get_plotlyjs().encode()
+    return _plotly_js
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Live Order Flow</title>
+<script src="/plotly.js"></script>
+<style>body { font-family: sans-serif; margin: 0 1em; } .chart { height: 600px; }</style>
+</head>
+<body>
+<h3>Live price, spread and CVD</h3>
+<div id="charts"></div>
+<script>
+const MAX_POINTS = __HISTORY__;
+const SERIES = ["price", "spread", "cvd", "cvd_smoothed"];
+let charts = {};
+
+function chart(symbol) {
+  if (charts[symbol]) return charts[symbol];
+  const div = document.createElement("div");
+  div.className = "chart";
+  document.getElementById("charts").appendChild(div);
+  Plotly.newPlot(div, [
+    {name: "Price", x: [], y: [], xaxis: "x", yaxis: "y", line: {color: "red"}},
+    {name: "Spread", x: [], y: [], xaxis: "x", yaxis: "y2", line: {color: "gray"}},
+    {name: "CVD", x: [], y: [], xaxis: "x", yaxis: "y3", line: {color: "blue"}},
+    {name: "Smoothed CVD", x: [], y: [], xaxis: "x", yaxis: "y3", line: {color: "green"}},
+  ], {title: symbol, grid: {rows: 3, columns: 1, subplots: [["xy"], ["xy2"], ["xy3"]]}, xaxis: {type: "date"}});
+  charts[symbol] = div;
+  return div;
+}
+
+function extend(delta) {
+  for (const symbol in delta) {
+    const x = [], y = [], traces = [];
+    SERIES.forEach((name, i) => {
+      const points = delta[symbol][name];
+      if (!points) return;
+      x.push(points[0].map(t => new Date(t * 1000)));
+      y.push(points[1]);
+      traces.push(i);
+    });
+    if (traces.length) Plotly.extendTraces(chart(symbol), {x: x, y: y}, traces, MAX_POINTS);
+  }
+}
+
+const events = new EventSource("/events");
+events.addEventListener("snapshot", e => {  // Sent on every (re)connect
+  document.getElementById("charts").innerHTML = "";
+  charts = {};
+  extend(JSON.parse(e.data));
+});
+events.onmessage = e => extend(JSON.parse(e.data));
+</script>
+</body>
+</html>
+"""
+
+
+def _handler(dashboard):
+
+    class DashboardHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/events":
+                self.stream_events()
+                return
+            if self.path in ("/", "/index.html"):
+                body, content_type = PAGE.replace("__HISTORY__", str(dashboard.history_size)).encode(), "text/html; charset=utf-8"
+            elif self.path == "/plotly.js":
+                try:
+                    body, content_type = plotly_js(), "application/javascript"
+                except ImportError:
+                    self.send_error(500, "plotly is not installed (pip install -r requirements.txt)")
+                    return
+            elif self.path == "/metrics":
+                body, content_type = json.dumps(dashboard.metrics()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream_events(self):
+            client = queue.Queue(DASHBOARD_CLIENT_QUEUE)
+            with dashboard.lock:
+                snapshot = json.dumps(dashboard.snapshot())
+                dashboard.clients.append(client)
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(f"event: snapshot\ndata: {snapshot}\n\n".encode())
+                self.wfile.flush()
+                while dashboard.running:
+                    try:
+                        message = client.get(timeout=15)
+                        self.wfile.write(f"data: {message}\n\n".encode())
+                    except queue.Empty:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Browser went away
+            finally:
+                with dashboard.lock:
+                    dashboard.clients.remove(client)
+
+        def log_message(self, format, *args):
+            pass  # Keep requests out of the console
+
+    return DashboardHandler
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.utils.dashboard <pair> [<pair> ...]
+    # e.g.   python -m src.utils.dashboard BTC/USDT ETH/USDT SOL/USDT
+    from src.exchanges.stream_multiplexer import CombinedStreamManager
+
+    trading_pairs = sys.argv[1:] or ["BTC/USDT"]
+    dashboard = LiveDashboard().start()
+
+    async def main():
+        stream_manager = CombinedStreamManager()
+        await stream_manager.subscribe(trading_pairs)
+        for handler in {id(h): h for h in stream_manager.handlers.values()}.values():
+            dashboard.attach(handler)
+        try:
+            while stream_manager.running:
+                await asyncio.sleep(1)
+        finally:
+            await stream_manager.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        dashboard.stop()
+        print("\n[EXIT] Dashboard stopped.")
@@ -0,0 +1,154 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+import collections
+
+CHUNK_MAGIC = b"FCAP"
+CHUNK_HEADER = struct.Struct("<4sIIdd")  # magic, frame count, compressed size, first ts, last ts
+
+DEPTH_FRAME = "depth"  # Raw WebSocket message text
+SNAPSHOT_FRAME = "snapshot"  # REST order book snapshot used to seed the local book
+TRADE_FRAME = "aggTrade"  # Raw @aggTrade message text
+
+
+class FrameRecorder:
+    """Captures raw frames with receive timestamps into a compressed, chunked file.
+
+    Each chunk is a small header (frame count, compressed size, first/last
+    timestamp) followed by zlib-compressed NDJSON of `[timestamp, kind, payload]`
+    records. Compression happens on a background thread, so `record()` only
+    enqueues. A crash loses at most the chunk being written; `read_frames`
+    stops at a truncated chunk.
+    """
+
+    def __init__(self, path, chunk_size=1000, flush_interval=1.0, compression_level=6):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.compression_level = compression_level
+        self.pending = collections.deque()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+        self.file = None
+        self.frames_written = 0
+        self.chunks_written = 0
+
+    def start(self):
+        """Opens the capture file in append mode and starts the compressor thread."""
+        if self.running:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "ab")
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"FrameRecorder[{self.path}]")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def record(self, received_at, kind, payload):
+        """Queues one frame. `payload` is the raw message text (or a JSON-serializable object)."""
+        if not self.running:
+            self.start()
+        with self.condition:
+            self.pending.append((received_at, kind, payload))
+            if len(self.pending) >= self.chunk_size:
+                self.condition.notify()
+
+    def _run(self):
+        """Compressor loop: writes a chunk when it is full or the flush interval elapsed."""
+        while True:
+            with self.condition:
+                if self.running and len(self.pending) < self.chunk_size:
+                    self.condition.wait(self.flush_interval)
+                count = min(len(self.pending), self.chunk_size) if self.running else len(self.pending)
+                frames = [self.pending.popleft() for _ in range(count)]
+                running = self.running
+
+            for start in range(0, len(frames), self.chunk_size):
+                self._write_chunk(frames[start:start + self.chunk_size])
+            if not running:
+                break
+
+    def _write_chunk(self, frames):
+        """Compresses and appends one chunk."""
+        try:
+            body = "".join(json.dumps(frame, separators=(",", ":")) + "\n" for frame in frames)
+            compressed = zlib.compress(body.encode("utf-8"), self.compression_level)
+            header = CHUNK_HEADER.pack(CHUNK_MAGIC, len(frames), len(compressed), frames[0][0], frames[-1][0])
+            self.file.write(header + compressed)
+            self.file.flush()
+            self.frames_written += len(frames)
+            self.chunks_written += 1
+        except Exception as e:
+            print(f"[ERROR] Failed to write capture chunk to {self.path}: {e}")
+
+    def close(self):
+        """Writes the remaining frames and closes the capture file."""
+        if not self.running:
+            return
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+        self.file.close()
+
+
+class RecordingSnapshotSource:
+    """Wraps an exchange adapter and records every order book snapshot it returns."""
+
+    def __init__(self, exchange, recorder):
+        self.exchange = exchange
+        self.recorder = recorder
+
+    def fetch_order_book(self, symbol):
+        snapshot = self.exchange.fetch_order_book(symbol)
+        self.recorder.record(time.time(), SNAPSHOT_FRAME, snapshot)
+        return snapshot
+
+    def fetch_futures_order_book(self, symbol):
+        return self.exchange.fetch_futures_order_book(symbol)
+
+
+def read_chunks(path, start_time=None, end_time=None):
+    """Yields lists of (timestamp, kind, payload) frames chunk by chunk.
+
+    Chunks entirely outside [start_time, end_time] are skipped without decompressing.
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            magic, count, size, first_ts, last_ts = CHUNK_HEADER.unpack(header)
+            if magic != CHUNK_MAGIC:
+                print(f"[WARNING] Corrupt chunk header in {path}, stopping replay.")
+                return
+
+            if (start_time is not None and last_ts < start_time) or (end_time is not None and first_ts > end_time):
+                f.seek(size, os.SEEK_CUR)
+                continue
+
+            compressed = f.read(size)
+            if len(compressed) < size:
+                print(f"[WARNING] Truncated last chunk in {path}, stopping replay.")
+                return
+
+            lines = zlib.decompress(compressed).decode("utf-8").splitlines()
+            yield [tuple(json.loads(line)) for line in lines]
+
+
+def read_frames(path, start_time=None, end_time=None, kinds=None):
+    """Streams (timestamp, kind, payload) frames from a capture file in recorded order."""
+    for frames in read_chunks(path, start_time, end_time):
+        for received_at, kind, payload in frames:
+            if start_time is not None and received_at < start_time:
+                continue
+            if end_time is not None and received_at > end_time:
+                return
+            if kinds is None or kind in kinds:
+                yield received_at, kind, payload
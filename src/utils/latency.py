@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUB_BUCKET_BITS = 5  # 32 sub-buckets per power of two: values are kept within ~3%
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+LINEAR_LIMIT_BITS = SUB_BUCKET_BITS + 1  # Values below 64 ns get exact buckets
+BUCKET_COUNT = 64 * SUB_BUCKETS
+
+
+def bucket_value(index):
+    """Highest value (ns) that falls into bucket `index`."""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = index - (shift << SUB_BUCKET_BITS)
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of integer nanosecond values.
+
+    Each power of two is split into 32 linear sub-buckets, so a bucket index
+    is two shifts away from the value and recording is a list increment
+    (a few hundred ns in CPython). Negative values (clock skew on event-time
+    lag) are counted in bucket 0 and in `negative`. A histogram is meant to
+    be written by one thread; readers may see a sample in flight.
+    """
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.negative = 0
+
+    def record(self, value):
+        if value < 0:
+            self.negative += 1
+            value = 0
+        shift = value.bit_length() - LINEAR_LIMIT_BITS
+        self.counts[(shift << SUB_BUCKET_BITS) + (value >> shift) if shift > 0 else value] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Value (ns) at or below which `q` percent of the samples fall."""
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * q / 100.0 + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(bucket_value(index), self.max)
+        return self.max
+
+    def reset(self):
+        self.__init__()
+
+    def snapshot(self):
+        """Summary in microseconds."""
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1000.0 if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1000.0,
+            "p90_us": self.percentile(90) / 1000.0,
+            "p99_us": self.percentile(99) / 1000.0,
+            "p999_us": self.percentile(99.9) / 1000.0,
+            "max_us": self.max / 1000.0,
+            "negative": self.negative,
+        }
+
+
+class LatencyMonitor:
+    """Latency histograms per (stage, symbol) plus named counters per symbol.
+
+    Stages record the time between two `time.perf_counter_ns()` stamps;
+    event-time lag is recorded from wall-clock nanoseconds. `snapshot()` is
+    the pull API, `serve()` exposes it over HTTP.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.started_at = time.time()
+
+    def histogram(self, stage, symbol):
+        key = (stage, symbol)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def record(self, stage, symbol, start_ns, end_ns):
+        if self.enabled:
+            self.histogram(stage, symbol).record(end_ns - start_ns)
+
+    def count(self, name, symbol, n=1):
+        key = (name, symbol)
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def reset(self):
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+        self.counters.clear()
+        self.started_at = time.time()
+
+    def snapshot(self):
+        """Returns {"stages": {symbol: {stage: summary}}, "counters": {symbol: {name: n}}, "uptime_s": ...}."""
+        stages = {}
+        for (stage, symbol), histogram in list(self.histograms.items()):
+            stages.setdefault(symbol, {})[stage] = histogram.snapshot()
+        counters = {}
+        for (name, symbol), n in list(self.counters.items()):
+            counters.setdefault(symbol, {})[name] = n
+        return {"stages": stages, "counters": counters, "uptime_s": time.time() - self.started_at}
+
+    def serve(self, port, host="127.0.0.1", source=None):
+        """Starts a local HTTP endpoint on a daemon thread; GET /metrics returns `source()` (default `snapshot()`) as JSON."""
+        return serve_metrics(source or self.snapshot, port, host)
+
+
+def serve_metrics(source, port, host="127.0.0.1"):
+    """Serves `source()` as JSON at http://host:port/metrics. Returns the server (call `shutdown()` to stop)."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = json.dumps(source(), default=str).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep scrapes out of the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="MetricsServer")
+    thread.daemon = True
+    thread.start()
+    print(f"[INFO] Metrics endpoint at http://{host}:{server.server_port}/metrics")
+    return server
@@ -1,8 +1,18 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from configs.settings import LOG_LEVEL, LOG_FILE, LOG_CONSOLE, LOG_QUEUE_SIZE
 
 def setup_logger(name, log_file, level=logging.INFO):
     """Set up a logger with the specified name, log file, and log level."""
     formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
+    if os.path.dirname(log_file):
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
     handler = logging.FileHandler(log_file)
     handler.setFormatter(formatter)
 
@@ -15,3 +25,163 @@ def setup_logger(name, log_file, level=logging.INFO):
 # Example usage:
 # logger = setup_logger("mexc_logger", "data/logs/mexc_test.log")
 # logger.info("Log message")
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records with their structured `fields` as text (`msg | k=v`) or as one JSON object per line."""
+
+    def __init__(self, json_lines=False):
+        super().__init__('%(asctime)s [%(levelname)s] %(name)s: %(message)s')
+        self.json_lines = json_lines
+
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        if self.json_lines:
+            return json.dumps({
+                "timestamp": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }, default=str)
+        text = super().format(record)
+        if fields:
+            text += " | " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without formatting them on the caller's thread; drops them when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record  # Same process: the listener thread does the formatting
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncLogger:
+    """Non-blocking logger for the live path, built on `setup_logger`.
+
+    Calls only check the level and the rate limit and put the record on a
+    bounded queue; a `QueueListener` thread formats and writes it to the
+    log file (JSON lines) and optionally the console. If the queue is full
+    the record is dropped instead of blocking ingestion.
+
+    Every call can be rate limited per `key`: `every=1.0` emits at most one
+    record per second for that key, `sample=100` emits one in a hundred.
+    Suppressed records are counted and reported on the next emitted one.
+    `msg` may be a callable, so expensive messages (e.g. a book table) are
+    only built when they will actually be emitted.
+    """
+
+    def __init__(self, name="live", log_file=LOG_FILE, level=LOG_LEVEL, console=LOG_CONSOLE, max_queue=LOG_QUEUE_SIZE):
+        level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.logger = setup_logger(name, log_file, level)
+        self.logger.propagate = False
+
+        handlers = list(self.logger.handlers)  # Written by the listener thread only
+        for handler in handlers:
+            handler.setFormatter(StructuredFormatter(json_lines=True))
+            self.logger.removeHandler(handler)
+        self.console_handler = None
+        if console:
+            self.console_handler = logging.StreamHandler(sys.stdout)
+            self.console_handler.setFormatter(StructuredFormatter())
+            handlers.append(self.console_handler)
+
+        self.queue_handler = _DroppingQueueHandler(queue.Queue(max_queue))
+        self.logger.addHandler(self.queue_handler)
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self.limits = {}  # key -> [next allowed time, calls since last emit, suppressed]
+        self.suppressed = 0
+        self.closed = False
+
+    def _allowed(self, key, every, sample):
+        state = self.limits.get(key)
+        if state is None:
+            state = self.limits[key] = [0.0, 0, 0]
+        state[1] += 1
+        now = time.monotonic() if every else 0.0
+        if (every and now < state[0]) or (sample and (state[1] - 1) % sample):
+            state[2] += 1
+            self.suppressed += 1
+            return None
+        if every:
+            state[0] = now + every
+        suppressed, state[2] = state[2], 0
+        return suppressed
+
+    def log(self, level, msg, key=None, every=None, sample=None, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        if key is not None and (every or sample):
+            suppressed = self._allowed(key, every, sample)
+            if suppressed is None:
+                return
+            if suppressed:
+                fields["suppressed"] = suppressed
+        if callable(msg):
+            msg = msg()
+        self.logger.log(level, msg, extra={"fields": fields})
+
+    def debug(self, msg, key=None, every=None, sample=None, **fields):
+        self.log(logging.DEBUG, msg, key, every, sample, **fields)
+
+    def info(self, msg, key=None, every=None, sample=None, **fields):
+        self.log(logging.INFO, msg, key, every, sample, **fields)
+
+    def warning(self, msg, key=None, every=None, sample=None, **fields):
+        self.log(logging.WARNING, msg, key, every, sample, **fields)
+
+    def error(self, msg, key=None, every=None, sample=None, **fields):
+        self.log(logging.ERROR, msg, key, every, sample, **fields)
+
+    def metrics(self):
+        return {
+            "queued": self.queue_handler.queue.qsize(),
+            "dropped": self.queue_handler.dropped,
+            "suppressed": self.suppressed,
+        }
+
+    def flush(self):
+        """Blocks until every queued record has been written."""
+        if not self.closed:
+            self.queue_handler.queue.join()
+
+    def close(self):
+        """Writes out queued records and stops the listener thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+_live_logger = None
+
+
+def get_live_logger():
+    """Shared AsyncLogger used by the ingestion path (configured in configs/settings.py)."""
+    if _live_logger is None:
+        configure_live_logger()
+    return _live_logger
+
+
+def configure_live_logger(**options):
+    """Replaces the shared live logger, e.g. `configure_live_logger(log_file=tmp_path / "live.log")`; options as `AsyncLogger`."""
+    global _live_logger
+    if _live_logger is not None:
+        _live_logger.close()
+    _live_logger = AsyncLogger(**options)
+    atexit.register(_live_logger.close)  # Flush what is still queued on exit
+    return _live_logger
@@ -0,0 +1,171 @@
+import threading
+import collections
+from src.utils.logger import get_live_logger
+
+BLOCK = "block"  # Producer waits for free space
+DROP_OLDEST = "drop_oldest"  # Oldest queued item is discarded
+COALESCE = "coalesce"  # A newer item replaces the queued item with the same key
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+class BoundedQueue:
+    """Bounded FIFO queue with a configurable overflow policy and depth metrics.
+
+    With COALESCE, `key(item)` identifies items (e.g. by symbol): an item whose
+    key is already queued replaces it in place, so a slow consumer only sees
+    the latest value per key. If the queue is full of distinct keys the oldest
+    item is dropped.
+    """
+
+    def __init__(self, maxsize=10000, policy=BLOCK, key=None, name=None):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}. Use one of {OVERFLOW_POLICIES}.")
+        if policy == COALESCE and key is None:
+            raise ValueError("The coalesce policy needs a key function.")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.key = key
+        self.name = name
+        self.items = collections.OrderedDict() if policy == COALESCE else collections.deque()
+        self.condition = threading.Condition()
+        self.put_count = 0
+        self.get_count = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item, timeout=None):
+        """Adds an item, applying the overflow policy. Returns False if a blocking put timed out."""
+        with self.condition:
+            if self.policy == COALESCE:
+                item_key = self.key(item)
+                if item_key in self.items:
+                    self.items[item_key] = item  # Keeps the original queue position
+                    self.coalesced += 1
+                    self.put_count += 1
+                    return True
+                if len(self.items) >= self.maxsize:
+                    self.items.popitem(last=False)
+                    self.dropped += 1
+                self.items[item_key] = item
+            else:
+                if len(self.items) >= self.maxsize:
+                    if self.policy == BLOCK:
+                        if not self.condition.wait_for(lambda: len(self.items) < self.maxsize, timeout):
+                            return False
+                    else:
+                        self.items.popleft()
+                        self.dropped += 1
+                self.items.append(item)
+
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Removes and returns the oldest item, or None if the timeout expires."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: len(self.items) > 0, timeout):
+                return None
+            if self.policy == COALESCE:
+                _, item = self.items.popitem(last=False)
+            else:
+                item = self.items.popleft()
+            self.get_count += 1
+            self.condition.notify_all()
+            return item
+
+    def metrics(self):
+        """Returns queue depth and overflow counters."""
+        return {
+            "depth": len(self.items),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "put": self.put_count,
+            "get": self.get_count,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
+class Stage:
+    """One pipeline stage: worker thread(s) reading `input_queue` and calling `func`.
+
+    A non-None return value is forwarded to the next stage's queue.
+    """
+
+    def __init__(self, name, func, input_queue, workers=1):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.input_queue.name = self.input_queue.name or name
+        self.workers = workers
+        self.output_queue = None
+        self.threads = []
+        self.errors = 0
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"Stage[{self.name}-{i}]")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _run(self):
+        """Worker loop; keeps draining until stopped and the input queue is empty."""
+        while self.running or len(self.input_queue):
+            item = self.input_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            try:
+                result = self.func(item)
+            except Exception as e:
+                self.errors += 1
+                get_live_logger().error(f"Pipeline stage '{self.name}' failed: {e}", key=("stage_error", self.name), every=1.0, errors=self.errors)
+                continue
+            if result is not None and self.output_queue is not None:
+                self.output_queue.put(result)
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+
+class Pipeline:
+    """Chain of stages connected by bounded queues."""
+
+    def __init__(self, stages):
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.output_queue = next_stage.input_queue
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def submit(self, item):
+        """Feeds an item into the first stage."""
+        return self.stages[0].input_queue.put(item)
+
+    def stop(self):
+        """Stops stages in order so each one drains into the next before it stops."""
+        for stage in self.stages:
+            stage.stop()
+        self.running = False
+
+    def metrics(self):
+        """Returns queue metrics and error counts per stage."""
+        return {stage.name: dict(stage.input_queue.metrics(), errors=stage.errors) for stage in self.stages}
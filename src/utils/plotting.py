@@ -0,0 +1,143 @@
+import concurrent.futures
+import multiprocessing
+import os
+import re
+from datetime import datetime
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from configs.settings import PLOT_DOWNSAMPLE, PLOT_DPI, PLOT_RENDER_PROCESSES
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+
+def use_headless():
+    """Switches this process to the non-interactive Agg backend (no window, `show()` never blocks)."""
+    if matplotlib.get_backend().lower() != "agg":
+        plt.switch_backend("Agg")
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def minmax_indices(x, y, buckets):
+    """Indices of the first, last, min and max point in each of `buckets` equal-width x ranges (M4).
+
+    With one bucket per pixel column the rasterized line is the same as
+    with every point. `x` must be sorted; at most 4 points per bucket are kept.
+    """
+    n = len(y)
+    if n <= 4 * buckets:
+        return np.arange(n)
+    xf = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    span = xf[-1] - xf[0]
+    if span > 0:
+        ids = np.minimum(((xf - xf[0]) / span * buckets).astype(np.int64), buckets - 1)
+    else:
+        ids = np.arange(n) * buckets // n
+    starts = np.r_[0, np.flatnonzero(np.diff(ids)) + 1]
+    ends = np.r_[starts[1:], n]
+    counts = ends - starts
+    group = np.repeat(np.arange(len(starts)), counts)
+
+    extremes = []
+    for reduce in (np.minimum, np.maximum):
+        positions = np.flatnonzero(y == np.repeat(reduce.reduceat(y, starts), counts))
+        _, first = np.unique(group[positions], return_index=True)  # One per bucket
+        extremes.append(positions[first])
+    return np.unique(np.concatenate([starts, ends - 1, *extremes]))
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the visual shape.
+
+    Each bucket keeps the point forming the largest triangle with the
+    previously kept point and the next bucket's average; the work inside a
+    bucket is vectorized.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    xf = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)  # Buckets between the fixed first and last point
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = xf[end:next_end].mean() if next_end > end else xf[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        areas = np.abs(
+            (xf[previous] - next_x) * (y[start:end] - y[previous])
+            - (xf[previous] - xf[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        kept[i + 1] = previous
+    return kept
+
+
+def downsample(x, y, points, method=PLOT_DOWNSAMPLE):
+    """Returns (x, y) reduced to about `points` points (`method` "minmax" or "lttb"; None keeps everything)."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(y)
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    if method is None or len(y) <= points:
+        return x, y
+    if method == "minmax":
+        index = minmax_indices(x, y, max(1, points // 4))
+    elif method == "lttb":
+        index = lttb_indices(x, y, points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}. Use one of {DOWNSAMPLE_METHODS}.")
+    return x[index], y[index]
+
+
+def plot_points(fig):
+    """Points per line that still fill every pixel column of `fig` (4 per column for minmax)."""
+    return 4 * int(fig.get_figwidth() * fig.dpi)
+
+
+def plot_path(plot_dir, prefix, *labels):
+    """Unique plot file name, e.g. plots/cvd_vs_price_BTCUSDT_2025-02-12_2025-02-13_<now>.png."""
+    parts = [prefix] + [re.sub(r"[^0-9A-Za-z.-]+", "", str(label)) for label in labels if label is not None]
+    parts.append(datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f"))
+    return os.path.join(plot_dir, "_".join(parts) + ".png")
+
+
+def finish_figure(fig, plot_filename, headless):
+    """Saves `fig`, shows it unless headless, and frees it."""
+    fig.savefig(plot_filename, dpi=PLOT_DPI)
+    print(f"[INFO] Plot saved as {plot_filename}")
+    if not headless:
+        plt.show()
+    plt.close(fig)
+
+
+def _render(analysis_class, method, kwargs):
+    use_headless()
+    analysis = analysis_class(**kwargs, headless=True)
+    return getattr(analysis, method)()
+
+
+def render_batch(analysis_class, jobs, method="run_analysis", processes=PLOT_RENDER_PROCESSES):
+    """Renders many plots (e.g. one per symbol or date range) in parallel worker processes.
+
+    `jobs` is a list of constructor kwargs for `analysis_class` (e.g.
+    `CVDAnalysis` with method "run_analysis", or `CVDSmoothing` with "run").
+    Returns the saved file names in job order (None where nothing was plotted).
+    """
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        futures = [pool.submit(_render, analysis_class, method, kwargs) for kwargs in jobs]
+        return [future.result() for future in futures]
@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+import time
+import collections
+
+
+class SeriesWriter:
+    """Append-only NDJSON writer with a background flusher thread.
+
+    `append()` only enqueues the record, so its cost is constant no matter
+    how long the process runs. The flusher thread writes batches of
+    `batch_size` records (or whatever is pending every `flush_interval`
+    seconds) and calls fsync at most every `fsync_interval` seconds.
+    With a shared `flusher`, the writer has no thread of its own and is
+    flushed by the flusher's thread together with its other writers.
+    Since the file is only ever appended to, a crash can at worst leave a
+    truncated last line, which `read_series` skips. If the disk falls behind,
+    at most `max_pending` records are queued and the oldest ones are dropped.
+    """
+
+    def __init__(self, path, batch_size=100, flush_interval=1.0, fsync_interval=5.0, max_pending=100000, flusher=None):
+        self.path = path
+        self.flusher = flusher  # Shared SeriesFlusher; None = own flusher thread
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.pending = collections.deque(maxlen=max_pending)
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()  # Serializes writes between the flusher and close()
+        self.thread = None
+        self.running = False
+        self.file = None
+        self.last_fsync = time.monotonic()
+        self.records_written = 0
+        self.dropped = 0
+
+    def start(self):
+        """Opens the file in append mode and starts the flusher thread."""
+        if self.running:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.running = True
+        if self.flusher is not None:
+            self.flusher.add(self)
+            return
+        self.thread = threading.Thread(target=self._run, name=f"SeriesWriter[{self.path}]")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def append(self, record):
+        """Queues one record (a JSON-serializable dict) for writing."""
+        if not self.running:
+            self.start()
+        with self.condition:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1  # deque drops the oldest record
+            self.pending.append(record)
+            full = len(self.pending) >= self.batch_size
+            if full and self.flusher is None:
+                self.condition.notify()
+        if full and self.flusher is not None:
+            self.flusher.wake()
+
+    def _run(self):
+        """Flusher loop: waits for a full batch or the flush interval, then writes."""
+        while True:
+            with self.condition:
+                if self.running and len(self.pending) < self.batch_size:
+                    self.condition.wait(self.flush_interval)
+                batch = list(self.pending)
+                self.pending.clear()
+                running = self.running
+
+            if batch:
+                self._write(batch)
+            if not running:
+                break
+
+    def flush_pending(self):
+        """Writes whatever is pending on the calling thread (used by a shared `SeriesFlusher` and `close()`)."""
+        with self.write_lock:  # Taken before the batch, so batches reach the file in order
+            if self.file is None:  # Closed meanwhile
+                return
+            with self.condition:
+                batch = list(self.pending)
+                self.pending.clear()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        """Writes one batch as NDJSON lines and fsyncs if the interval elapsed."""
+        try:
+            lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch)
+            self.file.write(lines)
+            self.file.flush()
+            self.records_written += len(batch)
+
+            now = time.monotonic()
+            if now - self.last_fsync >= self.fsync_interval:
+                os.fsync(self.file.fileno())
+                self.last_fsync = now
+        except Exception as e:
+            print(f"[ERROR] Failed to persist {len(batch)} records to {self.path}: {e}")
+
+    def metrics(self):
+        """Returns queue depth and write counters."""
+        return {
+            "depth": len(self.pending),
+            "maxsize": self.pending.maxlen,
+            "written": self.records_written,
+            "dropped": self.dropped,
+        }
+
+    def close(self):
+        """Flushes pending records, fsyncs and stops the flusher thread."""
+        if not self.running:
+            return
+        if self.flusher is not None:
+            self.flusher.remove(self)
+            self.running = False
+            self.flush_pending()
+        else:
+            with self.condition:
+                self.running = False
+                self.condition.notify()
+            self.thread.join()
+        with self.write_lock:
+            try:
+                os.fsync(self.file.fileno())
+            finally:
+                self.file.close()
+                self.file = None
+
+
+class SeriesFlusher:
+    """One background thread flushing many `SeriesWriter`s.
+
+    A process following many symbols would otherwise run one flusher
+    thread per series file (price, CVD, trade CVD, bars, ...). Writers
+    created with `flusher=` register here when they start; the thread
+    writes everything pending every `flush_interval` seconds, or as soon as
+    a writer reports a full batch.
+    """
+
+    def __init__(self, flush_interval=1.0):
+        self.flush_interval = flush_interval
+        self.writers = []  # Replaced, never mutated, so the thread can iterate without the lock
+        self.condition = threading.Condition()
+        self.woken = False
+        self.thread = None
+        self.running = False
+
+    def add(self, writer):
+        with self.condition:
+            self.writers = self.writers + [writer]
+            if not self.running:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, name="SeriesFlusher")
+                self.thread.daemon = True
+                self.thread.start()
+
+    def remove(self, writer):
+        with self.condition:
+            self.writers = [w for w in self.writers if w is not writer]
+
+    def wake(self):
+        """Asks for a flush now (a writer has a full batch)."""
+        with self.condition:
+            self.woken = True
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if self.running and not self.woken:
+                    self.condition.wait(self.flush_interval)
+                self.woken = False
+                writers = self.writers
+                running = self.running
+            for writer in writers:
+                writer.flush_pending()
+            if not running:
+                break
+
+    def metrics(self):
+        return {"writers": len(self.writers), "pending": sum(len(writer.pending) for writer in self.writers)}
+
+    def close(self):
+        """Closes every registered writer (flushing it) and stops the thread."""
+        for writer in list(self.writers):
+            writer.close()
+        with self.condition:
+            if not self.running:
+                return
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+        self.thread = None
+
+
+def read_series(path):
+    """Streams records from an NDJSON series file (or a legacy JSON array file).
+
+    Yields one dict per record without loading the whole NDJSON file.
+    Malformed lines, such as a truncated last line after a crash, are skipped.
+    """
+    if not os.path.exists(path):
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+
+        if first == "[":  # Legacy format: one pretty-printed JSON array
+            yield from json.load(f)
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"[WARNING] Skipping malformed record in {path}")
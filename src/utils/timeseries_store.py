@@ -0,0 +1,199 @@
+import datetime
+import os
+import sys
+import numpy as np
+import pandas as pd
+from src.utils.series_log import read_series
+
+SECONDS_PER_DAY = 86400
+COLUMN_SUFFIX = ".f64"
+ITEM_SIZE = np.dtype("<f8").itemsize
+
+
+def to_epoch_seconds(value):
+    """Accepts epoch seconds, datetimes or date strings; returns float epoch seconds (UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return timestamp.timestamp()
+
+
+def day_name(day_index):
+    return datetime.datetime.fromtimestamp(int(day_index) * SECONDS_PER_DAY, datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+def day_index(name):
+    return int(datetime.datetime.strptime(name, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc).timestamp()) // SECONDS_PER_DAY
+
+
+class TimeSeriesStore:
+    """Columnar time-series store partitioned by symbol and UTC day.
+
+    Layout: `<root>/<symbol>/<YYYY-MM-DD>/<column>.f64`, each column a raw
+    little-endian float64 file that is appended to and read back with
+    `np.memmap`. `load()` only opens the partitions overlapping the
+    requested range and only the requested columns, and slices rows with a
+    binary search on the (sorted) timestamp column, so nothing is parsed
+    and untouched data is never paged in.
+
+    The timestamp column defines a partition's rows and is written last.
+    Every other column is kept at exactly that length: a column missing
+    from a batch gets NaN, a column new in a batch is NaN for the earlier
+    rows, and a tail left by a crash mid-append is cut before the next write.
+    """
+
+    def __init__(self, root, time_column="timestamp"):
+        self.root = root
+        self.time_column = time_column
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def partitions(self, symbol):
+        """Sorted day names stored for `symbol`."""
+        path = os.path.join(self.root, symbol)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.listdir(path))
+
+    def columns(self, symbol, day):
+        return self.columns_at(os.path.join(self.root, symbol, day))
+
+    @staticmethod
+    def columns_at(path):
+        if not os.path.isdir(path):
+            return []
+        return sorted(name[:-len(COLUMN_SUFFIX)] for name in os.listdir(path) if name.endswith(COLUMN_SUFFIX))
+
+    # ---- Writing -------------------------------------------------------
+
+    def write(self, symbol, data):
+        """Appends rows (a DataFrame or dict of equal-length arrays) to the day partitions.
+
+        Rows should arrive in timestamp order; each batch is sorted before writing.
+        """
+        frame = pd.DataFrame(data)
+        if frame.empty:
+            return 0
+        frame = frame.sort_values(self.time_column, kind="stable")
+        timestamps = frame[self.time_column].to_numpy(dtype=np.float64)
+        days = np.floor(timestamps / SECONDS_PER_DAY).astype(np.int64)
+
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(days)]):
+            path = os.path.join(self.root, symbol, day_name(days[start]))
+            os.makedirs(path, exist_ok=True)
+            rows = len(self._column(path, self.time_column))
+            value_columns = [c for c in dict.fromkeys(self.columns_at(path) + list(frame.columns)) if c != self.time_column]
+            for column in value_columns + [self.time_column]:  # Timestamps last: they commit the rows
+                file_path = os.path.join(path, column + COLUMN_SUFFIX)
+                self._align(file_path, rows)
+                if column in frame.columns:
+                    values = pd.to_numeric(frame[column].iloc[start:end], errors="coerce").to_numpy(dtype="<f8")
+                else:
+                    values = np.full(end - start, np.nan, dtype="<f8")
+                with open(file_path, "ab") as f:
+                    f.write(values.tobytes())
+        return len(frame)
+
+    @staticmethod
+    def _align(file_path, rows):
+        """Cuts or NaN-pads a column file to exactly `rows` values before appending to it."""
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        target = rows * ITEM_SIZE
+        if size > target or size % ITEM_SIZE:
+            size = min(target, size - size % ITEM_SIZE)
+            os.truncate(file_path, size)
+        if size < target:
+            with open(file_path, "ab") as f:
+                f.write(np.full((target - size) // ITEM_SIZE, np.nan, dtype="<f8").tobytes())
+
+    # ---- Reading -------------------------------------------------------
+
+    def _column(self, path, column):
+        file_path = os.path.join(path, column + COLUMN_SUFFIX)
+        rows = os.path.getsize(file_path) // ITEM_SIZE if os.path.exists(file_path) else 0  # Ignores a torn last value
+        if rows == 0:
+            return np.empty(0, dtype="<f8")
+        return np.memmap(file_path, dtype="<f8", mode="r", shape=(rows,))
+
+    def load(self, symbol, start=None, end=None, columns=None):
+        """Returns a DataFrame of rows with start <= timestamp <= end, reading only the needed partitions and columns."""
+        start = to_epoch_seconds(start)
+        end = to_epoch_seconds(end)
+        first_day = None if start is None else int(np.floor(start / SECONDS_PER_DAY))
+        last_day = None if end is None else int(np.floor(end / SECONDS_PER_DAY))
+
+        pieces = []
+        for day in self.partitions(symbol):
+            index = day_index(day)
+            if (first_day is not None and index < first_day) or (last_day is not None and index > last_day):
+                continue
+
+            path = os.path.join(self.root, symbol, day)
+            wanted = columns or self.columns(symbol, day)
+            timestamps = self._column(path, self.time_column)
+            rows = len(timestamps)  # Longer columns carry an uncommitted tail from a crash mid-append
+
+            lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+            hi = rows if end is None else int(np.searchsorted(timestamps, end, side="right"))
+            if hi <= lo:
+                continue
+            piece = {}
+            for column in dict.fromkeys([self.time_column] + list(wanted)):
+                values = self._column(path, column)
+                if not os.path.exists(os.path.join(path, column + COLUMN_SUFFIX)):
+                    values = np.full(rows, np.nan)  # Column never written in this partition
+                elif len(values) < rows:
+                    raise ValueError(f"Column '{column}' in {path} has {len(values)} rows, timestamps have {rows}; the partition is misaligned.")
+                piece[column] = np.array(values[lo:hi])
+            pieces.append(piece)
+
+        if not pieces:
+            return pd.DataFrame(columns=list(dict.fromkeys([self.time_column] + list(columns or []))))
+        frame = pd.DataFrame({c: np.concatenate([p[c] for p in pieces]) for c in pieces[0]})
+        if columns and self.time_column not in columns:
+            frame = frame[list(columns)]
+        return frame
+
+
+def import_series(path, store, symbol, batch_size=100000):
+    """One-shot importer: streams a JSON/NDJSON series file into the store in batches."""
+    batch = []
+    imported = 0
+    for record in read_series(path):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            imported += store.write(symbol, batch)
+            batch = []
+    if batch:
+        imported += store.write(symbol, batch)
+    print(f"[INFO] Imported {imported} rows from {path} into {store.root}/{symbol}")
+    return imported
+
+
+def load_frame(source, symbol=None, start=None, end=None, columns=None):
+    """Loads a series as a DataFrame from a store directory (with `symbol`) or a JSON/NDJSON file."""
+    if symbol is not None and os.path.isdir(source):
+        return TimeSeriesStore(source).load(symbol, start, end, columns)
+
+    frame = pd.DataFrame(list(read_series(source)))
+    if frame.empty:
+        return frame
+    if start is not None:
+        frame = frame[frame["timestamp"] >= to_epoch_seconds(start)]
+    if end is not None:
+        frame = frame[frame["timestamp"] <= to_epoch_seconds(end)]
+    return frame[list(columns)] if columns else frame
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.utils.timeseries_store <series_file> <store_root> <symbol>
+    # e.g.   python -m src.utils.timeseries_store data/cvd_data.json data/series/cvd BTCUSDT
+    import_series(sys.argv[1], TimeSeriesStore(sys.argv[2]), sys.argv[3])
@@ -1,21 +1,15 @@
-import time
-from src.exchanges.websockets import WebSocketManager
+import asyncio
+from src.exchanges.stream_multiplexer import CombinedStreamManager
 
 if __name__ == "__main__":
-    trading_pair = "BTC/USDT"  # Changeable
-    print(f"\nStarting WebSocket for {trading_pair}...")
+    trading_pairs = ["BTC/USDT", "ETH/USDT", "SOL/USDT"]  # Changeable
+    print(f"\nStarting combined WebSocket streams for {', '.join(trading_pairs)}...")
 
-    # Initialize WebSocket Manager for Spot and Futures separately
-    ws_manager_spot = WebSocketManager(is_futures=False)
-    ws_manager_futures = WebSocketManager(is_futures=True)
-
-    # Start WebSockets for both Spot & Futures
-    ws_manager_spot.start_all(trading_pair)
-    ws_manager_futures.start_all(trading_pair)
+    # One manager multiplexes every symbol over a few combined-stream connections
+    stream_manager = CombinedStreamManager()
 
     # Keep the script running
     try:
-        while True:
-            time.sleep(1)
+        asyncio.run(stream_manager.run(trading_pairs))
     except KeyboardInterrupt:
         print("\n[EXIT] WebSocket connections closed.")
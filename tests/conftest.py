@@ -0,0 +1,18 @@
+import os
+import pytest
+from src.utils.logger import configure_live_logger
+
+
+@pytest.fixture(autouse=True, scope="session")
+def live_log(tmp_path_factory):
+    """Keeps the live logger, also in spawned worker processes, out of data/logs/."""
+    path = str(tmp_path_factory.mktemp("logs") / "live.log")
+    previous = os.environ.get("LIVE_LOG_FILE")
+    os.environ["LIVE_LOG_FILE"] = path
+    log = configure_live_logger(log_file=path)
+    yield path
+    log.close()
+    if previous is None:
+        del os.environ["LIVE_LOG_FILE"]
+    else:
+        os.environ["LIVE_LOG_FILE"] = previous
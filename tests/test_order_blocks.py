@@ -0,0 +1,42 @@
+import numpy as np
+from src.analysis.order_blocks import rolling_percentile, RollingPercentile, bullish_order_blocks
+
+
+def test_interior_nan_is_skipped_not_treated_as_end_of_row():
+    rng = np.random.default_rng(0)
+    volume = rng.exponential(100.0, 40)
+    gapped = volume.copy()
+    gapped[10] = np.nan
+    padded = np.r_[gapped, np.full(5, np.nan)]  # Trailing padding, as from stack_candles
+
+    result = rolling_percentile(padded, 5, 80)
+    expected = rolling_percentile(np.delete(volume, 10), 5, 80)
+
+    assert np.isnan(result[10])
+    assert np.allclose(np.delete(result[:40], 10), expected, equal_nan=True)
+    assert np.isnan(result[40:]).all()
+    assert not np.isnan(result[11:40]).any()
+
+
+def test_streaming_percentile_skips_missing_values():
+    values = [5.0, 1.0, np.nan, 4.0, 2.0, 3.0, np.nan, 6.0]
+    stream = RollingPercentile(window=3, percentile=50)
+    streamed = [stream.update(value) for value in values]
+    batch = rolling_percentile(np.array(values), 3, 50).tolist()
+    for value, expected in zip(streamed, batch):
+        assert (value is None and np.isnan(expected)) or value == expected
+
+
+def test_signals_continue_after_missing_volume():
+    n = 30
+    open_ = np.full(n, 100.0)
+    close = np.full(n, 100.1)
+    high = np.full(n, 100.2)
+    low = np.full(n, 100.0)
+    volume = np.full(n, 10.0)
+    volume[5] = np.nan
+    close[25], high[25], volume[25] = 102.0, 102.5, 50.0  # Impulse bar on high volume after the gap
+
+    blocks = bullish_order_blocks(open_, high, low, close, volume, impulse_threshold=0.01, consolidation_range=0.005, lookback=10, volume_percentile=80)
+    assert blocks["signal"][25]
+    assert not blocks["signal"][5]
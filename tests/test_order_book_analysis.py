@@ -0,0 +1,17 @@
+from src.trading.order_book_buffer import OrderBookRingBuffer
+from src.trading.order_book_analysis import OrderBookAnalysis
+
+
+def test_coalesced_snapshots_keep_their_own_timestamps(tmp_path):
+    buffer = OrderBookRingBuffer(capacity=10, depth=2)
+    analysis = OrderBookAnalysis(buffer, cvd_file=str(tmp_path / "cvd.ndjson"))
+    for i, timestamp in enumerate((10.0, 10.5, 11.25)):
+        buffer.append(timestamp, [[100.0, 2.0 + i]], [[100.5, 1.0]])
+
+    cvd = analysis.compute_cvd(100.5)  # One call folds all three snapshots
+    analysis.close()
+
+    points = analysis.cvd_accumulator.get_history()
+    assert [point["timestamp"] for point in points] == [10.0, 10.5, 11.25]
+    assert [point["cvd"] for point in points] == [1.0, 3.0, 6.0]
+    assert cvd == 6.0
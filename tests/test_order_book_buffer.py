@@ -0,0 +1,18 @@
+import numpy as np
+from src.trading.order_book_buffer import OrderBookRingBuffer, PRICE, QTY
+
+
+def test_unwritten_rows_never_reach_readers():
+    buffer = OrderBookRingBuffer(capacity=3, depth=2)
+    buffer.bids.fill(7.0)  # Stand-in for whatever the uninitialized allocation holds
+    buffer.asks.fill(7.0)
+    for i in range(5):  # Wraps once
+        buffer.append(float(i), [[100.0 - i, 1.0]], [[101.0 + i, 2.0], [102.0 + i, 3.0]])
+
+    timestamps, bids, asks = buffer.window()
+    assert timestamps.tolist() == [2.0, 3.0, 4.0]
+    assert np.isnan(bids[:, 1, PRICE]).all() and (bids[:, 1, QTY] == 0.0).all()  # Missing level padded
+    bid_volume, ask_volume = buffer.volumes()
+    assert bid_volume.tolist() == [1.0, 1.0, 1.0]
+    assert ask_volume.tolist() == [5.0, 5.0, 5.0]
+    assert buffer.slice(0, 5)[0].tolist() == [2.0, 3.0, 4.0]  # Evicted rows clipped off
@@ -0,0 +1,62 @@
+from src.trading import order_book_storage
+from src.trading.order_book_storage import OrderBookStore, save_order_book, close_order_book_stores
+
+
+def book(i):
+    return [[100.0 - i, 1.0 + i]], [[101.0 + i, 2.0]]
+
+
+def test_open_block_is_readable_and_written_on_close(tmp_path):
+    store = OrderBookStore(str(tmp_path / "store"), keyframe_interval=10, flush_interval=None)
+    for i in range(25):
+        store.append(1000.0 + i, *book(i))
+    assert len(store.index) == 2  # Last 5 books are still in the open block
+
+    assert store.book_at(2000.0)["timestamp"] == 1024.0
+    assert [b["timestamp"] for b in store.iter_books(1018.0, 1030.0)] == [1018.0 + i for i in range(7)]
+    assert store.time_range() == (1000.0, 1024.0)
+
+    store.close()
+    reopened = OrderBookStore(str(tmp_path / "store"))
+    assert len(list(reopened.iter_books(0, 2000))) == 25
+    assert reopened.book_at(1024.0)["bids"] == [(76.0, 25.0)]
+
+
+def test_partial_block_flushed_after_interval(tmp_path):
+    store = OrderBookStore(str(tmp_path / "store"), keyframe_interval=100, flush_interval=0.0)
+    store.append(1.0, *book(0))
+    assert len(store.index) == 1
+
+
+def test_close_order_book_stores_flushes_default_stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(order_book_storage, "HISTORICAL_DIR", str(tmp_path))
+    for i in range(3):
+        bids, asks = book(i)
+        save_order_book({"bids": bids, "asks": asks}, "binance", "BTC/USDT")
+    close_order_book_stores()
+    assert not order_book_storage._default_stores
+    assert len(list(OrderBookStore(str(tmp_path / "binance_BTCUSDT")).iter_books(0, float("inf")))) == 3
+
+
+def test_torn_flush_is_cut_before_appending(tmp_path):
+    path = str(tmp_path / "store")
+    store = OrderBookStore(path, keyframe_interval=10, flush_interval=None)
+    for i in range(20):
+        store.append(1000.0 + i, *book(i))
+    store.close()
+    with open(store.segment_path(0), "ab") as f:  # Interrupted flush: block data written, index entry torn
+        f.write(b"\x78\x9c partial block")
+    with open(store.index_path, "ab") as f:
+        f.write(b"\x00" * 10)
+
+    store = OrderBookStore(path, keyframe_interval=10, flush_interval=None)
+    assert len(store.index) == 2
+    for i in range(20, 30):
+        store.append(1000.0 + i, *book(i))
+    store.close()
+
+    reopened = OrderBookStore(path)
+    assert len(reopened.index) == 3
+    last = reopened.index[-1]
+    assert int(last["offset"]) == int(reopened.index[1]["offset"]) + int(reopened.index[1]["length"])  # Right after the last indexed block
+    assert [b["timestamp"] for b in reopened.iter_books(0, 2000)] == [1000.0 + i for i in range(30)]
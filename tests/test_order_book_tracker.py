@@ -0,0 +1,144 @@
+import time
+from benchmarks.synthetic import SyntheticDepthStream
+from src.trading.order_book_tracker import OrderBookTracker
+from configs.settings import SNAPSHOT_RETRY_DELAY
+
+
+class LiveLikeSnapshotSource:
+    """Returns snapshots `lead` update ids past the last diff the tracker has seen, as the REST endpoint does live."""
+
+    def __init__(self, stream, lead=3):
+        self.stream = stream
+        self.lead = lead
+        self.last_seen = None
+        self.fetches = 0
+
+    def fetch_order_book(self, symbol):
+        self.fetches += 1
+        snapshot = self.stream.snapshot(0)
+        snapshot["nonce"] = self.last_seen + self.lead
+        return snapshot
+
+
+def run(diffs, source, tracker):
+    applied = 0
+    for diff in diffs:
+        source.last_seen = diff["u"]
+        applied += tracker.update_order_book("binance", diff)
+    return applied
+
+
+def test_syncs_when_snapshot_is_ahead_of_triggering_diff():
+    stream = SyntheticDepthStream(levels=50, rate=50, duration=1, levels_per_diff=1)
+    source = LiveLikeSnapshotSource(stream, lead=3)
+    tracker = OrderBookTracker(trading_pair="SYM0/USDT", snapshot_source=source)
+
+    applied = run(stream.diffs(0), source, tracker)
+
+    assert tracker.order_book.synced
+    assert source.fetches == 1
+    assert tracker.snapshot_fetches == 1
+    assert applied == 50 - 4  # The triggering diff and the 3 the snapshot covers are dropped
+    assert tracker.order_book.last_update_id == 1050
+
+
+def test_refetches_when_snapshot_is_older_than_buffered_diffs():
+    stream = SyntheticDepthStream(levels=50, rate=20, duration=1, levels_per_diff=1)
+    source = LiveLikeSnapshotSource(stream, lead=-5)  # Snapshot from before the first buffered diff
+    tracker = OrderBookTracker(trading_pair="SYM0/USDT", snapshot_source=source)
+
+    diffs = list(stream.diffs(0))
+    run(diffs[:2], source, tracker)
+    assert not tracker.order_book.synced
+    assert tracker.needs_snapshot
+
+    source.lead = 0
+    run(diffs[2:], source, tracker)
+    assert tracker.order_book.synced
+    assert tracker.order_book.last_update_id == diffs[-1]["u"]
+
+
+def test_resyncs_once_after_sequence_gap():
+    stream = SyntheticDepthStream(levels=50, rate=40, duration=1, levels_per_diff=1)
+    source = LiveLikeSnapshotSource(stream, lead=0)
+    tracker = OrderBookTracker(trading_pair="SYM0/USDT", snapshot_source=source)
+
+    diffs = list(stream.diffs(0))
+    run(diffs[:10], source, tracker)
+    assert tracker.order_book.synced
+
+    source.lead = 2
+    run(diffs[11:], source, tracker)  # diffs[10] is lost
+    assert tracker.sequence_gaps == 1
+    assert source.fetches == 2
+    assert tracker.order_book.synced
+    assert tracker.order_book.last_update_id == diffs[-1]["u"]
+
+
+class FailingSnapshotSource:
+    """Returns `failures` unusable snapshots (no update id), then real ones."""
+
+    def __init__(self, stream, failures):
+        self.stream = stream
+        self.failures = failures
+        self.fetches = 0
+
+    def fetch_order_book(self, symbol):
+        self.fetches += 1
+        if self.fetches <= self.failures:
+            return {"bids": [], "asks": []}
+        return self.stream.snapshot(0)
+
+
+def test_failed_snapshots_back_off_instead_of_refetching_per_diff():
+    stream = SyntheticDepthStream(levels=50, rate=50, duration=1, levels_per_diff=1)
+    diffs = list(stream.diffs(0))
+    source = FailingSnapshotSource(stream, failures=2)
+    tracker = OrderBookTracker(trading_pair="SYM0/USDT", snapshot_source=source)
+
+    for diff in diffs[:10]:
+        tracker.update_order_book("binance", diff)
+    assert source.fetches == 1  # Cooling down, diffs buffered
+    assert tracker.snapshot_failures == 1
+    assert tracker.snapshot_retry_at - time.monotonic() <= SNAPSHOT_RETRY_DELAY
+
+    tracker.snapshot_retry_at = 0.0  # Cooldown expired
+    tracker.update_order_book("binance", diffs[10])
+    assert source.fetches == 2
+    assert tracker.snapshot_retry_at - time.monotonic() > SNAPSHOT_RETRY_DELAY  # Doubled
+
+    tracker.snapshot_retry_at = 0.0
+    for diff in diffs[11:]:
+        tracker.update_order_book("binance", diff)
+    assert source.fetches == 3
+    assert tracker.snapshot_failures == 0
+    assert tracker.order_book.synced
+    assert tracker.order_book.last_update_id == 1050
+
+
+class OneSnapshotSource:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def fetch_order_book(self, symbol):
+        return self.snapshot
+
+
+def test_walls_are_published_with_the_snapshot():
+    tracker = OrderBookTracker(trading_pair="SYM0/USDT")
+    big = tracker.wall_index.threshold
+    tracker.snapshot_source = OneSnapshotSource({"nonce": 10, "bids": [[100.0, 1.0], [99.0, big]], "asks": [[101.0, 1.0]]})
+
+    tracker.update_order_book("binance", {"U": 11, "u": 11, "b": [["98", str(2 * big)]], "a": []})
+    first = tracker.snapshot()
+    assert first.bid_walls == ((99.0, big), (98.0, 2 * big))
+    assert first.ask_walls == ()
+
+    tracker.update_order_book("binance", {"U": 12, "u": 12, "b": [["99", "0"]], "a": [["102", str(big)]]})
+    second = tracker.snapshot()
+    assert second.bid_walls == ((98.0, 2 * big),)
+    assert second.ask_walls == ((102.0, big),)
+    assert first.bid_walls == ((99.0, big), (98.0, 2 * big))  # Published snapshots are never mutated
+
+    tracker.update_order_book("binance", {"U": 13, "u": 13, "b": [["100", "2"]], "a": []})
+    assert tracker.snapshot().bid_walls is second.bid_walls  # Walls unchanged, tuples reused
@@ -0,0 +1,32 @@
+import uuid
+from src.exchanges.sharding import TopOfBookTable
+
+
+def test_readers_recover_after_writer_killed_mid_publish():
+    table = TopOfBookTable(["BTC/USDT", "ETH/USDT"], name=f"tob_test_{uuid.uuid4().hex[:8]}")
+    try:
+        row = table.row("BTC/USDT")
+        table.publish(row, 1.0, 100.0, 101.0, 5.0, 6.0)
+        table.rows["sequence"][row] += 1  # Writer killed after marking the row as being written
+        assert table.rows["sequence"][row] % 2 == 1
+
+        table.publish(row, 2.0, 102.0, 103.0, 7.0, 8.0)  # Restarted writer
+        assert table.rows["sequence"][row] % 2 == 0
+        assert table.read("BTC/USDT")["best_ask"] == 103.0
+        assert table.snapshot()["timestamp"][row] == 2.0
+    finally:
+        table.close()
+        table.unlink()
+
+
+def test_reset_rows_makes_orphaned_rows_readable():
+    table = TopOfBookTable(["BTC/USDT", "ETH/USDT"], name=f"tob_test_{uuid.uuid4().hex[:8]}")
+    try:
+        table.publish(table.row("ETH/USDT"), 1.0, 10.0, 11.0)
+        table.rows["sequence"][table.row("ETH/USDT")] += 1
+        table.reset_rows(["ETH/USDT"])
+        assert table.rows["sequence"][table.row("ETH/USDT")] % 2 == 0
+        assert table.read("ETH/USDT")["mid"] == 10.5
+    finally:
+        table.close()
+        table.unlink()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+import urllib.parse
+import websockets
+from benchmarks.synthetic import SyntheticDepthStream, StaticSnapshotSource
+from src.exchanges import stream_multiplexer
+from src.exchanges.stream_multiplexer import CombinedStreamManager, stream_name
+
+
+class StandInServer:
+    """Local combined-stream endpoint: records the streams of each connection and every request sent on it."""
+
+    def __init__(self):
+        self.connections = []  # (streams from the URL, live websocket)
+        self.requests = []
+        self.server = None
+
+    async def handler(self, ws):
+        query = urllib.parse.urlparse(ws.request.path).query
+        streams = urllib.parse.parse_qs(query)["streams"][0].split("/")
+        self.connections.append((streams, ws))
+        async for message in ws:
+            request = json.loads(message)
+            self.requests.append(request)
+            await ws.send(json.dumps({"result": None, "id": request["id"]}))
+
+    async def start(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}/stream"
+
+    async def send(self, stream, data):
+        for _, ws in self.connections:
+            await ws.send(json.dumps({"stream": stream, "data": data}))
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_routes_frames_and_subscribes_at_runtime(tmp_path, monkeypatch):
+    for name in ("PRICE_DATA_FILE", "CVD_DATA_FILE", "TRADE_CVD_DATA_FILE", "BAR_DATA_FILE"):
+        monkeypatch.setattr(stream_multiplexer, name, str(tmp_path / f"{name.lower()}.ndjson"))
+    stream = SyntheticDepthStream(symbols=3, levels=50, rate=20, duration=1, levels_per_diff=2)
+    pairs = [stream.trading_pair(symbol) for symbol in stream.symbols]
+    source = StaticSnapshotSource({pair: stream.snapshot(i) for i, pair in enumerate(pairs)})
+
+    async def scenario():
+        server = StandInServer()
+        manager = CombinedStreamManager(exchange=source, base_url=await server.start(), reconnect_delay=0.1)
+        try:
+            await manager.subscribe(pairs[:2])
+            await wait_for(lambda: len(server.connections) == 1)
+            assert sorted(server.connections[0][0]) == sorted(stream_name(p, c) for p in pairs[:2] for c in ("depth", "aggTrade"))
+
+            # Interleaved frames reach the right symbol's book
+            for diffs in zip(stream.diffs(0), stream.diffs(1)):
+                for i, diff in enumerate(diffs):
+                    await server.send(stream_name(pairs[i], "depth"), diff)
+            trackers = [manager.handlers[stream_name(pair)].order_book_tracker for pair in pairs[:2]]
+            await wait_for(lambda: all(t.order_book.last_update_id == 1000 + 2 * 20 for t in trackers))
+            assert all(t.order_book.synced for t in trackers)
+
+            # Runtime subscribe goes over the open socket, no reconnect
+            await manager.subscribe(pairs[2:])
+            await wait_for(lambda: server.requests)
+            assert server.requests[-1]["method"] == "SUBSCRIBE"
+            assert server.requests[-1]["params"] == sorted(stream_name(pairs[2], c) for c in ("depth", "aggTrade"))
+            for diff in stream.diffs(2):
+                await server.send(stream_name(pairs[2], "depth"), diff)
+            tracker = manager.handlers[stream_name(pairs[2])].order_book_tracker
+            await wait_for(lambda: tracker.order_book.last_update_id == 1000 + 2 * 20)
+
+            # One flusher and one dispatch thread for every symbol, none per writer or symbol
+            names = [thread.name for thread in threading.enumerate()]
+            assert names.count("SeriesFlusher") == 1
+            assert [name for name in names if name.startswith("Stage[")] == ["Stage[dispatch-0]"]
+            assert not [name for name in names if name.startswith("SeriesWriter")]
+            assert len([name for name in names if name.startswith("snapshot")]) <= stream_multiplexer.SNAPSHOT_FETCH_WORKERS
+
+            await manager.unsubscribe(pairs[:1])
+            await wait_for(lambda: len(server.requests) == 2)
+            assert server.requests[-1]["method"] == "UNSUBSCRIBE"
+            assert server.requests[-1]["params"] == sorted(stream_name(pairs[0], c) for c in ("depth", "aggTrade"))
+            assert stream_name(pairs[0]) not in manager.handlers
+            assert len(server.connections) == 1
+        finally:
+            await manager.stop()
+            await server.stop()
+
+    asyncio.run(scenario())
+    assert (tmp_path / "price_data_file_sym1usdt.ndjson").read_text().count("\n") > 0
+
+
+class SlowSnapshotSource(StaticSnapshotSource):
+    """Blocks fetches for the `slow` pair until released."""
+
+    def __init__(self, snapshots, slow):
+        super().__init__(snapshots)
+        self.slow = slow
+        self.release = threading.Event()
+
+    def fetch_order_book(self, trading_pair):
+        if trading_pair == self.slow:
+            self.release.wait(5)
+        return super().fetch_order_book(trading_pair)
+
+
+def test_pending_snapshot_does_not_stall_other_symbols(tmp_path, monkeypatch):
+    for name in ("PRICE_DATA_FILE", "CVD_DATA_FILE", "TRADE_CVD_DATA_FILE", "BAR_DATA_FILE"):
+        monkeypatch.setattr(stream_multiplexer, name, str(tmp_path / f"{name.lower()}.ndjson"))
+    stream = SyntheticDepthStream(symbols=2, levels=50, rate=20, duration=1, levels_per_diff=2)
+    pairs = [stream.trading_pair(symbol) for symbol in stream.symbols]
+    source = SlowSnapshotSource({pair: stream.snapshot(i) for i, pair in enumerate(pairs)}, slow=pairs[0])
+
+    async def scenario():
+        server = StandInServer()
+        manager = CombinedStreamManager(exchange=source, base_url=await server.start(), reconnect_delay=0.1)
+        try:
+            await manager.subscribe(pairs)
+            await wait_for(lambda: len(server.connections) == 1)
+            for diffs in zip(stream.diffs(0), stream.diffs(1)):
+                for i, diff in enumerate(diffs):
+                    await server.send(stream_name(pairs[i], "depth"), diff)
+            slow, fast = (manager.handlers[stream_name(pair)].order_book_tracker for pair in pairs)
+
+            # The fast symbol syncs and applies every diff while the slow one's snapshot is still in flight
+            await wait_for(lambda: fast.order_book.last_update_id == 1000 + 2 * 20)
+            await wait_for(lambda: len(slow.pending_diffs) == 20)
+            assert not slow.order_book.synced and slow.snapshot_fetches == 1
+
+            # Once delivered, the buffered diffs are replayed without waiting for another frame
+            source.release.set()
+            await wait_for(lambda: slow.order_book.last_update_id == 1000 + 2 * 20)
+            assert not slow.pending_diffs
+        finally:
+            source.release.set()
+            await manager.stop()
+            await server.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from src.utils.timeseries_store import TimeSeriesStore, COLUMN_SUFFIX
+
+DAY = 1_700_006_400.0  # Start of a UTC day
+
+
+def test_columns_added_and_dropped_between_batches_stay_aligned(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    store.write("BTCUSDT", [{"timestamp": DAY + i, "cvd": float(i)} for i in range(5)])  # Legacy rows
+    store.write("BTCUSDT", [{"timestamp": DAY + i, "cvd": float(i), "sma_10": 10.0 * i} for i in range(5, 8)])
+    store.write("BTCUSDT", [{"timestamp": DAY + 8, "sma_10": 80.0}])
+
+    frame = store.load("BTCUSDT")
+    assert len(frame) == 9
+    assert frame["timestamp"].tolist() == [DAY + i for i in range(9)]
+    assert np.isnan(frame["sma_10"][:5]).all()
+    assert frame["sma_10"][5:].tolist() == [50.0, 60.0, 70.0, 80.0]
+    assert frame["cvd"][:8].tolist() == [float(i) for i in range(8)]
+    assert np.isnan(frame["cvd"][8])
+
+
+def test_uncommitted_tail_is_ignored_and_cut_on_next_write(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    store.write("BTCUSDT", {"timestamp": [DAY, DAY + 1], "price": [1.0, 2.0]})
+    day = store.partitions("BTCUSDT")[0]
+    with open(tmp_path / "BTCUSDT" / day / ("price" + COLUMN_SUFFIX), "ab") as f:  # Crash before the timestamps were written
+        f.write(np.array([99.0], dtype="<f8").tobytes()[:5])
+
+    assert store.load("BTCUSDT")["price"].tolist() == [1.0, 2.0]
+    store.write("BTCUSDT", {"timestamp": [DAY + 2], "price": [3.0]})
+    assert store.load("BTCUSDT")["price"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_short_column_raises_instead_of_truncating(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    store.write("BTCUSDT", {"timestamp": [DAY, DAY + 1, DAY + 2], "cvd": [1.0, 2.0, 3.0]})
+    day = store.partitions("BTCUSDT")[0]
+    path = tmp_path / "BTCUSDT" / day / ("cvd" + COLUMN_SUFFIX)
+    path.write_bytes(path.read_bytes()[:8])  # Written by an older version without padding
+
+    with pytest.raises(ValueError, match="misaligned"):
+        store.load("BTCUSDT")
@@ -0,0 +1,54 @@
+import json
+import threading
+from benchmarks.synthetic import SyntheticDepthStream, StaticSnapshotSource
+from src.exchanges.websockets import WebSocketManager
+
+
+def build_manager(tmp_path, stream):
+    pair = stream.trading_pair(stream.symbols[0])
+    return WebSocketManager(
+        pair,
+        exchange=StaticSnapshotSource({pair: stream.snapshot(0)}),
+        price_file=str(tmp_path / "price.ndjson"),
+        cvd_file=str(tmp_path / "cvd.ndjson"),
+        trade_cvd_file=str(tmp_path / "trade_cvd.ndjson"),
+        bar_file=str(tmp_path / "bars.ndjson"),
+    )
+
+
+def test_replayed_frames_keep_their_capture_time(tmp_path):
+    stream = SyntheticDepthStream(levels=50, rate=10, duration=2, levels_per_diff=2)
+    manager = build_manager(tmp_path, stream)
+    received = [1_600_000_000.0 + i * 0.1 for i in range(stream.messages_per_symbol)]
+    for received_at, message in zip(received, stream.frames(0)):
+        manager.handle_frame(received_at, message)
+    manager.close()
+
+    prices = [point["timestamp"] for point in manager.price_data]
+    cvd = [point["timestamp"] for point in manager.order_book_analysis.cvd_accumulator.get_history()]
+    assert prices == received
+    assert cvd == received
+    assert manager.order_book_tracker.order_book_buffer.latest()[0] == received[-1]
+
+
+def test_trades_run_on_the_analytics_stage_without_coalescing(tmp_path):
+    stream = SyntheticDepthStream(levels=50, rate=10, duration=1, levels_per_diff=2)
+    manager = build_manager(tmp_path, stream)
+    threads = set()
+    handle_trade = manager.handle_trade
+
+    def recording_handle_trade(data):
+        threads.add(threading.current_thread().name)
+        handle_trade(data)
+
+    manager.handle_trade = recording_handle_trade
+    for i in range(50):
+        trade = {"e": "aggTrade", "a": i, "p": "100.0", "q": "1.0", "T": 1_600_000_000_000 + i * 10, "m": i % 2 == 0}
+        manager.on_trade_message(None, json.dumps(trade))  # Socket thread: enqueue only
+    assert manager.trade_cvd.total_trades == 0
+
+    manager.pipeline.start()
+    manager.close()  # Drains the analytics stage
+    assert manager.trade_cvd.total_trades == 50
+    assert manager.trade_cvd.cvd == 0.0  # 25 aggressive buys, 25 sells
+    assert threads == {"Stage[analytics-0]"}